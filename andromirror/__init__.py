@@ -0,0 +1,6 @@
+"""
+AndroMirror by Juan v1.0
+Support modules for the AndroMirror GUI (adb helpers, deployment, sessions)
+"""
+
+__version__ = "1.0.0"
@@ -0,0 +1,66 @@
+"""
+Small helpers for building adb command lines
+
+Devices attached to a remote adb server (see andromirror.servers) are
+addressed as "serial@host:port" everywhere in AndroMirror; the helpers here
+turn that into `adb -H host -P port -s serial`.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_SERVER_PORT = 5037
+
+
+class AdbError(Exception):
+    """Raised when adb itself reports a failure"""
+
+
+def split_serial(serial: str) -> Tuple[Optional[str], str]:
+    """(server "host:port" or None for the local server, serial on that server)"""
+    local, sep, server = serial.rpartition("@")
+    return (server, local) if sep else (None, serial)
+
+
+def qualify_serial(serial: str, server: Optional[str]) -> str:
+    return f"{serial}@{server}" if server else serial
+
+
+def server_address(server: str) -> Tuple[str, int]:
+    """(host, port) of "host:port" or "[ipv6]:port"; raises ValueError"""
+    host, _, port = server.rpartition(":")
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+    return host, int(port)
+
+
+def format_server(host: str, port: int) -> str:
+    """"host:port", with an IPv6 host in brackets"""
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+def adb_command(*args: str, serial: Optional[str] = None, server: Optional[str] = None) -> List[str]:
+    """Build an adb command, optionally targeting a single device or a remote server"""
+    cmd = ["adb"]
+    if serial:
+        server, serial = split_serial(serial)
+    if server:
+        host, port = server_address(server)
+        cmd.extend(["-H", host, "-P", str(port)])
+    if serial:
+        cmd.extend(["-s", serial])
+    cmd.extend(args)
+    return cmd
+
+
+def adb_environment(serial: str) -> Optional[Dict[str, str]]:
+    """Environment that points tools spawning adb themselves (scrcpy) at the device's server"""
+    server, _ = split_serial(serial)
+    if not server:
+        return None
+    return dict(os.environ, ADB_SERVER_SOCKET=f"tcp:{server}")
+
+
+def shell_quote(value: str) -> str:
+    """Quote a value for the device's /system/bin/sh"""
+    return "'" + value.replace("'", "'\\''") + "'"
@@ -0,0 +1,228 @@
+"""
+andromirror-ctl: command line client for the AndroMirror daemon
+
+Examples:
+    andromirror-ctl devices --refresh
+    andromirror-ctl start "Pixel 7" --fps 30 --bitrate 4M
+    andromirror-ctl apply "Pixel 7" --bitrate 16M
+    andromirror-ctl sessions
+    andromirror-ctl events
+    andromirror-ctl servers --set lab-pc build-box:5038
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from typing import Dict, List
+
+from .config import ConfigStore
+from .daemon import DaemonClient, connect_or_spawn, run_daemon
+from .service import ServiceError
+
+
+def spawn_command(path=None) -> List[str]:
+    socket_args = ["--socket", path] if path else []
+    return [sys.executable, "-m", "andromirror.cli"] + socket_args + ["daemon"]
+
+
+def find_device(devices: List[Dict], name: str) -> Dict:
+    """Match a device by key, adb serial or (case-insensitive) model name"""
+    for device in devices:
+        if name == device["key"] or name in device["transports"]:
+            return device
+    matches = [device for device in devices if device["model"].lower() == name.lower()]
+    if len(matches) == 1:
+        return matches[0]
+    if matches:
+        raise ServiceError(f"Several devices are called {name}; use a serial instead")
+    raise ServiceError(f"Device not found: {name}")
+
+
+def format_session(session: Dict) -> str:
+    transport = session["transport"] or "starting"
+    return f"{session['name']:<24}{transport:<32}{session['state']:<10}{session['uptime']:8.0f} s"
+
+
+def cmd_devices(client, args):
+    devices = client.refresh_devices() if args.refresh else client.list_devices()
+    for device in devices:
+        print(f"{device['key']:<40}{device['label']}")
+
+
+def cmd_sessions(client, args):
+    for session in client.list_sessions():
+        print(format_session(session))
+
+
+def settings_from_args(settings: Dict, args) -> Dict:
+    """Settings with the options given on the command line applied"""
+    settings = dict(settings)
+    for name in ("resolution", "fps", "bitrate", "video_codec", "start_app"):
+        value = getattr(args, name)
+        if value is not None:
+            settings[name] = value
+    if args.new_display:
+        size, _, dpi = args.new_display.partition("/")
+        settings.update(display_mode="virtual", virtual_size=size or "window", virtual_dpi=dpi or "auto")
+    return settings
+
+
+def cmd_start(client, args):
+    device = find_device(client.refresh_devices(), args.device)
+    config = ConfigStore().load()
+    settings = settings_from_args(dict(config["settings"], **config["profiles"].get(device["key"], {})), args)
+    print(format_session(client.start_session(device["key"], settings)))
+
+
+def cmd_apply(client, args):
+    device = find_device(client.list_devices(), args.device)
+    session = next((s for s in client.list_sessions() if s["key"] == device["key"]), None)
+    if session is None:
+        raise ServiceError(f"{args.device} is not being mirrored")
+    print(format_session(client.apply_settings(device["key"], settings_from_args(session["settings"], args))))
+
+
+def cmd_stop(client, args):
+    device = find_device(client.list_devices(), args.device)
+    if not client.stop_session(device["key"]):
+        raise ServiceError(f"{args.device} is not being mirrored")
+
+
+def cmd_connect(client, args):
+    result = client.connect_wireless(args.endpoint)
+    print(result["message"])
+    if not result["connected"]:
+        return 1
+    client.refresh_devices()
+
+
+def cmd_events(client, args):
+    done = threading.Event()
+
+    def on_event(event):
+        print(json.dumps(event), flush=True)
+        if event["type"] == "disconnected":
+            done.set()
+
+    client.subscribe(on_event)
+    try:
+        done.wait()
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_logs(client, args):
+    results = client.search_logs(
+        text=" ".join(args.words),
+        serial=args.serial,
+        since=time.time() - args.hours * 3600 if args.hours else None,
+        level=args.level,
+        limit=args.limit,
+    )
+    for result in reversed(results):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(result["time"]))
+        print(f"{stamp}  {result['serial']:<20}{result['text']}")
+
+
+def cmd_servers(client, args):
+    if args.set is not None:
+        status = client.configure_servers(args.set)
+        store = ConfigStore()
+        config = store.load()
+        config["adb_servers"] = [row["server"] for row in status if not row["local"]]
+        store.save(config)
+    else:
+        status = client.server_status()
+    for row in status:
+        state = f"{row['devices']} device(s), {row['latency_ms']} ms" if row["ok"] else row["error"]
+        print(f"{row['server']:<32}{state}")
+
+
+def cmd_shutdown(client, args):
+    client.shutdown()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="andromirror-ctl", description="Control the AndroMirror daemon")
+    parser.add_argument("--socket", help="daemon socket (default: $ANDROMIRROR_SOCKET or the config directory)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    devices = commands.add_parser("devices", help="list devices")
+    devices.add_argument("--refresh", action="store_true", help="query adb instead of using the last refresh")
+    devices.set_defaults(func=cmd_devices)
+
+    commands.add_parser("sessions", help="list mirroring sessions").set_defaults(func=cmd_sessions)
+
+    start = commands.add_parser("start", help="start mirroring a device (key, serial or model)")
+    apply = commands.add_parser("apply", help="change a running session's settings without interrupting it")
+    for command in (start, apply):
+        command.add_argument("device")
+        command.add_argument("--resolution", choices=["SD (540p)", "HD (720p)", "FHD (1080p)", "4K"])
+        command.add_argument("--fps", choices=["30", "60", "120"])
+        command.add_argument("--bitrate", choices=["4M", "8M", "16M", "30M"])
+        command.add_argument("--video-codec", choices=["h264", "h265"])
+        command.add_argument("--new-display", nargs="?", const="window", metavar="WxH[/DPI]",
+                             help="mirror a new virtual display instead of the screen "
+                                  "(default size: the device's, capped at 1920)")
+        command.add_argument("--start-app", metavar="PACKAGE", help="launch an app when the session starts")
+    start.set_defaults(func=cmd_start)
+    apply.set_defaults(func=cmd_apply)
+
+    stop = commands.add_parser("stop", help="stop mirroring a device")
+    stop.add_argument("device")
+    stop.set_defaults(func=cmd_stop)
+
+    connect = commands.add_parser("connect", help="adb connect to ip:port")
+    connect.add_argument("endpoint")
+    connect.set_defaults(func=cmd_connect)
+
+    commands.add_parser("events", help="print device and session events as JSON lines").set_defaults(func=cmd_events)
+
+    logs = commands.add_parser("logs", help="search archived scrcpy output for lines with all WORDS")
+    logs.add_argument("words", nargs="*")
+    logs.add_argument("--serial", help="only this adb serial")
+    logs.add_argument("--hours", type=float, help="only the last HOURS hours")
+    logs.add_argument("--level", choices=["warn", "error"], help="only lines at or above this severity")
+    logs.add_argument("--limit", type=int, default=200)
+    logs.set_defaults(func=cmd_logs)
+
+    servers = commands.add_parser("servers", help="show or set the remote adb servers whose devices are listed")
+    servers.add_argument("--set", nargs="*", metavar="HOST[:PORT]",
+                         help="replace the list (no value clears it); remote servers must run `adb -a server`")
+    servers.set_defaults(func=cmd_servers)
+
+    commands.add_parser("shutdown", help="stop the daemon and all its sessions").set_defaults(func=cmd_shutdown)
+    commands.add_parser("daemon", help="run the daemon in the foreground")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        if args.command == "daemon":
+            run_daemon(args.socket)
+            return 0
+        if args.command == "shutdown":
+            client = DaemonClient(args.socket)
+        else:
+            client = connect_or_spawn(spawn_command(args.socket), path=args.socket)
+    except OSError:
+        print("AndroMirror daemon is not running", file=sys.stderr)
+        return 1
+    except ServiceError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    try:
+        return args.func(client, args) or 0
+    except ServiceError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
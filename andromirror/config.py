@@ -0,0 +1,134 @@
+"""
+Persistent settings, per-device profiles and the last session set
+
+Everything is kept in one compact JSON file in the user config directory.
+Writes go to a temporary file first so a crash never leaves a torn config.
+"""
+
+import copy
+import json
+import os
+import threading
+from typing import Dict
+
+from .paths import config_dir
+
+CONFIG_FILE = "config.json"
+MAX_WIRELESS_ENDPOINTS = 32
+
+# Session settings as shown in the Settings tab
+DEFAULT_SETTINGS = {
+    "resolution": "HD (720p)",
+    "fps": "60",
+    "video_codec": "h264",
+    "bitrate": "8M",
+    "audio_enabled": True,
+    "audio_quality": "Medium",
+    "stay_awake": True,
+    "screen_off": False,
+    "keyboard_mode": "uhid",
+    "mouse_mode": "uhid",
+    # "mirror" the physical screen, or a new "virtual" display (see andromirror.virtual_display)
+    "display_mode": "mirror",
+    "virtual_size": "window",
+    "virtual_dpi": "auto",
+    "start_app": "",
+}
+
+# Device protection (see andromirror.thermal); temperatures in °C
+DEFAULT_THERMAL = {
+    "enabled": False,
+    "throttle_temp": 40.0,
+    "pause_temp": 45.0,
+    "recover_margin": 3.0,  # cool down this far below a threshold before undoing it
+    # Android thermal status: 2 moderate, 3 severe, 4 critical
+    "throttle_status": 2,
+    "pause_status": 4,
+    "low_battery": 15,  # percent, throttle when below and not charging
+    "throttle_fps": 30,
+    "throttle_bitrate": "4M",
+}
+
+DEFAULT_CONFIG = {
+    "theme": "System",
+    "settings": DEFAULT_SETTINGS,
+    "resume_on_start": False,
+    "max_concurrent_launches": 4,
+    # Metrics export: Prometheus endpoint on 127.0.0.1:<port> plus a JSON-lines file
+    "metrics_enabled": False,
+    "metrics_port": 9464,
+    "metrics_file": "metrics.jsonl",
+    "thermal": DEFAULT_THERMAL,
+    # Last settings used per logical device key
+    "profiles": {},
+    # ip:port endpoints connected with "Connect Wireless"
+    "wireless_endpoints": [],
+    # Remote adb servers ("host:port") whose devices are listed too, see andromirror.servers
+    "adb_servers": [],
+    # Devices that were being mirrored: [{"key": ..., "transports": [...]}]
+    "last_sessions": [],
+}
+
+
+def _valid(value, default) -> bool:
+    """Whether a stored value can stand in for its default"""
+    if isinstance(default, bool) or isinstance(value, bool):
+        return isinstance(default, bool) and isinstance(value, bool)
+    if isinstance(default, float):
+        return isinstance(value, (int, float))
+    return isinstance(value, type(default))
+
+
+def _merge(defaults: Dict, stored: Dict) -> Dict:
+    """Defaults with every stored value of the right type applied, key by key"""
+    merged = copy.deepcopy(defaults)
+    for key, default in defaults.items():
+        value = stored.get(key)
+        if value is not None and _valid(value, default):
+            merged[key] = float(value) if isinstance(default, float) else value
+    return merged
+
+
+class ConfigStore:
+    """Loads and saves the AndroMirror config file"""
+
+    def __init__(self, path=None):
+        self.path = path or config_dir() / CONFIG_FILE
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict:
+        """Read the config, filling in defaults for anything missing or invalid"""
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                stored = json.load(fh)
+        except (OSError, ValueError):
+            return config
+        if not isinstance(stored, dict):
+            return config
+
+        config = _merge(DEFAULT_CONFIG, stored)
+        for key in ("settings", "thermal"):
+            config[key] = _merge(DEFAULT_CONFIG[key], config[key])
+        config["profiles"] = {
+            key: _merge(DEFAULT_SETTINGS, profile)
+            for key, profile in config["profiles"].items() if isinstance(profile, dict)
+        }
+        return config
+
+    def save(self, config: Dict):
+        """Write the config atomically"""
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as fh:
+                    json.dump(config, fh, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
+
+
+def remember_endpoint(config: Dict, endpoint: str):
+    """Record a wireless endpoint, most recent first"""
+    endpoints = [e for e in config["wireless_endpoints"] if e != endpoint]
+    config["wireless_endpoints"] = ([endpoint] + endpoints)[:MAX_WIRELESS_ENDPOINTS]
@@ -0,0 +1,414 @@
+"""
+Background daemon serving MirrorService over a Unix socket
+
+The daemon owns adb and every scrcpy session, so mirroring keeps running when
+the GUI is closed and the CLI (andromirror-ctl) can drive the same sessions.
+The protocol is newline-delimited JSON:
+
+    request   {"id": 1, "method": "start_session", "params": {...}}
+    response  {"id": 1, "result": ...}  or  {"id": 1, "error": "message"}
+    event     {"event": {"type": "session", ...}}   (after "subscribe")
+
+Each request runs on its own thread, so a slow call such as a link probe
+never holds up the others on the same connection.
+"""
+
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+if os.name != "nt":
+    import fcntl  # the daemon only runs where there are Unix sockets
+
+from .config import ConfigStore
+from .paths import config_dir
+from .service import MirrorService, ServiceError
+
+logger = logging.getLogger("andromirror.daemon")
+
+SOCKET_FILE = "daemon.sock"
+LOG_FILE = "daemon.log"
+LOG_BYTES = 1024 * 1024  # per file, LOG_BACKUPS older ones are kept
+LOG_BACKUPS = 3
+CALL_TIMEOUT = 30.0
+SLOW_CALL_TIMEOUT = 300.0  # resume and link probes can take minutes
+SPAWN_TIMEOUT = 10.0
+
+# Methods a client may call; everything else is rejected
+METHODS = {
+    "ping", "subscribe", "shutdown",
+    "list_devices", "refresh_devices", "connect_wireless", "run_shell", "probe_link",
+    "list_sessions", "start_session", "apply_settings", "stop_session", "resume", "configure_metrics", "search_logs",
+    "configure_thermal", "configure_servers", "server_status",
+}
+
+
+def socket_path() -> str:
+    """ANDROMIRROR_SOCKET, or daemon.sock in the config directory"""
+    return os.environ.get("ANDROMIRROR_SOCKET") or str(config_dir() / SOCKET_FILE)
+
+
+def daemon_supported() -> bool:
+    return hasattr(socket, "AF_UNIX") and hasattr(socketserver, "ThreadingUnixStreamServer")
+
+
+def _encode(message: Dict) -> bytes:
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """One client connection"""
+
+    def setup(self):
+        super().setup()
+        self._write_lock = threading.Lock()
+        self._subscribed = False
+
+    def send(self, message: Dict):
+        with self._write_lock:
+            self.wfile.write(_encode(message))
+            self.wfile.flush()
+
+    def send_event(self, event: Dict):
+        self.send({"event": event})
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                continue
+            threading.Thread(target=self.dispatch, args=(request,), daemon=True).start()
+
+    def finish(self):
+        self.server.service.unsubscribe(self.send_event)
+        super().finish()
+
+    def dispatch(self, request: Dict):
+        request_id = request.get("id")
+        method = request.get("method")
+        params = request.get("params") or {}
+        try:
+            if method not in METHODS:
+                raise ServiceError(f"Unknown method: {method}")
+            if method == "ping":
+                result = {"pid": os.getpid()}
+            elif method == "subscribe":
+                if not self._subscribed:
+                    self._subscribed = True
+                    self.server.service.subscribe(self.send_event)
+                result = True
+            elif method == "shutdown":
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                result = True
+            else:
+                result = getattr(self.server.service, method)(**params)
+            response = {"id": request_id, "result": result}
+        except ServiceError as e:
+            response = {"id": request_id, "error": str(e)}
+        except TypeError as e:
+            response = {"id": request_id, "error": f"Bad parameters for {method}: {str(e)}"}
+        except Exception as e:
+            logger.exception("%s failed", method)
+            response = {"id": request_id, "error": f"{method} failed: {str(e)}"}
+        try:
+            self.send(response)
+        except (OSError, ValueError):
+            pass  # the client went away; writing to a closed wfile raises ValueError
+
+
+class _Server(socketserver.ThreadingUnixStreamServer if daemon_supported() else object):
+    daemon_threads = True
+
+    def __init__(self, path: str, service: MirrorService):
+        self.service = service
+        super().__init__(path, _RequestHandler)
+
+
+def setup_logging():
+    """Log to daemon.log in the config directory; the daemon has no terminal"""
+    path = str(config_dir() / LOG_FILE)
+    package_logger = logging.getLogger("andromirror")
+    if any(getattr(h, "baseFilename", None) == path for h in package_logger.handlers):
+        return
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=LOG_BYTES, backupCount=LOG_BACKUPS,
+                                                   encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(process)d %(levelname)s %(name)s %(message)s"))
+    package_logger.addHandler(handler)
+    package_logger.setLevel(logging.INFO)
+
+
+def run_daemon(path: Optional[str] = None):
+    """Serve a MirrorService on the socket until shutdown or SIGTERM
+
+    Raises ServiceError if the platform has no Unix sockets or another daemon
+    is already running, or starting, on the socket.
+    """
+    if not daemon_supported():
+        raise ServiceError("The daemon needs Unix domain sockets, which this platform lacks")
+    path = path or socket_path()
+    setup_logging()
+
+    # Held while the daemon runs: of two daemons starting together, only one
+    # gets past this, so neither unlinks the other's live socket
+    lock = open(f"{path}.lock", "a")
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        raise ServiceError(f"A daemon is already running on {path}")
+    try:
+        _serve(path)
+    finally:
+        lock.close()
+
+
+def _serve(path: str):
+    try:
+        DaemonClient(path).close()
+        raise ServiceError(f"A daemon is already running on {path}")
+    except OSError:
+        pass
+    if os.path.exists(path):
+        os.unlink(path)  # left behind by a daemon that crashed
+
+    service = MirrorService()
+    old_umask = os.umask(0o077)  # the socket controls the user's devices
+    try:
+        server = _Server(path, service)
+    finally:
+        os.umask(old_umask)
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *args: threading.Thread(target=server.shutdown, daemon=True).start())
+    # Protect devices even before a GUI has connected and sent its settings
+    config = ConfigStore().load()
+    service.configure_thermal(config["thermal"])
+    try:
+        service.servers.configure(config["adb_servers"])
+    except ValueError as e:
+        logger.warning("Ignoring remote adb servers: %s", e)
+    service.start_tracking()
+    logger.info("Daemon listening on %s", path)
+    try:
+        server.serve_forever()
+    except Exception:
+        logger.exception("Daemon stopped by an error")
+        raise
+    finally:
+        server.server_close()
+        service.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        logger.info("Daemon stopped")
+
+
+class DaemonClient:
+    """Talks to the daemon; has the same methods as MirrorService
+
+    Raises OSError from the constructor if no daemon is listening, and
+    ServiceError from calls that fail or time out.
+    """
+
+    def __init__(self, path: Optional[str] = None, timeout: float = CALL_TIMEOUT):
+        self.path = path or socket_path()
+        self.timeout = timeout
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.connect(self.path)
+        except OSError:
+            self._sock.close()
+            raise
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, list] = {}  # id -> [Event, response]
+        self._subscribers: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def call(self, method: str, timeout: Optional[float] = None, **params):
+        """Send a request and wait for its result"""
+        request_id = next(self._ids)
+        slot = [threading.Event(), None]
+        with self._lock:
+            if self._closed:
+                raise ServiceError("Not connected to the AndroMirror daemon")
+            self._pending[request_id] = slot
+        try:
+            with self._write_lock:
+                self._sock.sendall(_encode({"id": request_id, "method": method, "params": params}))
+            if not slot[0].wait(timeout or self.timeout):
+                raise ServiceError(f"The daemon did not answer {method} in time")
+        except OSError:
+            raise ServiceError("Lost connection to the AndroMirror daemon")
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+        response = slot[1]
+        if response is None:
+            raise ServiceError("Lost connection to the AndroMirror daemon")
+        if "error" in response:
+            raise ServiceError(response["error"])
+        return response.get("result")
+
+    def _read_loop(self):
+        try:
+            for line in self._sock.makefile("rb"):
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if "event" in message:
+                    self._emit(message["event"])
+                    continue
+                with self._lock:
+                    slot = self._pending.get(message.get("id"))
+                if slot:
+                    slot[1] = message
+                    slot[0].set()
+        except OSError:
+            pass
+
+        # Wake up every caller still waiting; they see a lost connection
+        with self._lock:
+            was_closed, self._closed = self._closed, True
+            pending = list(self._pending.values())
+        for slot in pending:
+            slot[0].set()
+        if not was_closed:
+            self._emit({"type": "disconnected"})
+
+    def _emit(self, event: Dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(event)
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        with self._lock:
+            first = not self._subscribers
+            self._subscribers.append(callback)
+        if first:
+            self.call("subscribe")
+
+    def unsubscribe(self, callback: Callable[[Dict], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def ping(self) -> Dict:
+        return self.call("ping")
+
+    def list_devices(self) -> List[Dict]:
+        return self.call("list_devices")
+
+    def refresh_devices(self) -> List[Dict]:
+        return self.call("refresh_devices", timeout=SLOW_CALL_TIMEOUT)
+
+    def connect_wireless(self, endpoint: str) -> Dict:
+        return self.call("connect_wireless", endpoint=endpoint)
+
+    def run_shell(self, serial: str, command: str, timeout: float = 5.0) -> Dict:
+        return self.call("run_shell", timeout=timeout + CALL_TIMEOUT, serial=serial, command=command)
+
+    def probe_link(self, serial: str) -> Dict:
+        return self.call("probe_link", timeout=SLOW_CALL_TIMEOUT, serial=serial)
+
+    def list_sessions(self) -> List[Dict]:
+        return self.call("list_sessions")
+
+    def start_session(self, key: str, settings: Dict) -> Dict:
+        return self.call("start_session", key=key, settings=settings)
+
+    def apply_settings(self, key: str, settings: Dict) -> Dict:
+        return self.call("apply_settings", timeout=SLOW_CALL_TIMEOUT, key=key, settings=settings)
+
+    def stop_session(self, key: str) -> bool:
+        return self.call("stop_session", key=key)
+
+    def resume(self, endpoints, keys, profiles, default_settings, max_concurrent=4) -> int:
+        return self.call(
+            "resume",
+            timeout=SLOW_CALL_TIMEOUT,
+            endpoints=endpoints,
+            keys=keys,
+            profiles=profiles,
+            default_settings=default_settings,
+            max_concurrent=max_concurrent,
+        )
+
+    def search_logs(self, text="", serial=None, since=None, until=None, level=None, limit=500) -> List[Dict]:
+        return self.call("search_logs", timeout=SLOW_CALL_TIMEOUT, text=text, serial=serial,
+                         since=since, until=until, level=level, limit=limit)
+
+    def configure_thermal(self, limits: Dict) -> Dict:
+        return self.call("configure_thermal", limits=limits)
+
+    def configure_servers(self, endpoints: List[str]) -> List[Dict]:
+        return self.call("configure_servers", timeout=SLOW_CALL_TIMEOUT, endpoints=endpoints)
+
+    def server_status(self) -> List[Dict]:
+        return self.call("server_status")
+
+    def configure_metrics(self, enabled: bool, port=None, jsonl_path=None) -> bool:
+        return self.call("configure_metrics", enabled=enabled, port=port,
+                         jsonl_path=str(jsonl_path) if jsonl_path else None)
+
+    def shutdown(self):
+        """Stop the daemon and every session it runs"""
+        self.call("shutdown")
+
+    def close(self):
+        """Disconnect; the daemon and its sessions keep running"""
+        with self._lock:
+            self._closed = True
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+def connect_or_spawn(spawn_command: List[str], path: Optional[str] = None, timeout: float = SPAWN_TIMEOUT) -> DaemonClient:
+    """Connect to the daemon, starting it with spawn_command if none is running
+
+    Raises ServiceError if the daemon does not come up within timeout.
+    """
+    try:
+        return DaemonClient(path)
+    except OSError:
+        pass
+
+    try:
+        # A new session keeps the daemon alive when the GUI or terminal goes away
+        subprocess.Popen(
+            spawn_command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError as e:
+        raise ServiceError(f"Cannot start the AndroMirror daemon: {str(e)}")
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        try:
+            return DaemonClient(path)
+        except OSError:
+            pass
+    raise ServiceError("The AndroMirror daemon did not start")
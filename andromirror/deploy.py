@@ -0,0 +1,287 @@
+"""
+Concurrent APK install and file push to many devices
+
+Each operation runs through a bounded thread pool. Streamed transfers feed the
+file to `adb shell <command>` over its stdin (unlike exec-out, the shell
+service forwards stdin to the device), so per-device byte progress can be
+reported.
+"""
+
+import os
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .adb import adb_command, shell_quote
+
+CHUNK_SIZE = 256 * 1024
+PROGRESS_INTERVAL = 0.2  # seconds between progress callbacks per device
+DEFAULT_REMOTE_DIR = "/sdcard/Download"
+
+# Operation kinds
+INSTALL = "install"
+PUSH = "push"
+
+
+class DeployError(Exception):
+    """Raised when an install or push fails on a device"""
+
+
+class DeployResult:
+    """Outcome of one operation on one device"""
+
+    def __init__(self, serial: str, ok: bool, bytes_sent: int, duration: float, message: str = ""):
+        self.serial = serial
+        self.ok = ok
+        self.bytes_sent = bytes_sent
+        self.duration = duration
+        self.message = message
+
+    @property
+    def throughput(self) -> float:
+        """Transfer rate in bytes per second"""
+        return self.bytes_sent / self.duration if self.duration > 0 else 0.0
+
+
+class DeployJob:
+    """Install APKs or push files to several devices in parallel"""
+
+    def __init__(
+        self,
+        kind: str,
+        paths: List[str],
+        remote_dir: str = DEFAULT_REMOTE_DIR,
+        streamed: bool = True,
+        max_workers: int = 4,
+        on_progress: Optional[Callable[[str, int, int], None]] = None,
+        on_result: Optional[Callable[[DeployResult], None]] = None,
+        timeout: float = 600,
+    ):
+        if kind not in (INSTALL, PUSH):
+            raise ValueError(f"Unknown deploy kind: {kind}")
+        if not paths:
+            raise ValueError("No files to deploy")
+
+        self.kind = kind
+        self.paths = list(paths)
+        self.remote_dir = remote_dir.rstrip("/") or "/"
+        self.streamed = streamed
+        self.max_workers = max(1, max_workers)
+        self.on_progress = on_progress
+        self.on_result = on_result
+        self.timeout = timeout
+        self.total_bytes = sum(os.path.getsize(p) for p in self.paths)
+        self.results: Dict[str, DeployResult] = {}
+        self._lock = threading.Lock()
+
+    def run(self, serials: List[str]) -> List[DeployResult]:
+        """Deploy to all serials, blocking until every device has finished"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(self._deploy_one, serials))
+        return results
+
+    def failed_serials(self) -> List[str]:
+        """Serials whose last attempt failed, for retrying"""
+        with self._lock:
+            return [serial for serial, result in self.results.items() if not result.ok]
+
+    def _deploy_one(self, serial: str) -> DeployResult:
+        progress = _ProgressReporter(serial, self.total_bytes, self.on_progress)
+        start = time.monotonic()
+        try:
+            if self.kind == INSTALL:
+                self._install(serial, progress)
+            else:
+                self._push(serial, progress)
+            result = DeployResult(serial, True, progress.sent, time.monotonic() - start, "Success")
+        except subprocess.TimeoutExpired:
+            result = DeployResult(serial, False, progress.sent, time.monotonic() - start, "Timed out")
+        except (DeployError, OSError) as e:
+            result = DeployResult(serial, False, progress.sent, time.monotonic() - start, str(e))
+
+        progress.finish()
+        with self._lock:
+            self.results[serial] = result
+        if self.on_result:
+            self.on_result(result)
+        return result
+
+    def _install(self, serial: str, progress: "_ProgressReporter"):
+        if not self.streamed:
+            # Let adb handle the transfer; progress is only known at the end
+            if len(self.paths) == 1:
+                args = ["install", "-r", self.paths[0]]
+            else:
+                args = ["install-multiple", "-r"] + self.paths
+            _expect_success(_check_output(adb_command(*args, serial=serial), self.timeout))
+            progress.add(self.total_bytes)
+            return
+
+        if len(self.paths) == 1:
+            # Same wire protocol as `adb install --streamed`
+            size = os.path.getsize(self.paths[0])
+            cmd = adb_command("shell", "cmd", "package", "install", "-r", "-S", str(size), serial=serial)
+            _expect_success(_stream_file(cmd, self.paths[0], progress, self.timeout))
+            return
+
+        # Split APKs: the same session protocol `adb install-multiple` uses
+        cmd = adb_command("shell", "cmd", "package", "install-create", "-r", "-S", str(self.total_bytes), serial=serial)
+        output = _check_output(cmd, self.timeout)
+        match = re.search(r"\[(\d+)\]", output)
+        if not match:
+            raise DeployError(output.strip() or "Failed to create install session")
+        session_id = match.group(1)
+
+        try:
+            for index, path in enumerate(self.paths):
+                size = os.path.getsize(path)
+                name = f"{index}_{os.path.basename(path)}"
+                cmd = adb_command(
+                    "shell", "cmd", "package", "install-write", "-S", str(size), session_id, name, "-",
+                    serial=serial,
+                )
+                _expect_success(_stream_file(cmd, path, progress, self.timeout))
+            cmd = adb_command("shell", "cmd", "package", "install-commit", session_id, serial=serial)
+            _expect_success(_check_output(cmd, self.timeout))
+        except (DeployError, OSError, subprocess.TimeoutExpired):
+            subprocess.run(
+                adb_command("shell", "cmd", "package", "install-abandon", session_id, serial=serial),
+                capture_output=True,
+                timeout=10,
+            )
+            raise
+
+    def _push(self, serial: str, progress: "_ProgressReporter"):
+        for path in self.paths:
+            remote = f"{self.remote_dir}/{os.path.basename(path)}"
+            if self.streamed:
+                cmd = adb_command("shell", f"cat > {shell_quote(remote)}", serial=serial)
+                output = _stream_file(cmd, path, progress, self.timeout)
+                if output.strip():
+                    raise DeployError(output.strip())
+            else:
+                _check_output(adb_command("push", path, remote, serial=serial), self.timeout)
+                progress.add(os.path.getsize(path))
+
+
+class _ProgressReporter:
+    """Rate-limits byte progress callbacks for one device"""
+
+    def __init__(self, serial: str, total: int, callback: Optional[Callable[[str, int, int], None]]):
+        self.serial = serial
+        self.total = total
+        self.callback = callback
+        self.sent = 0
+        self._last_report = 0.0
+
+    def add(self, count: int):
+        self.sent += count
+        now = time.monotonic()
+        if self.callback and now - self._last_report >= PROGRESS_INTERVAL:
+            self._last_report = now
+            self.callback(self.serial, self.sent, self.total)
+
+    def finish(self):
+        if self.callback:
+            self.callback(self.serial, self.sent, self.total)
+
+
+def _check_output(cmd: List[str], timeout: float) -> str:
+    """Run an adb command and return its output, raising on failure"""
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except FileNotFoundError:
+        raise DeployError("ADB not found. Please install Android SDK Platform Tools")
+    output = (result.stdout or "") + (result.stderr or "")
+    if result.returncode != 0:
+        raise DeployError(output.strip() or f"adb exited with code {result.returncode}")
+    return output
+
+
+def _expect_success(output: str):
+    """Package manager commands print 'Success' or a failure reason"""
+    if "Success" not in output:
+        raise DeployError(output.strip() or "Install failed")
+
+
+def _stream_file(cmd: List[str], path: str, progress: _ProgressReporter, timeout: float) -> str:
+    """Feed a local file to an adb command's stdin, reporting bytes sent
+
+    The timeout covers the transfer itself: a device that stops reading
+    gets the adb process killed, which unblocks the writer.
+    """
+    try:
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    except FileNotFoundError:
+        raise DeployError("ADB not found. Please install Android SDK Platform Tools")
+
+    output = []
+    errors = []
+
+    def write():
+        try:
+            with open(path, "rb") as fh:
+                while True:
+                    chunk = fh.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    process.stdin.write(chunk)
+                    progress.add(len(chunk))
+        except (OSError, ValueError) as e:
+            errors.append(e)
+        finally:
+            try:
+                # End of file for the device command
+                process.stdin.close()
+            except OSError:
+                pass
+
+    # Output is drained concurrently so a chatty command can't block the transfer
+    reader = threading.Thread(target=lambda: output.append(process.stdout.read()), daemon=True)
+    writer = threading.Thread(target=write, daemon=True)
+    reader.start()
+    writer.start()
+
+    deadline = time.monotonic() + timeout
+    try:
+        writer.join(max(0.0, deadline - time.monotonic()))
+        if writer.is_alive():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        process.wait(timeout=max(1.0, deadline - time.monotonic()))
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        reader.join(10)
+        process.stdout.close()
+
+    text = b"".join(output).decode(errors="replace")
+    if process.returncode != 0:
+        raise DeployError(text.strip() or f"adb exited with code {process.returncode}")
+    if errors and not isinstance(errors[0], BrokenPipeError):
+        raise DeployError(f"Cannot read {path}: {str(errors[0])}")
+    if errors:
+        raise DeployError(text.strip() or "Device closed the connection")
+    return text
+
+
+def format_summary(results: List[DeployResult]) -> str:
+    """One line per device with duration and throughput, failures last"""
+    lines = []
+    for result in sorted(results, key=lambda r: (not r.ok, r.serial)):
+        status = "OK" if result.ok else "FAILED"
+        line = (
+            f"{status:<7}{result.serial:<24}{result.duration:7.1f}s"
+            f"{result.throughput / (1024 * 1024):8.1f} MB/s"
+        )
+        if not result.ok:
+            line += f"  {result.message}"
+        lines.append(line)
+
+    succeeded = sum(1 for r in results if r.ok)
+    lines.append(f"{succeeded}/{len(results)} device(s) succeeded")
+    return "\n".join(lines)
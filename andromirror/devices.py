@@ -0,0 +1,168 @@
+"""
+Device discovery and de-duplication across transports
+
+A phone that is plugged in and also connected with `adb connect` shows up
+twice in `adb devices`. Transports are grouped into one LogicalDevice by the
+hardware serial and build fingerprint reported by the device itself.
+
+Cheap devices often share a placeholder hardware serial, so those are never
+grouped, and neither are two USB transports on the same adb server: one
+phone can't be plugged in twice.
+"""
+
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .adb import DEFAULT_SERVER_PORT, AdbError, adb_command, server_address, split_serial
+from .shell_pool import ShellPool
+
+IDENTITY_COMMAND = "getprop ro.serialno; getprop ro.build.fingerprint; getprop ro.product.model"
+# Hardware serials shipped unchanged on many devices of a kind
+PLACEHOLDER_SERIALS = {"0123456789abcdef", "1234567890abcdef", "0000000000000000", "unknown", "0"}
+
+
+def is_tcp(serial: str) -> bool:
+    """TCP devices are listed as ip:port (or as an mDNS service name)"""
+    _, serial = split_serial(serial)
+    return ":" in serial or "._tcp" in serial
+
+
+def server_host(serial: str) -> Optional[str]:
+    """Remote adb server a device is attached to (port only if not the default), None if local"""
+    server, _ = split_serial(serial)
+    if not server:
+        return None
+    host, port = server_address(server)
+    return host if port == DEFAULT_SERVER_PORT else server
+
+
+def list_online_serials(timeout: float = 10) -> List[str]:
+    """Serials of all devices in the 'device' state
+
+    Raises AdbError, FileNotFoundError or subprocess.TimeoutExpired.
+    """
+    result = subprocess.run(adb_command("devices"), capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise AdbError("ADB not found or not in PATH")
+
+    serials = []
+    for line in result.stdout.strip().split('\n')[1:]:  # Skip header
+        if line.strip() and '\t' in line:
+            serial, status = line.strip().split('\t')
+            if status == 'device':
+                serials.append(serial)
+    return serials
+
+
+def connect_endpoint(endpoint: str, timeout: float = 10) -> Tuple[bool, str]:
+    """Run `adb connect` and return (connected, adb's message)"""
+    result = subprocess.run(adb_command("connect", endpoint), capture_output=True, text=True, timeout=timeout)
+    output = result.stdout.lower()
+    if result.returncode == 0 and ("connected" in output or "already connected" in output):
+        return True, result.stdout.strip()
+    return False, result.stdout or result.stderr or "Connection failed"
+
+
+def connect_endpoints(endpoints: List[str], max_workers: int = 8) -> Dict[str, bool]:
+    """Connect several wireless endpoints concurrently"""
+    def attempt(endpoint):
+        try:
+            return connect_endpoint(endpoint)[0]
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+
+    if not endpoints:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return dict(zip(endpoints, pool.map(attempt, endpoints)))
+
+
+class LogicalDevice:
+    """One physical device with every transport it is reachable over"""
+
+    def __init__(self, key: str, model: str, transports: List[str]):
+        self.key = key
+        self.model = model
+        # USB first: it is faster and doesn't depend on the network
+        self.transports = sorted(transports, key=is_tcp)
+
+    @property
+    def preferred(self) -> str:
+        return self.transports[0]
+
+    @property
+    def tcp_serial(self) -> Optional[str]:
+        return next((s for s in self.transports if is_tcp(s)), None)
+
+    @property
+    def label(self) -> str:
+        kinds = " + ".join(
+            ("Wi-Fi" if is_tcp(s) else "USB") + (f" via {server_host(s)}" if server_host(s) else "")
+            for s in self.transports
+        )
+        serial = split_serial(self.preferred)[1]
+        name = f"{self.model} ({serial})" if self.model else serial
+        return f"{name} — {kinds}"
+
+    def to_dict(self) -> Dict:
+        hosts = sorted({server_host(s) or "local" for s in self.transports})
+        return {"key": self.key, "model": self.model, "transports": self.transports, "label": self.label,
+                "hosts": hosts}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LogicalDevice":
+        return cls(data["key"], data["model"], data["transports"])
+
+    def __repr__(self):
+        return f"LogicalDevice({self.key!r}, {self.transports!r})"
+
+
+class DeviceTracker:
+    """Groups online transports into logical devices
+
+    Identities are queried once per transport over the shell pool and kept
+    until the transport goes offline.
+    """
+
+    def __init__(self, shell_pool: ShellPool):
+        self.shell_pool = shell_pool
+        self._identities: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def group(self, serials: List[str]) -> List[LogicalDevice]:
+        with self._lock:
+            # An ip:port can be a different phone next time it shows up
+            for serial in list(self._identities):
+                if serial not in serials:
+                    del self._identities[serial]
+            unknown = [s for s in serials if s not in self._identities]
+
+        replies = self.shell_pool.run_all(unknown, IDENTITY_COMMAND) if unknown else {}
+
+        with self._lock:
+            for serial, (exit_code, output) in replies.items():
+                lines = (output.splitlines() + ["", "", ""])[:3]
+                hardware_serial, fingerprint, model = (line.strip() for line in lines)
+                if exit_code == 0 and hardware_serial:
+                    if hardware_serial.lower() in PLACEHOLDER_SERIALS:
+                        # Not an identity: key by the transport, grouped with nothing
+                        self._identities[serial] = (serial, model)
+                    else:
+                        self._identities[serial] = (f"{hardware_serial}/{fingerprint}", model)
+
+            groups: Dict[str, LogicalDevice] = {}
+            for serial in serials:
+                # Devices that didn't answer are shown on their own and asked again next time
+                key, model = self._identities.get(serial, (serial, ""))
+                if key in groups and not is_tcp(serial) and any(
+                        not is_tcp(s) and split_serial(s)[0] == split_serial(serial)[0]
+                        for s in groups[key].transports):
+                    # A second phone with the same identity, not a second transport
+                    key = f"{key}/{serial}"
+                if key in groups:
+                    groups[key].transports = sorted(groups[key].transports + [serial], key=is_tcp)
+                else:
+                    groups[key] = LogicalDevice(key, model, [serial])
+            return list(groups.values())
@@ -0,0 +1,174 @@
+"""
+Main-loop stall detection and profiling for the Tk UI
+
+StallDetector schedules a recurring `after` heartbeat and measures how late
+each beat fires. A watchdog thread notices when the heartbeat stops, captures
+the main thread's stack while it is still stuck, and logs it together with
+the slowest recent Tk callbacks. Callback timing works by replacing
+tkinter.CallWrapper, through which every Tcl-to-Python callback is invoked.
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import tkinter
+import traceback
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger("andromirror.diagnostics")
+
+HEARTBEAT_MS = 100
+STALL_THRESHOLD_MS = 250
+SLOW_CALLBACK_MS = 50
+RECENT_CALLBACKS = 20
+
+
+class _SlowCallbacks:
+    """Recently seen Tk callbacks that took longer than SLOW_CALLBACK_MS"""
+
+    def __init__(self):
+        self.entries = deque(maxlen=RECENT_CALLBACKS)
+        self.threshold = SLOW_CALLBACK_MS / 1000
+
+    def record(self, name: str, duration: float):
+        self.entries.append((time.time(), name, duration))
+        logger.info("Slow callback %s took %.0f ms", name, duration * 1000)
+
+    def describe(self) -> str:
+        return "\n".join(
+            f"  {time.strftime('%H:%M:%S', time.localtime(ts))} {name} {duration * 1000:.0f} ms"
+            for ts, name, duration in self.entries
+        ) or "  (none)"
+
+
+SLOW_CALLBACKS = _SlowCallbacks()
+
+
+class TimedCallWrapper(tkinter.CallWrapper):
+    """CallWrapper that reports callbacks running longer than the threshold"""
+
+    def __call__(self, *args):
+        start = time.perf_counter()
+        try:
+            return super().__call__(*args)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= SLOW_CALLBACKS.threshold:
+                SLOW_CALLBACKS.record(_callback_name(self.func), duration)
+
+
+def _callback_name(func) -> str:
+    name = getattr(func, "__qualname__", None) or repr(func)
+    module = getattr(func, "__module__", None)
+    return f"{module}.{name}" if module else name
+
+
+def install_callback_timing():
+    """Time every Tk callback registered from now on"""
+    tkinter.CallWrapper = TimedCallWrapper
+
+
+def setup_logging(path: Path):
+    """Send diagnostics to a log file and stderr"""
+    logger.setLevel(logging.INFO)
+    formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
+    for handler in (logging.FileHandler(path, encoding="utf-8"), logging.StreamHandler()):
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+
+
+class StallDetector:
+    """Detects main-loop stalls from the latency of an `after` heartbeat"""
+
+    def __init__(self, root, interval_ms: int = HEARTBEAT_MS, threshold_ms: int = STALL_THRESHOLD_MS):
+        self.root = root
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.main_thread_id = threading.main_thread().ident
+        self.max_latency = 0.0
+        self.stalls = 0
+        self._expected = 0.0
+        self._last_beat = 0.0
+        self._captured_for = None  # heartbeat time the current stack capture belongs to
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start the heartbeat and the watchdog thread (call from the main thread)"""
+        self._last_beat = time.perf_counter()
+        self._expected = self._last_beat + self.interval
+        self.root.after(int(self.interval * 1000), self._beat)
+        threading.Thread(target=self._watchdog, name="stall-watchdog", daemon=True).start()
+        logger.info("Stall detector running (heartbeat %d ms, threshold %d ms)",
+                    self.interval * 1000, self.threshold * 1000)
+
+    def stop(self):
+        self._stop.set()
+
+    def _beat(self):
+        if self._stop.is_set():
+            return
+        now = time.perf_counter()
+        latency = now - self._expected
+        self.max_latency = max(self.max_latency, latency)
+        if latency > self.threshold:
+            self.stalls += 1
+            logger.warning(
+                "Main loop stalled for %.0f ms; slow callbacks before it:\n%s",
+                latency * 1000, SLOW_CALLBACKS.describe()
+            )
+        self._last_beat = now
+        self._expected = now + self.interval
+        self.root.after(int(self.interval * 1000), self._beat)
+
+    def _watchdog(self):
+        while not self._stop.wait(self.threshold / 2):
+            last_beat = self._last_beat
+            overdue = time.perf_counter() - last_beat - self.interval
+            if overdue > self.threshold and self._captured_for != last_beat:
+                # Capture once per stall, while the main thread is still stuck
+                self._captured_for = last_beat
+                frame = sys._current_frames().get(self.main_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame else "  (unavailable)\n"
+                logger.warning("Main loop blocked for %.0f ms, main thread stack:\n%s", overdue * 1000, stack)
+
+
+class UIProfiler:
+    """On-demand cProfile capture of the UI thread"""
+
+    def __init__(self, root):
+        self.root = root
+        self._profile: Optional[cProfile.Profile] = None
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None
+
+    def capture(self, seconds: float, path: Path, on_done=None):
+        """Profile the main thread for a while and save the stats to path
+
+        path gets the binary stats (for pstats/snakeviz); a readable summary
+        is written next to it with a .txt suffix. Call from the main thread.
+        """
+        if self._profile:
+            return
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        self.root.after(int(seconds * 1000), self._finish, path, on_done)
+
+    def _finish(self, path: Path, on_done):
+        profile, self._profile = self._profile, None
+        profile.disable()
+        profile.dump_stats(str(path))
+
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(40)
+        Path(path).with_suffix(".txt").write_text(summary.getvalue(), encoding="utf-8")
+        logger.info("UI profile saved to %s", path)
+        if on_done:
+            on_done(path)
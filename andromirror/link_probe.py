@@ -0,0 +1,196 @@
+"""
+Wireless link throughput probe
+
+Pulls a fixed-size payload from the device over the adb transport, measures
+sustained throughput and round-trip time, and recommends a video bitrate and
+resolution that leave headroom on the link. Results are cached per device and
+per host network so reconnecting on the same network does not need a new test.
+"""
+
+import json
+import socket
+import statistics
+import subprocess
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .adb import adb_command, server_address, split_serial
+from .paths import config_dir
+from .shell_pool import ShellError, ShellPool
+
+PAYLOAD_BYTES = 8 * 1024 * 1024
+WARMUP_BYTES = 1024 * 1024  # excluded from the sustained throughput figure
+READ_SIZE = 64 * 1024
+RTT_SAMPLES = 5
+HEADROOM = 0.6  # fraction of measured throughput the video stream may use
+CACHE_FILE = "link_cache.json"
+
+# Bitrate menu values (Mbit/s) with the resolution that suits each, best first
+BITRATE_STEPS = [
+    (30, "30M", "FHD (1080p)"),
+    (16, "16M", "FHD (1080p)"),
+    (8, "8M", "HD (720p)"),
+    (4, "4M", "SD (540p)"),
+]
+
+
+class LinkProbeError(Exception):
+    """Raised when the link test cannot be completed"""
+
+
+class LinkProbeResult:
+    """Measured link quality for one device on one network"""
+
+    def __init__(self, throughput: float, rtt_ms: float, measured_at: Optional[float] = None):
+        self.throughput = throughput  # bytes per second
+        self.rtt_ms = rtt_ms
+        self.measured_at = measured_at or time.time()
+
+    @property
+    def mbit_per_second(self) -> float:
+        return self.throughput * 8 / 1_000_000
+
+    def recommend(self) -> Tuple[str, str]:
+        """Return the (bitrate, resolution) menu values for this link"""
+        usable = self.mbit_per_second * HEADROOM
+        for mbit, bitrate, resolution in BITRATE_STEPS:
+            if usable >= mbit:
+                return bitrate, resolution
+        _, bitrate, resolution = BITRATE_STEPS[-1]
+        return bitrate, resolution
+
+    def describe(self) -> str:
+        bitrate, resolution = self.recommend()
+        return f"{self.mbit_per_second:.0f} Mbit/s, RTT {self.rtt_ms:.0f} ms → {bitrate} @ {resolution}"
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"throughput": self.throughput, "rtt_ms": self.rtt_ms, "measured_at": self.measured_at}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, float]) -> "LinkProbeResult":
+        return cls(data["throughput"], data["rtt_ms"], data["measured_at"])
+
+
+def probe_link(serial: str, shell_pool: ShellPool, payload_bytes: int = PAYLOAD_BYTES, timeout: float = 30) -> LinkProbeResult:
+    """Measure RTT and sustained throughput to a device"""
+    try:
+        rtt_ms = _measure_rtt(serial, shell_pool)
+    except ShellError as e:
+        raise LinkProbeError(str(e))
+    throughput = _measure_throughput(serial, payload_bytes, timeout)
+    return LinkProbeResult(throughput, rtt_ms)
+
+
+def _measure_rtt(serial: str, shell_pool: ShellPool) -> float:
+    # The first command may have to open the channel; don't count it
+    shell_pool.run(serial, "true")
+    samples = []
+    for _ in range(RTT_SAMPLES):
+        start = time.perf_counter()
+        shell_pool.run(serial, "true")
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _measure_throughput(serial: str, payload_bytes: int, timeout: float) -> float:
+    # Random data so nothing along the way can compress it
+    cmd = adb_command("exec-out", f"head -c {payload_bytes} /dev/urandom", serial=serial)
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        raise LinkProbeError("ADB not found. Please install Android SDK Platform Tools")
+
+    # A stalled link blocks the read itself; the timer ends it by killing adb
+    expired = threading.Event()
+
+    def expire():
+        expired.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, expire)
+    timer.daemon = True
+    timer.start()
+    received = 0
+    warm_start = warm_bytes = None
+    try:
+        while True:
+            chunk = process.stdout.read1(READ_SIZE)
+            if not chunk:
+                break
+            received += len(chunk)
+            if warm_start is None and received >= WARMUP_BYTES:
+                warm_start = time.perf_counter()
+                warm_bytes = received
+    finally:
+        timer.cancel()
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+    end = time.perf_counter()
+    if expired.is_set():
+        raise LinkProbeError("Link test timed out")
+    if warm_start is None or received <= warm_bytes or end <= warm_start:
+        raise LinkProbeError(f"Link test received only {received} bytes")
+    return (received - warm_bytes) / (end - warm_start)
+
+
+def network_key(serial: str) -> str:
+    """Identify the host network used to reach a TCP device
+
+    The local address the OS would route from tells networks apart without
+    sending anything. Devices on a remote adb server are reached through
+    that server's host. Host names (mDNS services included) are resolved,
+    so call this off the UI thread.
+    """
+    server, serial = split_serial(serial)
+    try:
+        host = server_address(server or serial)[0]
+    except ValueError:
+        host = serial  # no port: an mDNS service name
+    try:
+        family, _, _, _, address = socket.getaddrinfo(host, 9, type=socket.SOCK_DGRAM)[0]
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            return sock.getsockname()[0]
+    except (OSError, IndexError):
+        return "unknown"
+
+
+class LinkProbeCache:
+    """Link test results keyed by device and host network, stored as JSON"""
+
+    def __init__(self, path=None):
+        self.path = path or config_dir() / CACHE_FILE
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, float]]] = None
+
+    def get(self, serial: str) -> Optional[LinkProbeResult]:
+        """The cached result for a device on the current network; may resolve names"""
+        with self._lock:
+            data = self._load().get(self._key(serial))
+        return LinkProbeResult.from_dict(data) if data else None
+
+    def put(self, serial: str, result: LinkProbeResult):
+        with self._lock:
+            entries = self._load()
+            entries[self._key(serial)] = result.to_dict()
+            try:
+                with open(self.path, "w", encoding="utf-8") as fh:
+                    json.dump(entries, fh, indent=1)
+            except OSError:
+                pass
+
+    def _key(self, serial: str) -> str:
+        return f"{serial}@{network_key(serial)}"
+
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as fh:
+                    self._entries = json.load(fh)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
@@ -0,0 +1,479 @@
+"""
+Compressed archive of scrcpy output with an index for fast search
+
+Each session's output is appended line by line to a journal file, so
+nothing is lost if scrcpy or the daemon dies. When a journal reaches
+SEGMENT_BYTES or its session ends it is sealed into a segment: one gzip
+member per adb serial, concatenated into a single .gz file. The sidecar
+index records for every segment its time range, severity counts, the
+compressed offset of each serial's member and a bloom filter of the words
+it contains. A search reads only the index to pick candidate segments and
+decompresses just the members of the serials it asks for.
+
+Retention is bounded by the total size of the sealed segments and by their
+number; the oldest are deleted first.
+
+Several processes may share the archive (the daemon and a --no-daemon GUI,
+say). Each open journal holds a lock on its own lock file, so a journal is
+only sealed by someone else once its writer is gone. Sealing happens on a
+background thread and updates index.json under an exclusive file lock,
+merging with what other processes wrote.
+"""
+
+import base64
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+from .paths import config_dir
+
+LOG_DIR = "logs"
+JOURNAL_DIR = "open"  # journals of running sessions, sealed into segments/ when they end
+INDEX_FILE = "index.json"
+INDEX_LOCK_FILE = "index.lock"
+SEGMENT_BYTES = 1024 * 1024  # uncompressed journal size that triggers sealing
+MAX_ARCHIVE_BYTES = 200 * 1024 * 1024
+MAX_SEGMENTS = 20000  # keeps the in-memory index bounded when sessions are short
+BLOOM_BITS = 4096
+BLOOM_HASHES = 3
+CLOSED_SESSIONS = 1024  # ended sessions remembered to drop their late output
+
+_journal_ids = itertools.count(1)  # shared by every archive in the process
+
+LEVELS = ("verbose", "debug", "info", "warn", "error")
+LEVEL_PATTERN = re.compile(r"\b(VERBOSE|DEBUG|INFO|WARN|ERROR)\b")
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def line_level(text: str) -> str:
+    """Severity of a scrcpy output line ("INFO: ...", "[server] ERROR: ...")"""
+    match = LEVEL_PATTERN.search(text[:40])
+    return match.group(1).lower() if match else "info"
+
+
+def _try_lock(fh) -> bool:
+    """Take an exclusive lock on an open file without waiting"""
+    try:
+        if os.name == "nt":
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _lock(fh):
+    while not _try_lock(fh):
+        time.sleep(0.02)
+
+
+def _unlock(fh):
+    try:
+        if os.name == "nt":
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+
+def _lock_path(journal_path: str) -> str:
+    return f"{journal_path}.lock"
+
+
+def _writer_alive(journal_path: str) -> bool:
+    """Whether the process writing a journal still holds its lock file"""
+    try:
+        with open(_lock_path(journal_path), "a+b") as fh:
+            if not _try_lock(fh):
+                return True
+            _unlock(fh)
+    except OSError:
+        pass
+    return False
+
+
+def words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+def _bloom_positions(word: str) -> List[int]:
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=4 * BLOOM_HASHES).digest()
+    return [int.from_bytes(digest[i * 4:(i + 1) * 4], "little") % BLOOM_BITS for i in range(BLOOM_HASHES)]
+
+
+class _Bloom:
+    """Bloom filter of the words in a segment"""
+
+    def __init__(self, data: Optional[bytes] = None):
+        self.bits = bytearray(data or bytes(BLOOM_BITS // 8))
+
+    def add(self, word: str):
+        for position in _bloom_positions(word):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, word: str) -> bool:
+        return all(self.bits[p // 8] & (1 << (p % 8)) for p in _bloom_positions(word))
+
+    def encode(self) -> str:
+        return base64.b64encode(bytes(self.bits)).decode("ascii")
+
+    @classmethod
+    def decode(cls, text: str) -> "_Bloom":
+        return cls(base64.b64decode(text))
+
+
+def _matches(record: Dict, serial, since, until, level, query_words) -> bool:
+    if serial and record["s"] != serial:
+        return False
+    if since and record["t"] < since or until and record["t"] > until:
+        return False
+    if level and LEVELS.index(record["l"]) < LEVELS.index(level):
+        return False
+    return not query_words or set(query_words) <= set(words(record["m"]))
+
+
+class _Journal:
+    """Uncompressed, line-buffered output of one running session"""
+
+    def __init__(self, path: str, key: str, name: str):
+        self.path = path
+        self.key = key
+        self.name = name
+        self.size = 0
+        # Held for as long as the journal is written, see _writer_alive
+        self.lock_fh = open(_lock_path(path), "a+b")
+        _lock(self.lock_fh)
+        self.fh = open(path, "a", encoding="utf-8", buffering=1)
+        # The first line names the session so a crashed journal can be sealed later
+        self._write({"key": key, "name": name})
+
+    def _write(self, record: Dict):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        self.fh.write(line)
+        self.size += len(line)
+
+    def append(self, serial: str, level: str, text: str):
+        self._write({"t": time.time(), "s": serial, "l": level, "m": text})
+
+    def close(self):
+        self.fh.close()
+        _unlock(self.lock_fh)
+        self.lock_fh.close()
+
+
+class LogArchive:
+    """Persists session output and searches it"""
+
+    def __init__(self, root=None, max_bytes: int = MAX_ARCHIVE_BYTES):
+        self.root = str(root or config_dir() / LOG_DIR)
+        self.max_bytes = max_bytes
+        self.segment_dir = os.path.join(self.root, "segments")
+        self.journal_dir = os.path.join(self.root, JOURNAL_DIR)
+        self.index_path = os.path.join(self.root, INDEX_FILE)
+        self.index_lock_path = os.path.join(self.root, INDEX_LOCK_FILE)
+        os.makedirs(self.segment_dir, exist_ok=True)
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self._journals: Dict[object, _Journal] = {}
+        self._closed: Dict[object, None] = {}  # insertion-ordered set, oldest first
+        self._lock = threading.Lock()
+        # Sealing compresses and rewrites the index; keep it off the output path
+        self._sealer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-seal")
+        self.segments = self._load_index()
+
+        # Journals left open by a crashed process are sealed like any other
+        for name in sorted(os.listdir(self.journal_dir)):
+            path = os.path.join(self.journal_dir, name)
+            if name.endswith(".jsonl") and not _writer_alive(path):
+                self._seal(path)
+        self._sweep_orphans()
+
+    @contextmanager
+    def _index_locked(self):
+        """Exclusive access to index.json and the segment files across processes"""
+        with open(self.index_lock_path, "a+b") as fh:
+            _lock(fh)
+            try:
+                yield
+            finally:
+                _unlock(fh)
+
+    def _load_index(self) -> List[Dict]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as fh:
+                segments = json.load(fh)
+        except (OSError, ValueError):
+            return []
+        return [s for s in segments if os.path.exists(os.path.join(self.segment_dir, s["file"]))]
+
+    def _save_index(self, segments: List[Dict]):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(segments, fh, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def _reload_index(self) -> List[Dict]:
+        """Pick up segments sealed by other processes"""
+        segments = self._load_index()
+        with self._lock:
+            self.segments = segments
+        return segments
+
+    def _sweep_orphans(self):
+        """Delete segments no index entry points to (left by older versions)"""
+        with self._index_locked():
+            indexed = {s["file"] for s in self._load_index()}
+            for name in os.listdir(self.segment_dir):
+                if name not in indexed:
+                    try:
+                        os.unlink(os.path.join(self.segment_dir, name))
+                    except OSError:
+                        pass
+            for name in os.listdir(self.journal_dir):
+                # Lock files whose journal is gone and whose writer has exited
+                journal_path = os.path.join(self.journal_dir, name[:-len(".lock")])
+                if name.endswith(".lock") and not os.path.exists(journal_path) and not _writer_alive(journal_path):
+                    try:
+                        os.unlink(os.path.join(self.journal_dir, name))
+                    except OSError:
+                        pass
+
+    # Writing
+
+    def append(self, session, key: str, name: str, serial: str, text: str, level: Optional[str] = None):
+        """Record a line of output (or an event) for a running session
+
+        Output that arrives after close_session (scrcpy's last words after a
+        stop) is dropped rather than opening a journal nobody would close.
+        """
+        with self._lock:
+            journal = self._journals.get(session)
+            if journal is None:
+                if session in self._closed:
+                    return
+                file_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_journal_ids)}.jsonl"
+                try:
+                    journal = _Journal(os.path.join(self.journal_dir, file_name), key, name)
+                except OSError:
+                    return
+                self._journals[session] = journal
+            try:
+                journal.append(serial, level or line_level(text), text)
+            except (OSError, ValueError):
+                return
+            if journal.size >= SEGMENT_BYTES:
+                # Keep writing to a fresh journal for the same session
+                del self._journals[session]
+                self._close_journal(journal)
+
+    def close_session(self, session):
+        """Seal the session's journal once it has ended"""
+        with self._lock:
+            self._closed[session] = None
+            if len(self._closed) > CLOSED_SESSIONS:
+                del self._closed[next(iter(self._closed))]
+            journal = self._journals.pop(session, None)
+            if journal:
+                self._close_journal(journal)
+
+    def close(self):
+        """Seal every open journal and wait for sealing to finish"""
+        with self._lock:
+            for journal in self._journals.values():
+                self._close_journal(journal)
+            self._journals.clear()
+        self._sealer.shutdown(wait=True)
+
+    def _close_journal(self, journal: _Journal):
+        journal.close()
+        try:
+            self._sealer.submit(self._seal, journal.path)
+        except RuntimeError:
+            self._seal(journal.path)  # closing: seal right here
+
+    def _seal(self, journal_path: str):
+        """Compress a journal into a segment and add it to the shared index"""
+        with self._index_locked():
+            # Another process may have sealed it while we waited for the lock
+            if os.path.exists(journal_path):
+                self._seal_locked(journal_path)
+            try:
+                os.unlink(_lock_path(journal_path))
+            except OSError:
+                pass
+
+    def _seal_locked(self, journal_path: str):
+        header, by_serial = {}, {}
+        try:
+            with open(journal_path, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    if "t" in record:
+                        by_serial.setdefault(record["s"], []).append(record)
+                    elif not header:
+                        header = record
+        except OSError:
+            return
+
+        if by_serial:
+            file_name = os.path.basename(journal_path).replace(".jsonl", ".gz")
+            bloom = _Bloom()
+            levels: Dict[str, int] = {}
+            serials = {}
+            times = []
+            try:
+                with open(os.path.join(self.segment_dir, file_name), "wb") as out:
+                    for serial, records in by_serial.items():
+                        payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+                        member = gzip.compress(payload.encode("utf-8"))
+                        serials[serial] = [out.tell(), len(member), len(records)]
+                        out.write(member)
+                        for record in records:
+                            levels[record["l"]] = levels.get(record["l"], 0) + 1
+                            times.append(record["t"])
+                            for word in words(record["m"]):
+                                bloom.add(word)
+                    size = out.tell()
+            except OSError:
+                return
+            segments = self._load_index()
+            segments.append({
+                "file": file_name,
+                "key": header.get("key", ""),
+                "name": header.get("name", ""),
+                "start": min(times),
+                "end": max(times),
+                "levels": levels,
+                "serials": serials,
+                "bytes": size,
+                "bloom": bloom.encode(),
+            })
+            self._enforce_retention(segments)
+            self._save_index(segments)
+            with self._lock:
+                self.segments = segments
+        try:
+            os.unlink(journal_path)
+        except OSError:
+            pass
+
+    def _enforce_retention(self, segments: List[Dict]):
+        total = sum(s["bytes"] for s in segments)
+        segments.sort(key=lambda s: s["start"])
+        while segments and (total > self.max_bytes or len(segments) > MAX_SEGMENTS):
+            oldest = segments.pop(0)
+            total -= oldest["bytes"]
+            try:
+                os.unlink(os.path.join(self.segment_dir, oldest["file"]))
+            except OSError:
+                pass
+
+    # Searching
+
+    def search(
+        self,
+        text: str = "",
+        serial: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        level: Optional[str] = None,
+        limit: int = 500,
+    ) -> List[Dict]:
+        """Lines containing every word of text, newest first
+
+        serial restricts to one adb serial, since/until to a time window
+        (epoch seconds) and level to lines at or above a severity.
+        """
+        if level and level not in LEVELS:
+            raise ValueError(f"Unknown level: {level}")
+        query_words = words(text)
+        results = []
+        segments = self._reload_index()
+
+        with self._lock:
+            journals = [(j.path, j.key, j.name) for j in self._journals.values()]
+            candidates = [
+                s for s in sorted(segments, key=lambda s: s["end"], reverse=True)
+                if (not serial or serial in s["serials"])
+                and not (since and s["end"] < since or until and s["start"] > until)
+                and (not level or any(s["levels"].get(name) for name in LEVELS[LEVELS.index(level):]))
+            ]
+
+        # Running sessions first, they hold the newest lines
+        for path, key, name in journals:
+            results.extend(self._search_journal(path, key, name, serial, since, until, level, query_words))
+
+        for segment in candidates:
+            if len(results) >= limit:
+                break
+            if query_words:
+                bloom = _Bloom.decode(segment["bloom"])
+                if not all(word in bloom for word in query_words):
+                    continue
+            results.extend(self._search_segment(segment, serial, since, until, level, query_words))
+
+        results.sort(key=lambda r: r["time"], reverse=True)
+        return results[:limit]
+
+    def _search_segment(self, segment, serial, since, until, level, query_words) -> List[Dict]:
+        results = []
+        try:
+            with open(os.path.join(self.segment_dir, segment["file"]), "rb") as fh:
+                for member_serial, (offset, length, _) in segment["serials"].items():
+                    if serial and member_serial != serial:
+                        continue
+                    fh.seek(offset)
+                    for line in gzip.decompress(fh.read(length)).decode("utf-8").splitlines():
+                        record = json.loads(line)
+                        if _matches(record, serial, since, until, level, query_words):
+                            results.append(_result(record, segment["key"], segment["name"]))
+        except (OSError, ValueError, EOFError):
+            pass
+        return results
+
+    def _search_journal(self, path, key, name, serial, since, until, level, query_words) -> List[Dict]:
+        results = []
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "t" in record and _matches(record, serial, since, until, level, query_words):
+                        results.append(_result(record, key, name))
+        except OSError:
+            pass
+        return results
+
+    def stats(self) -> Dict:
+        """Segment count and total compressed size"""
+        segments = self._reload_index()
+        return {"segments": len(segments), "bytes": sum(s["bytes"] for s in segments)}
+
+
+def _result(record: Dict, key: str, name: str) -> Dict:
+    return {"time": record["t"], "key": key, "name": name, "serial": record["s"],
+            "level": record["l"], "text": record["m"]}
@@ -0,0 +1,269 @@
+"""
+Counters and histograms for device operations and sessions
+
+Metrics are recorded into a process-wide registry. While the registry is
+disabled every record call returns after a single attribute check. When it
+is enabled, the metrics can be scraped in Prometheus text format from a
+local HTTP endpoint and are appended to a JSON-lines file as snapshots.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_PORT = 9464
+SNAPSHOT_INTERVAL = 60.0  # seconds between JSON-lines snapshots
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+UPTIME_BUCKETS = (10, 60, 300, 900, 3600, 4 * 3600, 12 * 3600, 24 * 3600)
+FPS_BUCKETS = (5, 15, 24, 30, 45, 60, 90, 120)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str):
+        self._registry = registry
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """A monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, registry, name, help_text):
+        super().__init__(registry, name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        if not self._registry.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Dict]:
+        with self._lock:
+            return [{"labels": dict(key), "value": value} for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    """A value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, registry, name, help_text, buckets):
+        super().__init__(registry, name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        if not self._registry.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def samples(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    "labels": dict(key),
+                    "buckets": {f"{bound:g}": data[i] for i, bound in enumerate(self.buckets)},
+                    "sum": data[-2],
+                    "count": data[-1],
+                }
+                for key, data in self._values.items()
+            ]
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, data in sorted(self._values.items()):
+                for index, bound in enumerate(self.buckets):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {data[index]:g}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {data[-1]:g}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {data[-2]:g}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {data[-1]:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """All metrics plus the optional HTTP endpoint and JSON-lines sink"""
+
+    def __init__(self):
+        self.enabled = False
+        self._metrics: List[_Metric] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._jsonl_path = None
+        self._stop = threading.Event()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(self, name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._register(Gauge(self, name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets=DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help_text, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict:
+        return {
+            "ts": time.time(),
+            "metrics": {m.name: {"type": m.kind, "samples": m.samples()} for m in self._metrics},
+        }
+
+    def write_snapshot(self):
+        """Append the current values to the JSON-lines file"""
+        if not self._jsonl_path:
+            return
+        try:
+            with open(self._jsonl_path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(self.snapshot(), separators=(",", ":")) + "\n")
+        except OSError:
+            pass
+
+    def start(self, port: Optional[int] = DEFAULT_PORT, jsonl_path=None):
+        """Enable recording and start the exporters
+
+        port=None skips the HTTP endpoint; jsonl_path=None skips the file.
+        Raises OSError if the port cannot be bound.
+        """
+        self.stop()
+        if port is not None:
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self))
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+        self._jsonl_path = jsonl_path
+        self._stop = threading.Event()
+        if jsonl_path:
+            threading.Thread(target=self._snapshot_loop, args=(self._stop,), daemon=True).start()
+        self.enabled = True
+
+    def stop(self):
+        """Disable recording and stop the exporters (values are kept)"""
+        if self.enabled:
+            self.write_snapshot()
+        self.enabled = False
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _snapshot_loop(self, stop: threading.Event):
+        while not stop.wait(SNAPSHOT_INTERVAL):
+            self.write_snapshot()
+
+
+def _make_handler(registry: MetricsRegistry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+REGISTRY = MetricsRegistry()
+
+REFRESH_DURATION = REGISTRY.histogram(
+    "andromirror_refresh_duration_seconds", "Time taken to list and group devices")
+REFRESHES = REGISTRY.counter(
+    "andromirror_refresh_total", "Device list refreshes by result")
+DEVICES_ONLINE = REGISTRY.gauge(
+    "andromirror_devices_online", "Logical devices found by the last refresh")
+WIRELESS_CONNECTS = REGISTRY.counter(
+    "andromirror_wireless_connect_total", "adb connect attempts by result")
+WIRELESS_CONNECT_DURATION = REGISTRY.histogram(
+    "andromirror_wireless_connect_duration_seconds", "Time taken by adb connect")
+CONNECT_REQUESTS = REGISTRY.counter(
+    "andromirror_connect_requests_total", "Connect/Disconnect requests from the GUI or CLI")
+SESSION_STARTS = REGISTRY.counter(
+    "andromirror_session_starts_total", "scrcpy launches by transport")
+SESSION_FAILURES = REGISTRY.counter(
+    "andromirror_session_failures_total", "Sessions that ended with an error")
+SETTINGS_CHANGES = REGISTRY.counter(
+    "andromirror_settings_changes_total", "Live settings changes by result (applied or kept the old ones)")
+SESSION_RESTARTS = REGISTRY.counter(
+    "andromirror_session_restarts_total", "Sessions relaunched after losing their transport")
+SESSION_UPTIME = REGISTRY.histogram(
+    "andromirror_session_uptime_seconds", "Session lifetime, observed when a session ends", UPTIME_BUCKETS)
+SESSION_THROTTLES = REGISTRY.counter(
+    "andromirror_session_throttle_total", "Sessions throttled, paused or restored for device temperature/battery")
+SESSIONS_ACTIVE = REGISTRY.gauge(
+    "andromirror_sessions_active", "Sessions currently mirroring")
+SESSION_FPS = REGISTRY.histogram(
+    "andromirror_session_fps", "Frame rates reported by scrcpy", FPS_BUCKETS)
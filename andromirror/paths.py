@@ -0,0 +1,27 @@
+"""
+Per-user locations for AndroMirror's data files
+"""
+
+import os
+import sys
+from pathlib import Path
+
+
+def config_dir() -> Path:
+    """Directory for settings and caches, created on first use"""
+    override = os.environ.get("ANDROMIRROR_HOME")
+    if override:
+        path = Path(override)
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    if sys.platform == "win32":
+        base = Path(os.environ.get("APPDATA") or Path.home() / "AppData" / "Roaming")
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Application Support"
+    else:
+        base = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config")
+
+    path = base / "andromirror"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
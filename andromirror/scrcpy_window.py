@@ -0,0 +1,150 @@
+"""
+Finding and moving scrcpy's window by process id
+
+Used to put a relaunched scrcpy exactly where the window it replaces was.
+On Windows this goes through user32; on X11 through xdotool when it is
+installed. Elsewhere (macOS, Wayland) the geometry is unknown, every
+function returns None/False and the new window opens where scrcpy puts it.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+from typing import List, NamedTuple, Optional
+
+XDOTOOL_TIMEOUT = 2.0
+
+
+class Geometry(NamedTuple):
+    """Position and size of the window's client area, in screen pixels"""
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+def scrcpy_window_args(geometry: Geometry) -> List[str]:
+    """scrcpy options that open its window with the given geometry"""
+    return [
+        f"--window-x={geometry.x}",
+        f"--window-y={geometry.y}",
+        f"--window-width={geometry.width}",
+        f"--window-height={geometry.height}",
+    ]
+
+
+def window_geometry(pid: int) -> Optional[Geometry]:
+    """Geometry of the visible window owned by a process, None if unknown"""
+    try:
+        if sys.platform == "win32":
+            return _win32_geometry(pid)
+        if _use_xdotool():
+            return _xdotool_geometry(pid)
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        pass
+    return None
+
+
+def move_window(pid: int, geometry: Geometry) -> bool:
+    """Move and resize a process's window; False if that isn't possible here"""
+    try:
+        if sys.platform == "win32":
+            return _win32_move(pid, geometry)
+        if _use_xdotool():
+            return _xdotool_move(pid, geometry)
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        pass
+    return False
+
+
+# X11
+
+def _use_xdotool() -> bool:
+    return bool(os.environ.get("DISPLAY")) and shutil.which("xdotool") is not None
+
+
+def _xdotool(*args: str) -> str:
+    result = subprocess.run(["xdotool", *args], capture_output=True, text=True, timeout=XDOTOOL_TIMEOUT)
+    return result.stdout if result.returncode == 0 else ""
+
+
+def _xdotool_window(pid: int) -> Optional[str]:
+    windows = _xdotool("search", "--onlyvisible", "--pid", str(pid)).split()
+    return windows[0] if windows else None
+
+
+def _xdotool_geometry(pid: int) -> Optional[Geometry]:
+    window = _xdotool_window(pid)
+    if not window:
+        return None
+    values = dict(re.findall(r"^(\w+)=(-?\d+)$", _xdotool("getwindowgeometry", "--shell", window), re.M))
+    return Geometry(int(values["X"]), int(values["Y"]), int(values["WIDTH"]), int(values["HEIGHT"]))
+
+
+def _xdotool_move(pid: int, geometry: Geometry) -> bool:
+    window = _xdotool_window(pid)
+    if not window:
+        return False
+    subprocess.run(
+        ["xdotool", "windowsize", window, str(geometry.width), str(geometry.height),
+         "windowmove", window, str(geometry.x), str(geometry.y)],
+        capture_output=True, timeout=XDOTOOL_TIMEOUT,
+    )
+    return True
+
+
+# Windows
+
+def _win32_window(pid: int):
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    found = []
+
+    @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    def callback(hwnd, _):
+        owner = wintypes.DWORD()
+        user32.GetWindowThreadProcessId(hwnd, ctypes.byref(owner))
+        if owner.value == pid and user32.IsWindowVisible(hwnd):
+            found.append(hwnd)
+            return False
+        return True
+
+    user32.EnumWindows(callback, 0)
+    return found[0] if found else None
+
+
+def _win32_geometry(pid: int) -> Optional[Geometry]:
+    import ctypes
+    from ctypes import wintypes
+
+    hwnd = _win32_window(pid)
+    if not hwnd:
+        return None
+    user32 = ctypes.windll.user32
+    rect = wintypes.RECT()
+    origin = wintypes.POINT(0, 0)
+    user32.GetClientRect(hwnd, ctypes.byref(rect))
+    user32.ClientToScreen(hwnd, ctypes.byref(origin))
+    return Geometry(origin.x, origin.y, rect.right - rect.left, rect.bottom - rect.top)
+
+
+def _win32_move(pid: int, geometry: Geometry) -> bool:
+    import ctypes
+    from ctypes import wintypes
+
+    hwnd = _win32_window(pid)
+    if not hwnd:
+        return False
+    user32 = ctypes.windll.user32
+    # SetWindowPos takes the outer frame; grow the client geometry by the decorations
+    frame = wintypes.RECT(geometry.x, geometry.y, geometry.x + geometry.width, geometry.y + geometry.height)
+    style = user32.GetWindowLongW(hwnd, -16)  # GWL_STYLE
+    user32.AdjustWindowRect(ctypes.byref(frame), style, False)
+    return bool(user32.SetWindowPos(
+        hwnd, 0, frame.left, frame.top, frame.right - frame.left, frame.bottom - frame.top,
+        0x0004 | 0x0010,  # SWP_NOZORDER | SWP_NOACTIVATE
+    ))
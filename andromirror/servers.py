@@ -0,0 +1,203 @@
+"""
+Devices from several adb servers
+
+Besides the local adb server, AndroMirror can list devices attached to adb
+servers on other hosts (started there with `adb -a -P 5037 nodaemon server`).
+Remote servers are asked directly over the adb host protocol, all at once.
+Listing devices never waits for them: it returns their last answers and
+asks again in the background. Polling (refresh_remote) waits only until
+REFRESH_DEADLINE; a host that is slower than that keeps its previous device
+list for a while and catches up later. An unreachable host simply
+contributes no devices.
+"""
+
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from .adb import DEFAULT_SERVER_PORT, AdbError, format_server, qualify_serial, server_address
+from .devices import list_online_serials
+
+HOST_TIMEOUT = 5.0  # socket timeout for one remote server
+REFRESH_DEADLINE = 2.0  # how long a refresh waits for remote servers
+STALE_AFTER = 60.0  # drop a slow server's devices once its last answer is this old
+
+
+def normalize_endpoint(endpoint: str) -> str:
+    """"host", "host:port", "[ipv6]" or "[ipv6]:port" as "host:port"; raises ValueError
+
+    A bare IPv6 address (more than one colon, no brackets) is taken as a host.
+    """
+    endpoint = endpoint.strip()
+    if endpoint.startswith("["):
+        host, sep, rest = endpoint[1:].partition("]")
+        port = rest[1:] if rest.startswith(":") else rest or str(DEFAULT_SERVER_PORT)
+        valid = sep and ":" in host
+    elif endpoint.count(":") > 1:
+        host, port, valid = endpoint, str(DEFAULT_SERVER_PORT), True
+    else:
+        host, sep, port = endpoint.rpartition(":")
+        if not sep:
+            host, port = endpoint, str(DEFAULT_SERVER_PORT)
+        valid = True
+    if not valid or not host or not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"Invalid adb server {endpoint!r}, expected host, host:port or [ipv6]:port")
+    return format_server(host, int(port))
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise AdbError("adb server closed the connection")
+        data += chunk
+    return data
+
+
+def query_devices(endpoint: str, timeout: float = HOST_TIMEOUT) -> List[str]:
+    """Serials in the 'device' state on an adb server, via the host protocol
+
+    Raises AdbError or OSError (including socket.timeout).
+    """
+    host, port = server_address(endpoint)
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.settimeout(timeout)
+        request = b"host:devices"
+        sock.sendall(b"%04x" % len(request) + request)
+        status = _recv_exact(sock, 4)
+        length = int(_recv_exact(sock, 4), 16)
+        payload = _recv_exact(sock, length).decode("utf-8", "replace")
+    if status != b"OKAY":
+        raise AdbError(payload or "adb server refused the request")
+
+    serials = []
+    for line in payload.splitlines():
+        if "\t" in line:
+            serial, state = line.split("\t", 1)
+            if state.strip() == "device":
+                serials.append(serial)
+    return serials
+
+
+class _HostResult:
+    def __init__(self, serials: List[str], error: str, latency: float):
+        self.serials = serials
+        self.error = error
+        self.latency = latency
+        self.checked_at = time.time()
+
+
+class AdbServerPool:
+    """The local adb server plus any number of remote ones"""
+
+    def __init__(self, deadline: float = REFRESH_DEADLINE, host_timeout: float = HOST_TIMEOUT):
+        self.deadline = deadline
+        self.host_timeout = host_timeout
+        self.endpoints: List[str] = []
+        self._results: Dict[str, _HostResult] = {}
+        self._local: Optional[_HostResult] = None
+        self._inflight: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="adb-server")
+
+    def configure(self, endpoints: List[str]) -> List[str]:
+        """Set the remote servers; raises ValueError for a malformed endpoint"""
+        normalized = list(dict.fromkeys(normalize_endpoint(e) for e in endpoints if e.strip()))
+        with self._lock:
+            self.endpoints = normalized
+            self._results = {e: r for e, r in self._results.items() if e in normalized}
+        return normalized
+
+    def _query(self, endpoint: str):
+        start = time.perf_counter()
+        try:
+            serials, error = query_devices(endpoint, self.host_timeout), ""
+        except (AdbError, OSError, ValueError) as e:
+            serials, error = [], str(e) or type(e).__name__
+        with self._lock:
+            self._results[endpoint] = _HostResult(serials, error, time.perf_counter() - start)
+            self._inflight.pop(endpoint, None)
+
+    def _start_queries(self) -> List:
+        with self._lock:
+            futures = []
+            for endpoint in self.endpoints:
+                # A host that is still answering the previous refresh isn't asked twice
+                if endpoint not in self._inflight:
+                    self._inflight[endpoint] = self._executor.submit(self._query, endpoint)
+                futures.append(self._inflight[endpoint])
+            return futures
+
+    def remote_serials(self) -> List[str]:
+        """Qualified serials of the remote servers that answered recently enough"""
+        now = time.time()
+        with self._lock:
+            return [
+                qualify_serial(serial, endpoint)
+                for endpoint in self.endpoints
+                for result in [self._results.get(endpoint)]
+                if result and now - result.checked_at < STALE_AFTER
+                for serial in result.serials
+            ]
+
+    def list_serials(self, timeout: float = 10) -> List[str]:
+        """Online serials of all servers; remote ones as "serial@host:port"
+
+        Remote serials are the servers' last answers, which are refreshed in
+        the background, so this costs no more than listing the local server.
+        A failing local server doesn't hide the remote devices; its error
+        shows in status(). Raises AdbError, FileNotFoundError or
+        subprocess.TimeoutExpired for the local server only when no remote
+        server is configured.
+        """
+        self._start_queries()
+        start = time.perf_counter()
+        try:
+            local, error = list_online_serials(timeout), ""
+        except (AdbError, FileNotFoundError, subprocess.TimeoutExpired) as e:
+            if not self.endpoints:
+                raise
+            local, error = [], str(e) or type(e).__name__
+        with self._lock:
+            self._local = _HostResult(local, error, time.perf_counter() - start)
+        return local + self.remote_serials()
+
+    def refresh_remote(self) -> List[str]:
+        """Ask the remote servers again and return their serials"""
+        futures = self._start_queries()
+        if futures:
+            wait(futures, timeout=self.deadline)
+        return self.remote_serials()
+
+    def status(self) -> List[Dict]:
+        """Per server: reachable, device count, error and latency
+
+        The local server comes first, as "local" with "local": True, once it
+        has been listed.
+        """
+        now = time.time()
+
+        def row(server: str, result: Optional[_HostResult], **extra) -> Dict:
+            return dict({
+                "server": server,
+                "ok": bool(result and not result.error),
+                "devices": len(result.serials) if result else 0,
+                "error": result.error if result else "no answer yet",
+                "latency_ms": round(result.latency * 1000) if result else None,
+                "age": round(now - result.checked_at) if result else None,
+            }, **extra)
+
+        with self._lock:
+            rows = [row("local", self._local, local=True, pending=False)] if self._local else []
+            rows.extend(
+                row(endpoint, self._results.get(endpoint), local=False, pending=endpoint in self._inflight)
+                for endpoint in self.endpoints
+            )
+            return rows
+
+    def close(self):
+        self._executor.shutdown(wait=False)
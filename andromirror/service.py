@@ -0,0 +1,360 @@
+"""
+Device and session service shared by all frontends
+
+MirrorService owns adb access (shell channels, device grouping) and the
+scrcpy sessions. The GUI and the CLI talk to it either in-process or through
+the daemon's RPC socket (see andromirror.daemon); every method takes and
+returns plain JSON-compatible values so both paths behave the same.
+"""
+
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from . import metrics
+from .adb import AdbError, adb_command
+from .config import DEFAULT_SETTINGS
+from .devices import DeviceTracker, LogicalDevice, connect_endpoint, connect_endpoints
+from .link_probe import LinkProbeError, probe_link
+from .logarchive import LogArchive
+from .servers import AdbServerPool
+from .sessions import PAUSED, RUNNING, MirrorSession, SessionManager
+from .shell_pool import ShellError, ShellPool
+from .thermal import ThermalMonitor
+from .virtual_display import (
+    VIRTUAL, WINDOW_SIZE, DisplayError, check_start_app, query_capabilities, resolve_display
+)
+
+TRACK_RETRY_DELAY = 5.0  # seconds before restarting `adb track-devices`
+REMOTE_POLL_INTERVAL = 10.0  # seconds between polls of remote adb servers
+
+
+class ServiceError(Exception):
+    """A request to the service failed; the message is meant for the user"""
+
+
+class MirrorService:
+    """Owns device tracking and mirroring sessions for any number of frontends"""
+
+    def __init__(self):
+        self.shell_pool = ShellPool()
+        self.tracker = DeviceTracker(self.shell_pool)
+        self.logs = LogArchive()
+        self.servers = AdbServerPool()
+        self.sessions = SessionManager(
+            on_event=self._on_session_event,
+            on_output=self._on_session_output,
+            list_serials=self.servers.list_serials,
+        )
+        self.thermal = ThermalMonitor(self.shell_pool, self.sessions)
+        self.devices: List[LogicalDevice] = []
+        self._subscribers: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+        self._tracking = None
+
+    # Events
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        """Receive events as dicts with a "type" of "devices", "session" or "notice" """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _emit(self, event: Dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception:
+                # A broken frontend must not take the others down
+                self.unsubscribe(callback)
+
+    def _on_session_event(self, session: MirrorSession, message: str, level: str):
+        # Events go into the session's log next to scrcpy's own output
+        self.logs.append(
+            session, session.device.key, session.device.model, session.serial or session.device.preferred,
+            f"AndroMirror: {message}", level="warn" if level == "warning" else level
+        )
+        if not session.active:
+            self.logs.close_session(session)
+        self._emit({"type": "session", "session": session.to_dict(), "message": message, "level": level})
+
+    def _on_session_output(self, session: MirrorSession, serial: str, line: str):
+        self.logs.append(session, session.device.key, session.device.model, serial, line)
+
+    # Devices
+
+    def list_devices(self) -> List[Dict]:
+        """Devices found by the last refresh"""
+        with self._lock:
+            return [device.to_dict() for device in self.devices]
+
+    def refresh_devices(self) -> List[Dict]:
+        """List online transports, group them into devices and notify frontends"""
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            devices = self.tracker.group(self.servers.list_serials())
+            outcome = "ok"
+        except AdbError as e:
+            raise ServiceError(str(e))
+        except subprocess.TimeoutExpired:
+            raise ServiceError("ADB command timed out")
+        except FileNotFoundError:
+            raise ServiceError("ADB not found. Please install Android SDK Platform Tools")
+        finally:
+            metrics.REFRESHES.inc(result=outcome)
+            metrics.REFRESH_DURATION.observe(time.perf_counter() - start, result=outcome)
+
+        with self._lock:
+            self.devices = devices
+        metrics.DEVICES_ONLINE.set(len(devices))
+
+        # Drop shell channels of devices that went away
+        self.shell_pool.sync([serial for device in devices for serial in device.transports])
+        self.sessions.update_devices(devices)
+
+        result = [device.to_dict() for device in devices]
+        self._emit({"type": "devices", "devices": result})
+        return result
+
+    def connect_wireless(self, endpoint: str) -> Dict:
+        """Run `adb connect`; returns {"connected": bool, "message": str}"""
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            connected, message = connect_endpoint(endpoint)
+            outcome = "success" if connected else "failure"
+        except subprocess.TimeoutExpired:
+            raise ServiceError("adb connect timed out")
+        except FileNotFoundError:
+            raise ServiceError("ADB not found. Please install Android SDK Platform Tools")
+        finally:
+            metrics.WIRELESS_CONNECTS.inc(result=outcome)
+            metrics.WIRELESS_CONNECT_DURATION.observe(time.perf_counter() - start, result=outcome)
+        return {"connected": connected, "message": message}
+
+    def run_shell(self, serial: str, command: str, timeout: float = 5.0) -> Dict:
+        """Run a command over the device's persistent shell channel"""
+        try:
+            exit_code, output = self.shell_pool.run(serial, command, timeout)
+        except ShellError as e:
+            raise ServiceError(str(e))
+        return {"exit_code": exit_code, "output": output}
+
+    def probe_link(self, serial: str) -> Dict:
+        """Measure throughput and RTT to a device (see andromirror.link_probe)"""
+        try:
+            return probe_link(serial, self.shell_pool).to_dict()
+        except LinkProbeError as e:
+            raise ServiceError(str(e))
+
+    def start_tracking(self):
+        """Refresh whenever adb reports a device change (used by the daemon)"""
+        if self._tracking is None:
+            self._tracking = threading.Event()
+            threading.Thread(target=self._track_devices, args=(self._tracking,), daemon=True).start()
+            threading.Thread(target=self._poll_servers, args=(self._tracking,), daemon=True).start()
+
+    def _track_devices(self, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                process = subprocess.Popen(adb_command("track-devices"), stdout=subprocess.PIPE,
+                                           stderr=subprocess.DEVNULL)
+            except FileNotFoundError:
+                stop.wait(TRACK_RETRY_DELAY)
+                continue
+            try:
+                # Each update is a 4-digit hex length followed by the device list
+                while not stop.is_set():
+                    header = process.stdout.read(4)
+                    if len(header) < 4:
+                        break
+                    process.stdout.read(int(header, 16))
+                    try:
+                        self.refresh_devices()
+                    except ServiceError:
+                        pass
+            except ValueError:
+                pass
+            finally:
+                process.kill()
+                process.wait()
+                process.stdout.close()
+            stop.wait(TRACK_RETRY_DELAY)
+
+    def _poll_servers(self, stop: threading.Event):
+        # Remote servers aren't tracked over a stream; poll and refresh on changes
+        known = set()
+        while not stop.wait(REMOTE_POLL_INTERVAL):
+            if not self.servers.endpoints:
+                continue
+            serials = set(self.servers.refresh_remote())
+            if serials != known:
+                known = serials
+                try:
+                    self.refresh_devices()
+                except ServiceError:
+                    pass
+
+    def configure_servers(self, endpoints: List[str]) -> List[Dict]:
+        """Set the remote adb servers ("host" or "host:port") and refresh devices"""
+        try:
+            self.servers.configure(endpoints)
+        except ValueError as e:
+            raise ServiceError(str(e))
+        self.servers.refresh_remote()  # listing devices doesn't wait for new servers
+        try:
+            self.refresh_devices()
+        except ServiceError:
+            pass  # a broken local adb shouldn't stop the servers from being saved
+        return self.server_status()
+
+    def server_status(self) -> List[Dict]:
+        """Reachability, device count and latency of the local and each remote adb server"""
+        return self.servers.status()
+
+    # Sessions
+
+    def list_sessions(self) -> List[Dict]:
+        return [session.to_dict() for session in self.sessions.active()]
+
+    def start_session(self, key: str, settings: Dict) -> Dict:
+        """Start mirroring a device (by logical device key); missing settings use the defaults"""
+        device = self._find_device(key)
+        if device is None:
+            self.refresh_devices()
+            device = self._find_device(key)
+        if device is None:
+            raise ServiceError(f"Device not found: {key}")
+        metrics.CONNECT_REQUESTS.inc(action="connect")
+        settings = self.check_settings(device, dict(DEFAULT_SETTINGS, **settings))
+        return self.sessions.start(device, settings).to_dict()
+
+    def check_settings(self, device: LogicalDevice, settings: Dict) -> Dict:
+        """Validate virtual display and app settings against the device before launch"""
+        try:
+            if settings["display_mode"] == VIRTUAL:
+                caps = query_capabilities(self.shell_pool, device.preferred)
+                settings = resolve_display(settings, caps)
+        except DisplayError as e:
+            raise ServiceError(str(e))
+        if settings["start_app"]:
+            problem = check_start_app(self.shell_pool, device.preferred, settings["start_app"])
+            if problem:
+                raise ServiceError(problem)
+        return settings
+
+    def apply_settings(self, key: str, settings: Dict) -> Dict:
+        """Switch a running session to new settings without interrupting the mirror"""
+        session = self.sessions.get(key)
+        if session is None:
+            raise ServiceError(f"Device is not being mirrored: {key}")
+        if session.throttled or session.state == PAUSED:
+            raise ServiceError("Device protection is limiting this session; change settings once the device recovers")
+        if session.state != RUNNING:
+            raise ServiceError("The session is still starting, try again in a moment")
+        metrics.CONNECT_REQUESTS.inc(action="apply")
+        settings = dict(DEFAULT_SETTINGS, **settings)
+        if settings["display_mode"] == VIRTUAL and settings["virtual_size"] == WINDOW_SIZE:
+            # Fit the display to the window as the user left it; where windows
+            # can't be read, keep the size the session was started with
+            settings["virtual_size"] = session.window_size() or session.settings.get("virtual_size", WINDOW_SIZE)
+        settings = self.check_settings(session.device, settings)
+        if not session.apply_settings(settings):
+            raise ServiceError("The new settings could not be applied; mirroring continues with the previous ones")
+        return session.to_dict()
+
+    def stop_session(self, key: str) -> bool:
+        metrics.CONNECT_REQUESTS.inc(action="disconnect")
+        session = self.sessions.get(key)
+        if session:
+            session.stop()
+        return session is not None
+
+    def resume(
+        self,
+        endpoints: List[str],
+        keys: List[str],
+        profiles: Dict[str, Dict],
+        default_settings: Dict,
+        max_concurrent: int = 4,
+    ) -> int:
+        """Reconnect wireless endpoints, then relaunch sessions for the given devices"""
+        connect_endpoints(endpoints, max_workers=max_concurrent)
+        self.refresh_devices()
+        with self._lock:
+            devices = list(self.devices)
+        default_settings = dict(DEFAULT_SETTINGS, **default_settings)
+
+        # Validate up front; a device whose settings don't fit it is skipped
+        resolved = {}
+        for device in devices:
+            if device.key in keys:
+                try:
+                    resolved[device.key] = self.check_settings(
+                        device, dict(default_settings, **profiles.get(device.key, {}))
+                    )
+                except ServiceError as e:
+                    self._emit({"type": "notice", "message": f"Not resuming {device.label}: {str(e)}"})
+        keys = [key for key in keys if key in resolved]
+        return self.sessions.resume(devices, keys, resolved, default_settings, max_concurrent)
+
+    def _find_device(self, key: str) -> Optional[LogicalDevice]:
+        with self._lock:
+            return next((device for device in self.devices if device.key == key), None)
+
+    # Logs
+
+    def search_logs(
+        self,
+        text: str = "",
+        serial: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        level: Optional[str] = None,
+        limit: int = 500,
+    ) -> List[Dict]:
+        """Search archived session output (see andromirror.logarchive)"""
+        try:
+            return self.logs.search(text, serial=serial, since=since, until=until, level=level, limit=limit)
+        except ValueError as e:
+            raise ServiceError(str(e))
+
+    # Device protection
+
+    def configure_thermal(self, limits: Dict) -> Dict:
+        """Set the thermal/battery thresholds (see andromirror.config.DEFAULT_THERMAL)"""
+        self.thermal.configure(limits)
+        return self.thermal.limits
+
+    # Metrics
+
+    def configure_metrics(self, enabled: bool, port: Optional[int] = None, jsonl_path: Optional[str] = None) -> bool:
+        """Start or stop the metrics exporters of the process owning the sessions"""
+        if not enabled:
+            metrics.REGISTRY.stop()
+            return False
+        if not metrics.REGISTRY.enabled:
+            try:
+                metrics.REGISTRY.start(port=port, jsonl_path=jsonl_path)
+            except OSError as e:
+                raise ServiceError(f"Cannot serve metrics on port {port}: {str(e)}")
+        return True
+
+    def close(self):
+        """Stop every session and release adb resources"""
+        if self._tracking is not None:
+            self._tracking.set()
+        self.thermal.stop()
+        self.sessions.stop_all()
+        self.logs.close()
+        self.shell_pool.close()
+        self.servers.close()
+        metrics.REGISTRY.stop()
@@ -0,0 +1,492 @@
+"""
+scrcpy mirroring sessions
+
+A MirrorSession owns the scrcpy process for one logical device. It drains
+scrcpy's output, and when the process dies because its transport went away
+(e.g. the USB cable was pulled) it relaunches over another transport of the
+same device. New settings are applied make-before-break: the replacement
+scrcpy runs next to the old one until it shows its first frame. SessionManager
+keeps one session per device.
+"""
+
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from . import metrics
+from .adb import adb_environment, server_address, split_serial
+from .devices import LogicalDevice, is_tcp, list_online_serials
+from .scrcpy_window import move_window, scrcpy_window_args, window_geometry
+from .virtual_display import window_display_size
+
+RESOLUTION_MAP = {
+    "SD (540p)": "540",
+    "HD (720p)": "720",
+    "FHD (1080p)": "1080",
+    "4K": "2160"
+}
+AUDIO_BITRATE_MAP = {"Low": "64K", "Medium": "128K", "High": "320K"}
+
+OUTPUT_LINES = 200  # scrcpy output kept per session for error reports
+FAILOVER_DELAY = 1.0  # give adb time to notice a pulled cable
+READY_TIMEOUT = 15.0  # how long a launch may take to show its first frame
+FIRST_FRAME_MARKER = "Texture:"  # scrcpy logs the texture size on the first frame
+FPS_PATTERN = re.compile(r"\b(\d+) fps\b")  # scrcpy --print-fps output
+
+# Session states
+STARTING = "starting"
+RUNNING = "running"
+PAUSED = "paused"  # scrcpy stopped to let the device cool down, see andromirror.thermal
+STOPPED = "stopped"
+FAILED = "failed"
+
+
+def build_scrcpy_command(serial: str, settings: Dict) -> List[str]:
+    """Build the scrcpy command line for a device from session settings"""
+    server, local_serial = split_serial(serial)
+    cmd = ["scrcpy", "-s", local_serial]
+    if server:
+        # The video tunnel is forwarded on the remote adb host (started with `adb -a`)
+        cmd.extend(["--force-adb-forward", f"--tunnel-host={server_address(server)[0]}"])
+
+    # Display: a virtual display already has the size the host shows
+    if settings.get("display_mode") == "virtual":
+        cmd.append(f"--new-display={settings['virtual_size']}/{settings['virtual_dpi']}")
+    elif settings["resolution"] in RESOLUTION_MAP:
+        cmd.extend(["-m", RESOLUTION_MAP[settings["resolution"]]])
+    if settings.get("start_app"):
+        cmd.append(f"--start-app={settings['start_app']}")
+
+    # Video settings
+    cmd.extend(["--max-fps", str(settings["fps"])])
+    cmd.extend(["--video-codec", settings["video_codec"]])
+    cmd.extend(["-b", settings["bitrate"]])
+
+    # Audio settings
+    if not settings["audio_enabled"]:
+        cmd.append("--no-audio")
+    else:
+        cmd.extend(["--audio-bit-rate", AUDIO_BITRATE_MAP[settings["audio_quality"]]])
+
+    # Device settings
+    if settings["stay_awake"]:
+        cmd.append("--stay-awake")
+    if settings["screen_off"]:
+        cmd.append("--turn-screen-off")
+
+    # Input settings
+    cmd.extend(["--keyboard", settings["keyboard_mode"]])
+    cmd.extend(["--mouse", settings["mouse_mode"]])
+    return cmd
+
+
+def transport_name(serial: str) -> str:
+    server, local_serial = split_serial(serial)
+    name = f"Wi-Fi ({local_serial})" if is_tcp(serial) else f"USB ({local_serial})"
+    return f"{name} via {server}" if server else name
+
+
+class MirrorSession:
+    """The scrcpy process mirroring one logical device"""
+
+    def __init__(
+        self,
+        device: LogicalDevice,
+        settings: Dict,
+        on_event: Callable[["MirrorSession", str, str], None],
+        on_output: Optional[Callable[["MirrorSession", str, str], None]] = None,
+        list_serials: Callable[[], List[str]] = list_online_serials,
+    ):
+        self.device = device
+        self.settings = dict(settings)
+        self.on_event = on_event
+        self.on_output = on_output
+        self.list_serials = list_serials
+        self.serial: Optional[str] = None
+        self.process: Optional[subprocess.Popen] = None
+        self.state = STARTING
+        self.started_at = time.time()
+        self.restarts = 0
+        self.throttled = False  # running with reduced settings, see andromirror.thermal
+        self.switching = False  # a transport switch is in progress
+        self.output = deque(maxlen=OUTPUT_LINES)
+        self.ready = threading.Event()
+        self._lock = threading.RLock()
+
+    @property
+    def active(self) -> bool:
+        return self.state in (STARTING, RUNNING, PAUSED)
+
+    @property
+    def uptime(self) -> float:
+        return time.time() - self.started_at
+
+    def to_dict(self) -> Dict:
+        """Summary of the session for frontends"""
+        return {
+            "key": self.device.key,
+            "name": self.device.model or self.device.preferred,
+            "transports": self.device.transports,
+            "serial": self.serial,
+            "transport": transport_name(self.serial) if self.serial else None,
+            "state": self.state,
+            "active": self.active,
+            "uptime": self.uptime,
+            "restarts": self.restarts,
+            "throttled": self.throttled,
+            "settings": self.settings,
+        }
+
+    def window_size(self) -> Optional[str]:
+        """scrcpy's window as a virtual display size (WxH), None where it can't be read"""
+        process = self.process
+        geometry = window_geometry(process.pid) if process else None
+        return window_display_size(geometry.width, geometry.height) if geometry else None
+
+    def wait_ready(self, timeout: float = READY_TIMEOUT) -> bool:
+        """Wait until scrcpy shows its first frame (or gives up)"""
+        return self.ready.wait(timeout) and self.active
+
+    def start(self):
+        """Launch scrcpy over the device's preferred transport"""
+        threading.Thread(target=self._launch, args=(self.device.preferred,), daemon=True).start()
+
+    def stop(self):
+        """Stop mirroring"""
+        with self._lock:
+            if not self.active:
+                return
+            process = self.process
+            self.process = None
+            self.state = STOPPED
+        if process and process.poll() is None:
+            process.terminate()
+        self.ready.set()
+        metrics.SESSION_UPTIME.observe(self.uptime)
+        self.on_event(self, "Stopped", "info")
+
+    def switch_to(self, serial: str, reason: str):
+        """Relaunch the session over another transport"""
+        with self._lock:
+            if not self.active or serial == self.serial or self.switching:
+                return
+            if self.state == PAUSED:
+                # Nothing runs; sampling and the eventual resume use the new transport
+                self.serial = serial
+                paused = True
+            else:
+                paused = False
+                self.switching = True
+                old = self.process
+                self.process = None
+        if paused:
+            self.on_event(self, reason, "info")
+            return
+        try:
+            if old and old.poll() is None:
+                old.terminate()
+            self.on_event(self, reason, "info")
+            self._launch(serial)
+        finally:
+            with self._lock:
+                self.switching = False
+
+    def restart(self, settings: Dict, reason: str, level: str = "info"):
+        """Relaunch scrcpy over the current transport with new settings (also ends a pause)"""
+        with self._lock:
+            if not self.active:
+                return
+            self.settings = dict(settings)
+            old = self.process
+            self.process = None
+            self.state = STARTING
+            self.ready.clear()
+            serial = self.serial or self.device.preferred
+        if old and old.poll() is None:
+            old.terminate()
+        self.on_event(self, reason, level)
+        self._launch(serial)
+
+    def pause(self, reason: str):
+        """Stop scrcpy but keep the session, to be relaunched with restart()"""
+        with self._lock:
+            if self.state != RUNNING:
+                return
+            old = self.process
+            self.process = None
+            self.state = PAUSED
+        if old and old.poll() is None:
+            old.terminate()
+        self.on_event(self, reason, "warning")
+
+    def fail_paused(self, reason: str):
+        """End a paused session whose device went away"""
+        with self._lock:
+            if self.state != PAUSED:
+                return
+        self._fail(reason)
+
+    def apply_settings(self, settings: Dict, timeout: float = READY_TIMEOUT) -> bool:
+        """Switch a running session to new settings without a blackout
+
+        The replacement scrcpy is started next to the current one, placed on
+        its window and only once it shows its first frame is the old process
+        stopped. If the replacement fails or is too slow, it is discarded
+        and the session keeps running as before. Returns whether the new
+        settings are in effect.
+        """
+        with self._lock:
+            if self.state != RUNNING or self.process is None:
+                return False
+            old, serial = self.process, self.serial
+        geometry = window_geometry(old.pid)
+
+        try:
+            candidate = self._spawn(serial, settings, scrcpy_window_args(geometry) if geometry else [])
+        except OSError as e:
+            self.on_event(self, f"Could not apply new settings ({str(e)}), keeping the current ones", "warning")
+            return False
+        first_frame = threading.Event()
+        candidate_output = deque(maxlen=1)  # self.output mixes in the current scrcpy's lines
+        watcher = threading.Thread(target=self._watch, args=(candidate, serial, first_frame, candidate_output),
+                                   daemon=True)
+        watcher.start()
+
+        deadline = time.monotonic() + timeout
+        while not first_frame.wait(0.05):
+            if candidate.poll() is not None or time.monotonic() > deadline or self.process is not old:
+                break
+
+        with self._lock:
+            adopted = first_frame.is_set() and self.process is old and self.state == RUNNING
+            if adopted:
+                self.process = candidate
+                self.settings = dict(settings)
+        if not adopted:
+            if candidate.poll() is None:
+                problem = f"no first frame within {timeout:g} s"
+                candidate.terminate()
+            else:
+                watcher.join(1.0)  # let it drain the last lines
+                problem = (candidate_output[-1] if candidate_output
+                           else f"scrcpy exited with code {candidate.returncode}")
+            metrics.SETTINGS_CHANGES.inc(result="kept")
+            if self.process is old:
+                self.on_event(self, f"Could not apply new settings ({problem}), keeping the current ones", "warning")
+            return False
+
+        # The old window may have moved while the replacement started
+        current = window_geometry(old.pid)
+        if current and current != geometry:
+            move_window(candidate.pid, current)
+        if old.poll() is None:
+            old.terminate()
+        metrics.SETTINGS_CHANGES.inc(result="applied")
+        self.on_event(self, "Applied new settings", "info")
+        return True
+
+    def _spawn(self, serial: str, settings: Dict, extra_args: Optional[List[str]] = None) -> subprocess.Popen:
+        """Start scrcpy; raises OSError (FileNotFoundError if it isn't installed)"""
+        cmd = build_scrcpy_command(serial, settings) + (extra_args or [])
+        if metrics.REGISTRY.enabled:
+            cmd.append("--print-fps")
+        return subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            env=adb_environment(serial)
+        )
+
+    def _launch(self, serial: str):
+        try:
+            process = self._spawn(serial, self.settings)
+        except FileNotFoundError:
+            self._fail("scrcpy not found. Please install scrcpy and add it to PATH")
+            return
+        except Exception as e:
+            self._fail(f"Failed to start scrcpy: {str(e)}")
+            return
+
+        with self._lock:
+            stopped = self.state not in (STARTING, RUNNING)
+            if not stopped:
+                self.process = process
+                self.serial = serial
+                self.state = RUNNING
+        if stopped:
+            # Stopped while launching; the watcher reaps the process
+            process.terminate()
+        else:
+            metrics.SESSION_STARTS.inc(transport="tcp" if is_tcp(serial) else "usb")
+            self.on_event(self, f"Mirroring over {transport_name(serial)}", "info")
+        threading.Thread(target=self._watch, args=(process, serial, self.ready), daemon=True).start()
+
+    def _watch(self, process: subprocess.Popen, serial: str, ready: threading.Event, lines: Optional[deque] = None):
+        """Drain scrcpy's output, set ready on its first frame and react when it exits
+
+        Lines also go to `lines` when given, to tell this process's output apart.
+        """
+        try:
+            for line in process.stdout:
+                self.output.append(line.rstrip())
+                if lines is not None:
+                    lines.append(line.rstrip())
+                if self.on_output:
+                    self.on_output(self, serial, line.rstrip())
+                if FIRST_FRAME_MARKER in line:
+                    ready.set()
+                elif metrics.REGISTRY.enabled:
+                    match = FPS_PATTERN.search(line)
+                    if match:
+                        metrics.SESSION_FPS.observe(int(match.group(1)))
+        except (OSError, ValueError):
+            pass
+        finally:
+            process.stdout.close()
+        returncode = process.wait()
+
+        with self._lock:
+            if process is not self.process:
+                # Stopped by the user or replaced by a relaunch
+                return
+            self.process = None
+            failed_serial = self.serial
+
+        self._failover(failed_serial, returncode)
+
+    def _failover(self, failed_serial: str, returncode: int):
+        time.sleep(FAILOVER_DELAY)
+        try:
+            online = set(self.list_serials())
+        except Exception:
+            online = set()
+
+        alternatives = [s for s in self.device.transports if s in online and s != failed_serial]
+        with self._lock:
+            if not self.active:
+                return
+        if alternatives:
+            self.restarts += 1
+            metrics.SESSION_RESTARTS.inc()
+            self.on_event(self, f"Lost {transport_name(failed_serial)}, switching transport", "warning")
+            self._launch(alternatives[0])
+            return
+
+        last_line = self.output[-1] if self.output else ""
+        if returncode == 0:
+            with self._lock:
+                self.state = STOPPED
+            self.ready.set()
+            metrics.SESSION_UPTIME.observe(self.uptime)
+            self.on_event(self, "scrcpy closed", "info")
+        else:
+            self._fail(f"scrcpy exited with code {returncode}" + (f": {last_line}" if last_line else ""))
+
+    def _fail(self, message: str):
+        with self._lock:
+            self.state = FAILED
+        self.ready.set()
+        metrics.SESSION_FAILURES.inc()
+        metrics.SESSION_UPTIME.observe(self.uptime)
+        self.on_event(self, message, "error")
+
+
+class SessionManager:
+    """One mirroring session per logical device"""
+
+    def __init__(
+        self,
+        on_event: Optional[Callable[[MirrorSession, str, str], None]] = None,
+        on_output: Optional[Callable[[MirrorSession, str, str], None]] = None,
+        list_serials: Callable[[], List[str]] = list_online_serials,
+    ):
+        self.on_event = on_event or (lambda session, message, level: None)
+        self.on_output = on_output
+        self.list_serials = list_serials  # online serials, used to pick a failover transport
+        self._sessions: Dict[str, MirrorSession] = {}
+        self._lock = threading.Lock()
+
+    def _on_session_event(self, session: MirrorSession, message: str, level: str):
+        metrics.SESSIONS_ACTIVE.set(len(self.active()))
+        self.on_event(session, message, level)
+
+    def start(self, device: LogicalDevice, settings: Dict) -> MirrorSession:
+        with self._lock:
+            existing = self._sessions.get(device.key)
+            if existing and existing.active:
+                return existing
+            session = MirrorSession(device, settings, self._on_session_event, self.on_output, self.list_serials)
+            self._sessions[device.key] = session
+        session.start()
+        return session
+
+    def get(self, key: str) -> Optional[MirrorSession]:
+        """The active session for a device, if any"""
+        with self._lock:
+            session = self._sessions.get(key)
+        return session if session and session.active else None
+
+    def active(self) -> List[MirrorSession]:
+        with self._lock:
+            return [s for s in self._sessions.values() if s.active]
+
+    def stop(self, key: str):
+        session = self.get(key)
+        if session:
+            session.stop()
+
+    def stop_all(self):
+        for session in self.active():
+            session.stop()
+
+    def resume(
+        self,
+        devices: List[LogicalDevice],
+        keys: List[str],
+        profiles: Dict[str, Dict],
+        default_settings: Dict,
+        max_concurrent: int = 4,
+    ) -> int:
+        """Relaunch sessions for the given device keys that are online
+
+        At most max_concurrent launches are in flight at once; a launch counts
+        until its first frame is shown. Returns the number of sessions that
+        showed one.
+        """
+        by_key = {device.key: device for device in devices}
+        targets = [by_key[key] for key in keys if key in by_key]
+
+        def launch(device) -> bool:
+            return self.start(device, profiles.get(device.key, default_settings)).wait_ready()
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrent)) as pool:
+            return sum(pool.map(launch, targets))
+
+    def update_devices(self, devices: List[LogicalDevice]):
+        """Track transport changes and move sessions back to USB when it returns"""
+        by_key = {device.key: device for device in devices}
+        for session in self.active():
+            device = by_key.get(session.device.key)
+            if device is None:
+                # A running session notices through scrcpy exiting; a paused one has nothing running
+                if session.state == PAUSED:
+                    session.fail_paused("Device disconnected while paused")
+                continue
+            session.device = device
+            if session.state == PAUSED and session.serial not in device.transports:
+                session.switch_to(device.preferred, f"Lost {transport_name(session.serial)} while paused, "
+                                                    f"will resume over {transport_name(device.preferred)}")
+                continue
+            # One switch at a time: refreshes can come in faster than scrcpy starts
+            if (session.serial and is_tcp(session.serial) and not is_tcp(device.preferred)
+                    and not session.switching):
+                threading.Thread(
+                    target=session.switch_to,
+                    args=(device.preferred, "USB available again, switching transport"),
+                    daemon=True
+                ).start()
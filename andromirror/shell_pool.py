@@ -0,0 +1,209 @@
+"""
+Persistent per-device `adb shell` channels
+
+Spawning `adb shell` for every query costs a process creation each time. A
+ShellChannel keeps one shell open per device and frames each command with a
+unique sentinel so its output and exit code can be picked out of the stream.
+"""
+
+import queue
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .adb import adb_command
+
+DEFAULT_TIMEOUT = 5.0
+
+
+class ShellError(Exception):
+    """Raised when a command cannot be run on a shell channel"""
+
+
+class ShellTimeout(ShellError):
+    """Raised when a command does not finish in time"""
+
+
+class _NotSent(ShellError):
+    """The command never reached the shell, so it is safe to send again"""
+
+
+class ShellChannel:
+    """A long-lived `adb shell` session for one device"""
+
+    def __init__(self, serial: str):
+        self.serial = serial
+        self._process: Optional[subprocess.Popen] = None
+        self._lines: Optional[queue.Queue] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def run(self, command: str, timeout: float = DEFAULT_TIMEOUT) -> Tuple[int, str]:
+        """Run a shell command and return (exit_code, output)"""
+        with self._lock:
+            if self._closed:
+                raise ShellError(f"Shell channel to {self.serial} is closed")
+            try:
+                return self._run_locked(command, timeout)
+            except _NotSent:
+                # The shell died before the command got to it: restart once and
+                # retry. A command that was sent is never repeated, it may not
+                # be safe to run twice.
+                self._stop_locked()
+                return self._run_locked(command, timeout)
+
+    def close(self):
+        """Stop the underlying adb shell; later commands raise ShellError"""
+        with self._lock:
+            self._closed = True
+            self._stop_locked()
+
+    def _run_locked(self, command: str, timeout: float) -> Tuple[int, str]:
+        if not self.alive:
+            self._start_locked()
+
+        sentinel = f"__andromirror_{uuid.uuid4().hex}__"
+        # Commands must not read the channel's stdin, or they would consume the
+        # next command; stderr is folded into the output like `adb shell` does
+        framed = f"( {command} ) </dev/null 2>&1; echo \"{sentinel} $?\"\n"
+        try:
+            self._process.stdin.write(framed)
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            raise _NotSent(f"Shell channel to {self.serial} is closed")
+
+        output = []
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                line = self._lines.get(timeout=max(0.0, remaining))
+            except queue.Empty:
+                # The command may still be running; the stream is out of sync
+                self._stop_locked()
+                raise ShellTimeout(f"Command timed out on {self.serial}: {command}")
+
+            if line is None:
+                raise ShellError(f"Shell channel to {self.serial} closed unexpectedly")
+
+            index = line.find(sentinel)
+            if index < 0:
+                output.append(line)
+                continue
+
+            # Output without a trailing newline ends up in front of the sentinel
+            if index > 0:
+                output.append(line[:index])
+            try:
+                exit_code = int(line[index + len(sentinel):].strip())
+            except ValueError:
+                exit_code = -1
+            return exit_code, "\n".join(output)
+
+    def _start_locked(self):
+        try:
+            process = subprocess.Popen(
+                adb_command("shell", serial=self.serial),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+            )
+        except FileNotFoundError:
+            raise ShellError("ADB not found. Please install Android SDK Platform Tools")
+        except OSError as e:
+            raise ShellError(f"Cannot start adb shell for {self.serial}: {str(e)}")
+
+        # Each process gets its own queue so a dying reader can't leak stale
+        # lines into the next channel
+        lines: queue.Queue = queue.Queue()
+        threading.Thread(target=_read_lines, args=(process, lines), daemon=True).start()
+        self._process = process
+        self._lines = lines
+
+    def _stop_locked(self):
+        process = self._process
+        self._process = None
+        self._lines = None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+
+def _read_lines(process: subprocess.Popen, lines: queue.Queue):
+    """Forward a shell's output lines to a queue, then None at EOF"""
+    try:
+        for line in process.stdout:
+            lines.put(line.rstrip("\r\n"))
+    except (OSError, ValueError):
+        pass
+    finally:
+        lines.put(None)
+        process.stdout.close()
+
+
+class ShellPool:
+    """One ShellChannel per online device, created on first use"""
+
+    def __init__(self, max_workers: int = 16):
+        self._channels: Dict[str, ShellChannel] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shell-pool")
+
+    def channel(self, serial: str) -> ShellChannel:
+        with self._lock:
+            channel = self._channels.get(serial)
+            if channel is None:
+                channel = self._channels[serial] = ShellChannel(serial)
+            return channel
+
+    def run(self, serial: str, command: str, timeout: float = DEFAULT_TIMEOUT) -> Tuple[int, str]:
+        """Run a command on one device and return (exit_code, output)"""
+        return self.channel(serial).run(command, timeout)
+
+    def run_all(
+        self, serials: List[str], command: str, timeout: float = DEFAULT_TIMEOUT
+    ) -> Dict[str, Tuple[int, str]]:
+        """Run a command on several devices concurrently
+
+        Devices whose command failed, for whatever reason, are left out of
+        the result; one broken device must not fail the others.
+        """
+        futures = {serial: self._executor.submit(self.run, serial, command, timeout) for serial in serials}
+        results = {}
+        for serial, future in futures.items():
+            try:
+                results[serial] = future.result()
+            except Exception:
+                pass
+        return results
+
+    def sync(self, serials: List[str]):
+        """Close channels of devices that are no longer online"""
+        with self._lock:
+            stale = [self._channels.pop(s) for s in list(self._channels) if s not in serials]
+        for channel in stale:
+            channel.close()
+
+    def close(self):
+        """Close every channel and stop the worker threads"""
+        with self._lock:
+            channels = list(self._channels.values())
+            self._channels.clear()
+        for channel in channels:
+            channel.close()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,329 @@
+"""
+Long-run soak test for resource leaks
+
+Drives thousands of refresh / connect / disconnect cycles against stand-in
+adb and scrcpy binaries and samples the process every few cycles: resident
+memory, threads, open file descriptors, zombie children and, when a Tk root
+is given, the number of pending `after` callbacks, plus the session log
+journals left open in the archive. After a warm-up (pools
+and caches fill up during the first cycles) the last samples are compared
+with the first; growth beyond DEFAULT_LIMITS fails the run.
+
+Headless, against MirrorService:
+
+    python -m andromirror.soak --cycles 2000 --report soak.jsonl
+
+Through the GUI (also watches the Tk after-queue):
+
+    python main.py --soak 2000 --soak-report soak.jsonl
+"""
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+DEFAULT_LIMITS = {
+    "rss_kb": 20 * 1024,
+    "threads": 4,
+    "fds": 8,
+    "zombies": 0,
+    "after_queue": 16,
+    "journals": 2,  # files in the log archive's open/ (a journal and its lock file per session)
+}
+SAMPLE_EVERY = 25  # cycles
+WARMUP_CYCLES = 50
+TAIL_SAMPLES = 3  # samples at the end whose median is compared with the baseline
+SETTLE_TIMEOUT = 5.0  # wait for session threads to wind down before a sample
+STAND_IN_DEVICES = ["soak-usb-1", "soak-usb-2", "10.0.0.2:5555"]
+
+# Minimal adb: lists the stand-in devices, runs "shell" on the host's sh and
+# accepts connect; enough for device refresh, shell channels and sessions.
+ADB_STAND_IN = '''#!{python}
+import os, sys, time
+args = sys.argv[1:]
+while args and args[0] in ("-H", "-P", "-s"):
+    args = args[2:]
+if args == ["devices"]:
+    print("List of devices attached")
+    for serial in {devices!r}:
+        print(serial + "\\tdevice")
+elif args[:1] == ["connect"]:
+    print("connected to " + args[1])
+elif args == ["shell"]:
+    os.execvp("sh", ["sh"])
+elif args == ["track-devices"]:
+    time.sleep(3600)
+'''
+
+# Minimal scrcpy: reports a first frame, then runs until terminated and,
+# like the real one, still prints while shutting down
+SCRCPY_STAND_IN = '''#!{python}
+import signal, sys, time
+def stop(*args):
+    print("INFO: Received SIGTERM, stopping", flush=True)
+    print("DEBUG: Server terminated", flush=True)
+    sys.exit(0)
+signal.signal(signal.SIGTERM, stop)
+print("INFO: Renderer: stand-in", flush=True)
+print("INFO: Texture: 1080x2400", flush=True)
+while True:
+    time.sleep(1)
+'''
+
+
+class ResourceSample(NamedTuple):
+    cycle: int
+    elapsed: float
+    rss_kb: int
+    threads: int
+    fds: int
+    zombies: int
+    after_queue: int  # -1 without a Tk root
+    journals: int
+
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # Elsewhere only the peak is available; it still shows steady growth
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _open_fds() -> int:
+    for path in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return -1
+
+
+def _zombie_children() -> int:
+    """Exited children nobody has waited for (Linux only, 0 elsewhere)"""
+    pid = str(os.getpid())
+    count = 0
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r", encoding="ascii", errors="replace") as fh:
+                # "pid (comm) state ppid ...": comm may contain spaces
+                fields = fh.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if fields[0] == "Z" and fields[1] == pid:
+            count += 1
+    return count
+
+
+def _open_journals() -> int:
+    """Files in the log archive's directory of unsealed journals"""
+    from .logarchive import JOURNAL_DIR, LOG_DIR
+    from .paths import config_dir
+
+    try:
+        return len(os.listdir(config_dir() / LOG_DIR / JOURNAL_DIR))
+    except OSError:
+        return 0
+
+
+def after_queue_length(root) -> int:
+    """Callbacks pending in Tk's `after` queue"""
+    return len(root.tk.splitlist(root.tk.call("after", "info")))
+
+
+class SoakMonitor:
+    """Collects resource samples and judges their growth"""
+
+    def __init__(self, limits: Optional[Dict] = None, warmup: int = WARMUP_CYCLES, report_path=None, root=None):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.warmup = warmup
+        self.report_path = report_path
+        self.root = root
+        self.samples: List[ResourceSample] = []
+        self.started = time.monotonic()
+
+    def sample(self, cycle: int) -> ResourceSample:
+        sample = ResourceSample(
+            cycle,
+            round(time.monotonic() - self.started, 3),
+            _rss_kb(),
+            threading.active_count(),
+            _open_fds(),
+            _zombie_children(),
+            after_queue_length(self.root) if self.root is not None else -1,
+            _open_journals(),
+        )
+        self.samples.append(sample)
+        if self.report_path:
+            with open(self.report_path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(sample._asdict()) + "\n")
+        return sample
+
+    def growth(self) -> Dict[str, float]:
+        """Median of the last samples minus the first sample after warm-up"""
+        measured = [s for s in self.samples if s.cycle >= self.warmup]
+        if len(measured) < 2:
+            return {}
+        baseline = measured[0]
+        tail = measured[-TAIL_SAMPLES:]
+        return {
+            name: statistics.median(getattr(s, name) for s in tail) - getattr(baseline, name)
+            for name in self.limits
+            if getattr(baseline, name) >= 0
+        }
+
+    def failures(self) -> List[str]:
+        """One message per resource that grew more than its limit"""
+        failures = [
+            f"{name} grew by {value:g} (limit {self.limits[name]:g})"
+            for name, value in self.growth().items()
+            if value > self.limits[name]
+        ]
+        # Zombies are a leak at any time, not only as growth
+        zombies = max((s.zombies for s in self.samples), default=0)
+        if zombies > self.limits["zombies"] and not any(f.startswith("zombies") for f in failures):
+            failures.append(f"{zombies} zombie process(es) seen")
+        return failures
+
+    def summary(self) -> str:
+        if not self.samples:
+            return "No samples taken"
+        first, last = self.samples[0], self.samples[-1]
+        lines = [f"{last.cycle} cycles in {last.elapsed:.0f} s"]
+        for name in DEFAULT_LIMITS:
+            if getattr(last, name) >= 0:
+                lines.append(f"  {name:<12}{getattr(first, name):>10} -> {getattr(last, name):<10}")
+        failures = self.failures()
+        lines.extend(f"FAIL: {failure}" for failure in failures)
+        lines.append("FAILED" if failures else "PASSED")
+        return "\n".join(lines)
+
+
+def _scratch_dir(prefix: str) -> str:
+    """A temporary directory removed when the process exits"""
+    directory = tempfile.mkdtemp(prefix=prefix)
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return directory
+
+
+def install_stand_ins(directory: Optional[str] = None) -> str:
+    """Write stand-in adb and scrcpy into directory and put it first on PATH
+
+    Without a directory, a temporary one is used and removed at exit.
+    """
+    directory = directory or _scratch_dir("andromirror-soak-")
+    for name, template in (("adb", ADB_STAND_IN), ("scrcpy", SCRCPY_STAND_IN)):
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(template.format(python=sys.executable, devices=STAND_IN_DEVICES))
+        os.chmod(path, 0o755)
+    os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+    return directory
+
+
+def prepare_environment(real_binaries: bool = False):
+    """Stand-in binaries on PATH and a scratch config directory for a soak run, both removed at exit"""
+    if not real_binaries:
+        install_stand_ins()
+    # Keep the user's config, profiles and log archive out of the run
+    os.environ["ANDROMIRROR_HOME"] = _scratch_dir("andromirror-soak-home-")
+
+
+def _settle(service):
+    """Wait until no session is starting or still winding down
+
+    That includes scrcpy printing its last lines and being reaped, and the
+    session's journal being sealed; a leak still shows after the timeout.
+    """
+    deadline = time.monotonic() + SETTLE_TIMEOUT
+    while ((service.list_sessions() or _zombie_children() or _open_journals())
+           and time.monotonic() < deadline):
+        time.sleep(0.05)
+
+
+def run_headless(service, monitor: SoakMonitor, cycles: int, sample_every: int = SAMPLE_EVERY):
+    """Refresh, connect and disconnect every device of the service, cycles times"""
+    from .config import DEFAULT_SETTINGS
+    from .service import ServiceError
+
+    for cycle in range(cycles + 1):
+        if cycle % sample_every == 0:
+            _settle(service)
+            monitor.sample(cycle)
+        if cycle == cycles:
+            break
+        try:
+            service.connect_wireless(STAND_IN_DEVICES[-1])
+            devices = service.refresh_devices()
+            device = devices[cycle % len(devices)]
+            service.start_session(device["key"], dict(DEFAULT_SETTINGS))
+            session = service.sessions.get(device["key"])
+            if session:
+                session.wait_ready()
+            service.stop_session(device["key"])
+        except (ServiceError, IndexError) as e:
+            print(f"Cycle {cycle}: {str(e)}", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m andromirror.soak", description="Soak test for resource leaks")
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--sample-every", type=int, default=SAMPLE_EVERY, metavar="N")
+    parser.add_argument("--warmup", type=int, default=WARMUP_CYCLES, metavar="N", help="cycles before the baseline")
+    parser.add_argument("--report", metavar="FILE", help="append samples to FILE as JSON lines")
+    parser.add_argument("--real-binaries", action="store_true", help="use adb and scrcpy from PATH")
+    add_limit_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def add_limit_arguments(parser, prefix: str = "--max-"):
+    """One option per limit, e.g. --max-rss-kb; read back with limits_from_args()"""
+    for name, limit in DEFAULT_LIMITS.items():
+        parser.add_argument(f"{prefix}{name.replace('_', '-')}", type=int, default=limit, dest=f"max_{name}",
+                            metavar="N", help=f"allowed {name} growth (default: {limit})")
+
+
+def limits_from_args(args) -> Dict:
+    return {name: getattr(args, f"max_{name}") for name in DEFAULT_LIMITS}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    prepare_environment(args.real_binaries)
+
+    from .service import MirrorService
+    service = MirrorService()
+    service.configure_thermal({"enabled": False})
+    monitor = SoakMonitor(limits_from_args(args), args.warmup, args.report)
+    try:
+        run_headless(service, monitor, args.cycles, args.sample_every)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    print(monitor.summary())
+    return 1 if monitor.failures() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Thermal- and battery-aware throttling of mirroring sessions
+
+ThermalMonitor samples battery temperature, charge and the Android thermal
+status of every mirrored device at a low rate. A device that gets hot (or
+runs low on battery while unplugged from power) is relaunched with a lower
+frame rate and bitrate; one that gets too hot is paused. Sessions return to
+their own settings once the device has cooled down by a margin, so a device
+hovering around a threshold does not flap.
+"""
+
+import re
+import threading
+from typing import Dict, NamedTuple, Optional
+
+from . import metrics
+from .config import DEFAULT_THERMAL
+from .sessions import PAUSED, RUNNING, MirrorSession, SessionManager
+from .shell_pool import ShellPool
+
+SAMPLE_INTERVAL = 30.0  # seconds between samples
+SAMPLE_TIMEOUT = 10.0
+SAMPLE_COMMAND = "dumpsys battery; dumpsys thermalservice 2>/dev/null | grep -m 1 'Thermal Status'"
+
+NORMAL = "normal"
+THROTTLED = "throttled"
+
+BITRATE_UNITS = {"K": 1000, "M": 1000 * 1000}
+BATTERY_FIELD = re.compile(r"^\s*(level|temperature|AC powered|USB powered|Wireless powered):\s*(\S+)", re.M)
+THERMAL_STATUS = re.compile(r"Thermal Status:\s*(\d+)")
+
+
+class DeviceReading(NamedTuple):
+    temperature: float  # battery temperature, °C
+    battery: int  # percent
+    charging: bool
+    thermal_status: int  # 0 (none) to 6 (shutdown); 0 if the device doesn't report it
+
+
+def parse_reading(output: str) -> Optional[DeviceReading]:
+    """Read `dumpsys battery` and the thermal status line; None if unusable"""
+    fields = dict(BATTERY_FIELD.findall(output))
+    try:
+        temperature = int(fields["temperature"]) / 10  # reported in tenths of a degree
+        battery = int(fields["level"])
+    except (KeyError, ValueError):
+        return None
+    charging = any(fields.get(name) == "true" for name in ("AC powered", "USB powered", "Wireless powered"))
+    status = THERMAL_STATUS.search(output)
+    return DeviceReading(temperature, battery, charging, int(status.group(1)) if status else 0)
+
+
+def target_level(current: str, reading: DeviceReading, limits: Dict) -> str:
+    """The level a session should be at, with hysteresis on the way back down"""
+    margin = limits["recover_margin"]
+    if reading.temperature >= limits["pause_temp"] or reading.thermal_status >= limits["pause_status"]:
+        return PAUSED
+    if current == PAUSED and reading.temperature > limits["pause_temp"] - margin:
+        return PAUSED
+    low_battery = reading.battery <= limits["low_battery"] and not reading.charging
+    if (reading.temperature >= limits["throttle_temp"] or reading.thermal_status >= limits["throttle_status"]
+            or low_battery):
+        return THROTTLED
+    if current != NORMAL and reading.temperature > limits["throttle_temp"] - margin:
+        return THROTTLED
+    return NORMAL
+
+
+def _bitrate(value: str) -> float:
+    unit = BITRATE_UNITS.get(value[-1:].upper())
+    return float(value[:-1]) * unit if unit else float(value)
+
+
+def throttled_settings(settings: Dict, limits: Dict) -> Dict:
+    """Settings with fps and bitrate capped at the throttle limits"""
+    reduced = dict(settings)
+    reduced["fps"] = str(min(int(settings["fps"]), int(limits["throttle_fps"])))
+    if _bitrate(limits["throttle_bitrate"]) < _bitrate(settings["bitrate"]):
+        reduced["bitrate"] = limits["throttle_bitrate"]
+    return reduced
+
+
+def describe(reading: DeviceReading) -> str:
+    text = f"{reading.temperature:.1f} °C, battery {reading.battery}%"
+    if reading.thermal_status:
+        text += f", thermal status {reading.thermal_status}"
+    return text
+
+
+class ThermalMonitor:
+    """Samples mirrored devices and throttles, pauses or restores their sessions"""
+
+    def __init__(self, shell_pool: ShellPool, sessions: SessionManager, interval: float = SAMPLE_INTERVAL):
+        self.shell_pool = shell_pool
+        self.sessions = sessions
+        self.interval = interval
+        self.limits = dict(DEFAULT_THERMAL)
+        # session -> (level, the settings it was started with)
+        self._levels: Dict[MirrorSession, tuple] = {}
+        self._lock = threading.Lock()
+        self._stop: Optional[threading.Event] = None
+
+    def configure(self, limits: Dict):
+        """Apply new thresholds; start or stop sampling to match limits["enabled"]"""
+        with self._lock:
+            self.limits = dict(DEFAULT_THERMAL, **limits)
+            enabled = self.limits["enabled"]
+            if enabled and self._stop is None:
+                self._stop = threading.Event()
+                threading.Thread(target=self._loop, args=(self._stop,), daemon=True).start()
+            elif not enabled and self._stop is not None:
+                self._stop.set()
+                self._stop = None
+        if not enabled:
+            self.restore_all("Device protection turned off, restoring settings")
+
+    def stop(self):
+        with self._lock:
+            if self._stop is not None:
+                self._stop.set()
+                self._stop = None
+
+    def _loop(self, stop: threading.Event):
+        while not stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """Sample every running or paused session once"""
+        sessions = [s for s in self.sessions.active() if s.serial and s.state in (RUNNING, PAUSED)]
+        with self._lock:
+            # Forget sessions that ended
+            for session in list(self._levels):
+                if session not in sessions:
+                    del self._levels[session]
+        if not sessions:
+            return
+
+        replies = self.shell_pool.run_all([s.serial for s in sessions], SAMPLE_COMMAND, timeout=SAMPLE_TIMEOUT)
+        for session in sessions:
+            exit_code, output = replies.get(session.serial, (1, ""))
+            reading = parse_reading(output) if exit_code == 0 else None
+            if reading:
+                self._apply(session, reading)
+
+    def _apply(self, session: MirrorSession, reading: DeviceReading):
+        with self._lock:
+            current, original = self._levels.get(session, (NORMAL, session.settings))
+            target = target_level(current, reading, self.limits)
+            if target == current:
+                return
+            limits = dict(self.limits)
+            if target == NORMAL:
+                del self._levels[session]
+            else:
+                self._levels[session] = (target, original)
+
+        metrics.SESSION_THROTTLES.inc(action=target)
+        if target == PAUSED:
+            session.pause(f"Device at {describe(reading)}, pausing until it cools down")
+        elif target == THROTTLED:
+            settings = throttled_settings(original, limits)
+            session.throttled = True
+            action = "resuming at" if current == PAUSED else "lowering to"
+            session.restart(
+                settings,
+                f"Device at {describe(reading)}, {action} {settings['fps']} fps / {settings['bitrate']}",
+                level="warning"
+            )
+        else:
+            session.throttled = False
+            session.restart(original, f"Device back within limits ({describe(reading)}), restoring settings")
+
+    def restore_all(self, reason: str):
+        """Return every throttled or paused session to its own settings"""
+        with self._lock:
+            levels, self._levels = self._levels, {}
+        for session, (_, original) in levels.items():
+            session.throttled = False
+            session.restart(original, reason)
@@ -0,0 +1,163 @@
+"""
+Virtual display sessions
+
+With display_mode "virtual" scrcpy creates a new display on the device
+(`--new-display=WxH/dpi`) instead of mirroring the physical panel, so the
+device only renders and encodes what the host shows. The "window" size
+matches the host window showing it. A new session's window doesn't exist
+yet, so it gets the whole screen, or a tile of it when several sessions
+share the screen. scrcpy opens its window at the display's size, so the
+window and the display start out equal. After the user resizes the window,
+applying settings again sizes the new display to the window as it is then
+(see MirrorSession.window_size). Sizes and densities are checked against
+what the device reports before scrcpy is started.
+"""
+
+import math
+import re
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from .adb import shell_quote
+from .shell_pool import ShellError, ShellPool
+
+MIRROR = "mirror"
+VIRTUAL = "virtual"
+WINDOW_SIZE = "window"  # size the display to the host window or tile
+AUTO_DPI = "auto"
+
+# Offered in the Settings tab next to "window"
+SIZE_PRESETS = ["1280x720", "1920x1080", "720x1280", "1080x1920"]
+DPI_PRESETS = ["120", "160", "240", "320", "480"]
+
+MIN_SDK = 29  # Android 10: first version that launches apps on secondary displays
+MIN_DIMENSION = 240
+MAX_DIMENSION = 4096  # widest size hardware H.264/H.265 encoders commonly accept
+MAX_PIXELS = 4096 * 2160
+MIN_DPI = 72
+MAX_DPI = 800
+SIZE_ALIGN = 8  # encoders want dimensions in multiples of 8
+FALLBACK_MAX = 1920  # "window" size when no host screen size is known (CLI)
+
+# Room left on the host for window decorations
+FRAME_WIDTH = 16
+FRAME_HEIGHT = 64
+
+CAPABILITY_COMMAND = "getprop ro.build.version.sdk; wm size; wm density"
+SIZE_PATTERN = re.compile(r"^(\d+)x(\d+)$")
+
+
+class DisplayError(Exception):
+    """A virtual display cannot be created with the requested settings"""
+
+
+class DisplayCapabilities(NamedTuple):
+    sdk: int
+    width: int  # physical panel, in its natural orientation
+    height: int
+    density: int
+
+
+def parse_size(value: str) -> Tuple[int, int]:
+    match = SIZE_PATTERN.match(value.strip())
+    if not match:
+        raise DisplayError(f"Invalid display size {value!r}, expected WIDTHxHEIGHT")
+    return int(match.group(1)), int(match.group(2))
+
+
+def _align(value: int) -> int:
+    return max(SIZE_ALIGN, value - value % SIZE_ALIGN)
+
+
+def tile_size(screen_width: int, screen_height: int, tiles: int = 1) -> str:
+    """Size of one tile when the host screen is split into a near-square grid"""
+    columns = math.ceil(math.sqrt(max(1, tiles)))
+    rows = math.ceil(max(1, tiles) / columns)
+    width = screen_width // columns - FRAME_WIDTH
+    height = screen_height // rows - FRAME_HEIGHT
+    return f"{_align(width)}x{_align(height)}"
+
+
+def window_display_size(width: int, height: int) -> str:
+    """Display size for a host window with the given client area"""
+    return f"{_align(width)}x{_align(height)}"
+
+
+def query_capabilities(shell_pool: ShellPool, serial: str) -> DisplayCapabilities:
+    """Android version, panel size and density reported by the device"""
+    try:
+        exit_code, output = shell_pool.run(serial, CAPABILITY_COMMAND, timeout=10)
+    except ShellError as e:
+        raise DisplayError(f"Cannot read display capabilities of {serial}: {str(e)}")
+
+    lines = output.splitlines()
+    try:
+        sdk = int(lines[0].strip())
+    except (IndexError, ValueError):
+        raise DisplayError(f"Cannot read the Android version of {serial}")
+    # "Override size" and "Override density" come after the physical values
+    size = re.search(r"Physical size:\s*(\d+)x(\d+)", output)
+    density = re.search(r"Physical density:\s*(\d+)", output)
+    if not size or not density:
+        raise DisplayError(f"Cannot read the screen size of {serial}")
+    return DisplayCapabilities(sdk, int(size.group(1)), int(size.group(2)), int(density.group(1)))
+
+
+def resolve_display(settings: Dict, caps: DisplayCapabilities) -> Dict:
+    """Check a virtual display request and fill in its size and dpi
+
+    Returns settings with "virtual_size" as WxH (aligned) and "virtual_dpi"
+    as a number. Raises DisplayError with a message for the user.
+    """
+    if caps.sdk < MIN_SDK:
+        raise DisplayError(f"Virtual displays need Android 10 or newer (device has API level {caps.sdk})")
+
+    size = settings.get("virtual_size") or WINDOW_SIZE
+    if size == WINDOW_SIZE:
+        # No host window size was given: use the panel size, scaled to a sensible maximum
+        scale = min(1.0, FALLBACK_MAX / max(caps.width, caps.height))
+        width, height = int(caps.width * scale), int(caps.height * scale)
+    else:
+        width, height = parse_size(size)
+    width, height = _align(width), _align(height)
+
+    if min(width, height) < MIN_DIMENSION:
+        raise DisplayError(f"Virtual display {width}x{height} is too small (minimum {MIN_DIMENSION} px per side)")
+    if max(width, height) > MAX_DIMENSION or width * height > MAX_PIXELS:
+        raise DisplayError(f"Virtual display {width}x{height} is larger than the video encoder supports "
+                           f"(at most {MAX_DIMENSION} px per side and 4096x2160 in total)")
+
+    dpi = settings.get("virtual_dpi") or AUTO_DPI
+    if dpi == AUTO_DPI:
+        # Keep layouts at the panel's proportions: scale density with the shorter side
+        dpi = round(caps.density * min(width, height) / min(caps.width, caps.height))
+        dpi = max(MIN_DPI, min(caps.density, dpi))
+    else:
+        try:
+            dpi = int(dpi)
+        except ValueError:
+            raise DisplayError(f"Invalid display density {dpi!r}")
+        if not MIN_DPI <= dpi <= MAX_DPI:
+            raise DisplayError(f"Display density {dpi} is outside {MIN_DPI}-{MAX_DPI} dpi")
+
+    resolved = dict(settings)
+    resolved["virtual_size"] = f"{width}x{height}"
+    resolved["virtual_dpi"] = str(dpi)
+    return resolved
+
+
+def check_start_app(shell_pool: ShellPool, serial: str, app: str) -> Optional[str]:
+    """Error message if the package to start is not installed, else None
+
+    "+pkg" (force-stop first) is checked like "pkg"; "?name" searches by app
+    name on the device and cannot be checked in advance.
+    """
+    package = app.lstrip("+")
+    if not package or package.startswith("?"):
+        return None
+    try:
+        exit_code, output = shell_pool.run(serial, f"pm path {shell_quote(package)}", timeout=10)
+    except ShellError:
+        return None  # let scrcpy report it
+    if exit_code != 0 or "package:" not in output:
+        return f"App {package} is not installed on {serial}"
+    return None
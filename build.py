@@ -9,6 +9,10 @@ import sys
 import subprocess
 import shutil
 import platform
+import argparse
+import statistics
+import time
+from functools import partial
 from pathlib import Path
 
 def run_command(cmd, description=""):
@@ -60,9 +64,28 @@ def clean_build_dirs():
         spec_file.unlink()
         print(f"Removed: {spec_file}")
 
-def build_executable():
+# Build modes:
+#   onefile - single self-extracting binary (unpacks to a temp dir on every launch)
+#   fast    - onedir layout with optimized bytecode and unused modules left out
+BUILD_MODES = ["onefile", "fast"]
+
+# Standard library modules AndroMirror never imports
+FAST_EXCLUDES = [
+    "unittest", "doctest", "pydoc", "pdb", "lib2to3", "test", "tkinter.test",
+    "distutils", "setuptools", "pip", "xmlrpc", "sqlite3", "ftplib", "curses",
+]
+
+def exe_path(mode="onefile"):
+    """Path of the executable produced by a build mode"""
+    system = platform.system().lower()
+    exe_name = "AndroMirror.exe" if system == "windows" else "AndroMirror"
+    if mode == "fast":
+        return Path("dist") / "fast" / "AndroMirror" / exe_name
+    return Path("dist") / exe_name
+
+def build_executable(mode="onefile"):
     """Build the executable using PyInstaller"""
-    print("🔨 Building executable...")
+    print(f"🔨 Building executable ({mode})...")
     
     # Determine platform-specific settings
     system = platform.system().lower()
@@ -81,44 +104,57 @@ def build_executable():
     # PyInstaller command
     cmd = [
         sys.executable, "-m", "PyInstaller",
-        "--onefile",                    # Create a single executable file
         "--windowed",                   # Don't show console window
         "--name", "AndroMirror",        # Executable name
         "--clean",                      # Clean PyInstaller cache
         "--noconfirm",                  # Don't ask for confirmation
-        # "--optimize", "2",            # Python optimization level
-        # "--strip",                    # Strip debug symbols (Linux/macOS)
     ]
     
+    if mode == "fast":
+        cmd.extend([
+            "--onedir",                     # No unpacking to a temp dir at launch
+            "--optimize", "2",              # Python optimization level (PyInstaller 6+)
+            "--distpath", str(Path("dist") / "fast"),
+            "--workpath", str(Path("build") / "fast"),
+        ])
+        if system != "windows":
+            cmd.append("--strip")           # Strip debug symbols (Linux/macOS)
+        for module in FAST_EXCLUDES:
+            cmd.extend(["--exclude-module", module])
+    else:
+        cmd.append("--onefile")             # Create a single executable file
+    
     # Add icon if available
     cmd.extend(icon_flag)
     
     # Add hidden imports for CustomTkinter
-    hidden_imports = [
-        "--hidden-import", "customtkinter",
-        "--hidden-import", "tkinter",
-        "--hidden-import", "PIL",
-        "--hidden-import", "PIL._tkinter_finder",
-    ]
+    if mode == "fast":
+        # Everything else is found by import analysis; only PIL's Tk glue is
+        # loaded dynamically
+        hidden_imports = ["--hidden-import", "PIL._tkinter_finder"]
+    else:
+        hidden_imports = [
+            "--hidden-import", "customtkinter",
+            "--hidden-import", "tkinter",
+            "--hidden-import", "PIL",
+            "--hidden-import", "PIL._tkinter_finder",
+        ]
     cmd.extend(hidden_imports)
     
     # Add the main script
     cmd.append("main.py")
     
     # Run PyInstaller
-    result = run_command(cmd, "Building executable with PyInstaller")
+    result = run_command(cmd, f"Building {mode} executable with PyInstaller")
     
     if result:
         print("✅ Build completed successfully!")
         
         # Check if executable was created
-        exe_path = Path("dist") / "AndroMirror"
-        if system == "windows":
-            exe_path = exe_path.with_suffix(".exe")
-        
-        if exe_path.exists():
-            print(f"📦 Executable created: {exe_path}")
-            print(f"📊 File size: {exe_path.stat().st_size / (1024*1024):.1f} MB")
+        path = exe_path(mode)
+        if path.exists():
+            print(f"📦 Executable created: {path}")
+            print(f"📊 Size: {dir_size(path.parent if mode == 'fast' else path) / (1024*1024):.1f} MB")
             return True
         else:
             print("❌ Executable not found in expected location")
@@ -127,9 +163,16 @@ def build_executable():
         print("❌ Build failed")
         return False
 
-def create_portable_package():
+def dir_size(path):
+    """Size of a file, or of all files below a directory"""
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+def create_portable_package(mode="onefile"):
     """Create a portable package with executable and documentation"""
-    print("📦 Creating portable package...")
+    print(f"📦 Creating portable package ({mode})...")
     
     # Create package directory
     package_dir = Path("AndroMirror_Portable")
@@ -141,11 +184,16 @@ def create_portable_package():
     # Copy executable
     system = platform.system().lower()
     exe_name = "AndroMirror.exe" if system == "windows" else "AndroMirror"
-    exe_source = Path("dist") / exe_name
-    exe_dest = package_dir / exe_name
+    exe_source = exe_path(mode)
     
-    if exe_source.exists():
-        shutil.copy2(exe_source, exe_dest)
+    if mode == "fast":
+        # The onedir build is a folder with the executable inside
+        exe_name = f"AndroMirror/{exe_name}"
+        if exe_source.exists():
+            shutil.copytree(exe_source.parent, package_dir / "AndroMirror")
+            print("Copied: AndroMirror/")
+    elif exe_source.exists():
+        shutil.copy2(exe_source, package_dir / exe_name)
         print(f"Copied: {exe_name}")
     
     # Copy documentation
@@ -158,10 +206,10 @@ def create_portable_package():
     # Create run script for easier execution
     if system == "windows":
         run_script = package_dir / "run.bat"
-        run_script.write_text("@echo off\nAndroMirror.exe\npause")
+        run_script.write_text(f"@echo off\n{exe_name.replace('/', chr(92))}\npause")
     else:
         run_script = package_dir / "run.sh"
-        run_script.write_text("#!/bin/bash\n./AndroMirror\n")
+        run_script.write_text(f"#!/bin/bash\n./{exe_name}\n")
         os.chmod(run_script, 0o755)
     
     print(f"Created run script: {run_script.name}")
@@ -169,40 +217,93 @@ def create_portable_package():
     print(f"✅ Portable package created: {package_dir}")
     return True
 
-def test_executable():
-    """Test the built executable"""
-    print("🧪 Testing executable...")
+BENCHMARK_RUNS = 5
+BENCHMARK_TIMEOUT = 60
+
+def test_executable(mode="onefile", runs=BENCHMARK_RUNS):
+    """Test the built executable and measure launch-to-first-paint time
     
-    system = platform.system().lower()
-    exe_name = "AndroMirror.exe" if system == "windows" else "AndroMirror"
-    exe_path = Path("dist") / exe_name
+    The app is started with --startup-benchmark, which makes it write the
+    wall-clock time of its first paint to a file and exit. The first run is
+    reported separately as it pays the cold-cache cost.
+    """
+    print(f"🧪 Testing executable ({mode})...")
     
-    if not exe_path.exists():
+    path = exe_path(mode)
+    if not path.exists():
         print("❌ Executable not found for testing")
         return False
     
-    # Test if executable can start (quick test)
-    try:
-        # On Windows and Linux, we can test basic execution
-        # On macOS, this might require additional handling
-        if system != "darwin":
-            result = subprocess.run([str(exe_path), "--help"], 
-                                 capture_output=True, text=True, timeout=5)
-            # If it doesn't crash immediately, it's probably working
-            print("✅ Executable appears to be working")
-            return True
-        else:
-            print("ℹ️  Manual testing required on macOS")
-            return True
-    except subprocess.TimeoutExpired:
-        print("✅ Executable started (timeout expected for GUI app)")
-        return True
-    except Exception as e:
-        print(f"❌ Executable test failed: {e}")
-        return False
+    timings = []
+    marker = Path("build") / f"first_paint_{mode}.txt"
+    marker.parent.mkdir(exist_ok=True)
+    for run in range(runs):
+        if marker.exists():
+            marker.unlink()
+        try:
+            started = time.time()
+            subprocess.run([str(path.resolve()), "--startup-benchmark", str(marker.resolve())],
+                           capture_output=True, timeout=BENCHMARK_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            print(f"❌ Run {run + 1}: no first paint within {BENCHMARK_TIMEOUT}s")
+            return False
+        except Exception as e:
+            print(f"❌ Executable test failed: {e}")
+            return False
+        
+        if not marker.exists():
+            print(f"❌ Run {run + 1}: executable exited without painting a window")
+            return False
+        timings.append(float(marker.read_text().strip()) - started)
+        print(f"   Run {run + 1}: first paint after {timings[-1] * 1000:.0f} ms")
+    
+    BENCHMARK_RESULTS[mode] = timings
+    print(f"✅ Executable working: first launch {timings[0] * 1000:.0f} ms, "
+          f"warm median {warm_median(timings) * 1000:.0f} ms")
+    return True
+
+def warm_median(timings):
+    """Median without the cold first run (the only run if there is just one)"""
+    return statistics.median(timings[1:] or timings)
+
+# Startup timings per build mode, filled in by test_executable
+BENCHMARK_RESULTS = {}
+
+def fastest_mode():
+    """Build mode with the lowest warm median launch-to-first-paint time"""
+    if not BENCHMARK_RESULTS:
+        return None
+    return min(BENCHMARK_RESULTS, key=lambda mode: warm_median(BENCHMARK_RESULTS[mode]))
+
+def print_benchmark_summary():
+    """Compare startup times of all benchmarked build modes"""
+    print("\n⏱️  Launch-to-first-paint:")
+    for mode, timings in BENCHMARK_RESULTS.items():
+        print(f"   {mode:<8} first {timings[0] * 1000:7.0f} ms   warm median {warm_median(timings) * 1000:7.0f} ms")
+    print(f"   Fastest: {fastest_mode()}")
+    return True
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Build AndroMirror executables with PyInstaller")
+    parser.add_argument(
+        "--mode",
+        choices=BUILD_MODES + ["all"],
+        default="onefile",
+        help="onefile (single binary), fast (onedir, optimized) or all (build both, "
+             "benchmark them and package the fastest)"
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=BENCHMARK_RUNS,
+        help=f"startup benchmark runs per build mode (default: {BENCHMARK_RUNS})"
+    )
+    return parser.parse_args()
 
 def main():
     """Main build process"""
+    args = parse_args()
     print("🚀 AndroMirror Build Script")
     print("=" * 50)
     
@@ -211,14 +312,19 @@ def main():
         print("❌ main.py not found in current directory")
         sys.exit(1)
     
+    modes = BUILD_MODES if args.mode == "all" else [args.mode]
+    
     # Build steps
     steps = [
         ("Installing dependencies", install_dependencies),
         ("Cleaning build directories", clean_build_dirs),
-        ("Building executable", build_executable),
-        ("Testing executable", test_executable),
-        ("Creating portable package", create_portable_package),
     ]
+    for mode in modes:
+        steps.append((f"Building executable ({mode})", partial(build_executable, mode)))
+        steps.append((f"Testing executable ({mode})", partial(test_executable, mode, args.runs)))
+    if len(modes) > 1:
+        steps.append(("Comparing startup times", print_benchmark_summary))
+    steps.append(("Creating portable package", lambda: create_portable_package(fastest_mode() or modes[0])))
     
     for step_name, step_func in steps:
         print(f"\n🔄 {step_name}...")
@@ -236,7 +342,8 @@ def main():
     else:
         print("\n🎉 Build completed successfully!")
         print("\nFiles created:")
-        print("- dist/AndroMirror(.exe) - Main executable")
+        for mode in modes:
+            print(f"- {exe_path(mode)} - Main executable ({mode})")
         print("- AndroMirror_Portable/ - Portable package")
         
         # Show next steps
@@ -6,21 +6,60 @@ Modern GUI frontend for scrcpy with Android device mirroring capabilities
 
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import messagebox, ttk
-import subprocess
+from tkinter import messagebox, filedialog
 import threading
 import time
 import sys
 import os
 import webbrowser
-from typing import List, Dict, Optional
+import argparse
+
+from andromirror.deploy import DeployJob, INSTALL, PUSH, DEFAULT_REMOTE_DIR, format_summary
+from andromirror.link_probe import LinkProbeCache, LinkProbeResult
+from andromirror.adb import split_serial
+from andromirror.devices import LogicalDevice, is_tcp
+from andromirror.service import MirrorService, ServiceError
+from andromirror.daemon import connect_or_spawn, daemon_supported, run_daemon
+from andromirror.config import ConfigStore, DEFAULT_SETTINGS, DEFAULT_THERMAL, remember_endpoint
+from andromirror.paths import config_dir
+from andromirror.virtual_display import DPI_PRESETS, SIZE_PRESETS, VIRTUAL, WINDOW_SIZE, tile_size
+from andromirror.soak import (
+    SAMPLE_EVERY as SOAK_SAMPLE_EVERY, SoakMonitor, add_limit_arguments as add_soak_limit_arguments,
+    limits_from_args as soak_limits_from_args, prepare_environment as prepare_soak
+)
+from andromirror.diagnostics import (
+    STALL_THRESHOLD_MS, StallDetector, UIProfiler, install_callback_timing, setup_logging
+)
 
 # Set appearance mode and color theme
 ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
 ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
 
+LIST_FONT = ("SF Pro Display", 11) if sys.platform == "darwin" else ("Segoe UI", 10)
+
+PROFILE_SECONDS = 10
+
+# Time windows offered by the log search, in seconds
+LOG_WINDOWS = {"Last hour": 3600, "Last 24 hours": 86400, "Last 7 days": 7 * 86400, "All": None}
+LOG_LEVELS = {"All": None, "Warnings": "warn", "Errors": "error"}
+
+# Soak mode (--soak): poll interval and the longest a step may take
+SOAK_POLL_MS = 20
+SOAK_STEP_TIMEOUT = 20.0
+
 class AndroMirrorApp:
-    def __init__(self):
+    def __init__(self, debug=False, stall_threshold_ms=STALL_THRESHOLD_MS, startup_benchmark=None, use_daemon=True,
+                 soak_cycles=0, soak_report=None, soak_limits=None):
+        # Time Tk callbacks from the start so slow ones can be blamed for stalls
+        self.debug = debug
+        self.startup_benchmark = startup_benchmark
+        self.soak_cycles = soak_cycles
+        self.soak_report = soak_report
+        self.soak_limits = soak_limits
+        self.soak_failed = False
+        if debug:
+            install_callback_timing()
+            
         self.root = ctk.CTk()
         self.root.title("AndroMirror by Juan v1.0")
         self.root.geometry("1000x700")
@@ -29,23 +68,100 @@ class AndroMirrorApp:
         # Variables
         self.devices = []
         self.selected_device = None
-        self.scrcpy_process = None
+        self.deploy_job = None
+        self.last_deploy = None
+        self.deploy_progress = {}
+        self.session_infos = {}  # device key -> session summary from the service
+        self.active_sessions = []
+        self.config_store = ConfigStore()
+        self.config = None  # loaded in the background after the first paint
+        self.save_pending = False
+        self.closing = False
+        self.link_cache = LinkProbeCache()
+        # Sessions live in the daemon when it is available, so they survive
+        # closing the window; otherwise they run in this process
+        self.use_daemon = use_daemon and daemon_supported() and not startup_benchmark and not soak_cycles
+        self.service = None  # connected in the background after the first paint
         
         # Settings variables
-        self.resolution = ctk.StringVar(value="HD (720p)")
-        self.fps = ctk.StringVar(value="60")
-        self.video_codec = ctk.StringVar(value="h264")
-        self.bitrate = ctk.StringVar(value="8M")
-        self.audio_enabled = ctk.BooleanVar(value=True)
-        self.audio_quality = ctk.StringVar(value="Medium")
-        self.stay_awake = ctk.BooleanVar(value=True)
-        self.screen_off = ctk.BooleanVar(value=False)
-        self.keyboard_mode = ctk.StringVar(value="uhid")
-        self.mouse_mode = ctk.StringVar(value="uhid")
+        self.resolution = ctk.StringVar(value=DEFAULT_SETTINGS["resolution"])
+        self.fps = ctk.StringVar(value=DEFAULT_SETTINGS["fps"])
+        self.video_codec = ctk.StringVar(value=DEFAULT_SETTINGS["video_codec"])
+        self.bitrate = ctk.StringVar(value=DEFAULT_SETTINGS["bitrate"])
+        self.audio_enabled = ctk.BooleanVar(value=DEFAULT_SETTINGS["audio_enabled"])
+        self.audio_quality = ctk.StringVar(value=DEFAULT_SETTINGS["audio_quality"])
+        self.stay_awake = ctk.BooleanVar(value=DEFAULT_SETTINGS["stay_awake"])
+        self.screen_off = ctk.BooleanVar(value=DEFAULT_SETTINGS["screen_off"])
+        self.keyboard_mode = ctk.StringVar(value=DEFAULT_SETTINGS["keyboard_mode"])
+        self.mouse_mode = ctk.StringVar(value=DEFAULT_SETTINGS["mouse_mode"])
+        self.display_mode = ctk.StringVar(value=DEFAULT_SETTINGS["display_mode"])
+        self.virtual_size = ctk.StringVar(value=DEFAULT_SETTINGS["virtual_size"])
+        self.virtual_dpi = ctk.StringVar(value=DEFAULT_SETTINGS["virtual_dpi"])
+        self.start_app = ctk.StringVar(value=DEFAULT_SETTINGS["start_app"])
         self.theme_mode = ctk.StringVar(value="System")
+        self.setting_vars = {
+            "resolution": self.resolution,
+            "fps": self.fps,
+            "video_codec": self.video_codec,
+            "bitrate": self.bitrate,
+            "audio_enabled": self.audio_enabled,
+            "audio_quality": self.audio_quality,
+            "stay_awake": self.stay_awake,
+            "screen_off": self.screen_off,
+            "keyboard_mode": self.keyboard_mode,
+            "mouse_mode": self.mouse_mode,
+            "display_mode": self.display_mode,
+            "virtual_size": self.virtual_size,
+            "virtual_dpi": self.virtual_dpi,
+            "start_app": self.start_app,
+        }
+        
+        # Startup variables
+        self.resume_on_start = ctk.BooleanVar(value=False)
+        self.max_launches = ctk.StringVar(value="4")
+        self.metrics_enabled = ctk.BooleanVar(value=False)
+        
+        # Device protection variables
+        self.thermal_enabled = ctk.BooleanVar(value=DEFAULT_THERMAL["enabled"])
+        self.throttle_temp = ctk.StringVar(value=f"{DEFAULT_THERMAL['throttle_temp']:g}")
+        self.pause_temp = ctk.StringVar(value=f"{DEFAULT_THERMAL['pause_temp']:g}")
+        
+        # Deploy variables
+        self.deploy_workers = ctk.StringVar(value="4")
+        self.deploy_streamed = ctk.BooleanVar(value=True)
         
         self.setup_ui()
-        self.refresh_devices()
+        
+        # Persist changes once the config has been loaded
+        for var in list(self.setting_vars.values()) + [self.theme_mode, self.resume_on_start, self.max_launches, self.metrics_enabled]:
+            var.trace_add("write", lambda *args: self.schedule_save())
+        for var in (self.thermal_enabled, self.throttle_temp, self.pause_temp):
+            var.trace_add("write", lambda *args: self.apply_thermal())
+        threading.Thread(target=self.start_service, daemon=True).start()
+        
+        if debug:
+            self.setup_debug_mode(stall_threshold_ms)
+            
+    def setup_debug_mode(self, stall_threshold_ms):
+        """Start the stall detector and bind F12 to a UI profile capture"""
+        setup_logging(config_dir() / "diagnostics.log")
+        self.root.title("AndroMirror by Juan v1.0 (debug)")
+        self.stall_detector = StallDetector(self.root, threshold_ms=stall_threshold_ms)
+        self.stall_detector.start()
+        self.profiler = UIProfiler(self.root)
+        self.root.bind("<F12>", lambda event: self.capture_ui_profile())
+        
+    def capture_ui_profile(self):
+        """Profile the UI thread for a few seconds and save the stats"""
+        if self.profiler.running:
+            return
+        path = config_dir() / f"ui-profile-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+        self.status_label.configure(text=f"Profiling UI for {PROFILE_SECONDS} s...")
+        self.profiler.capture(
+            PROFILE_SECONDS,
+            path,
+            on_done=lambda saved: self.status_label.configure(text=f"UI profile saved to {saved}")
+        )
         
     def setup_ui(self):
         """Setup the main UI components"""
@@ -68,11 +184,17 @@ class AndroMirrorApp:
         
         # Add tabs
         self.tabview.add("Device Connection")
+        self.tabview.add("Sessions")
+        self.tabview.add("Deploy")
+        self.tabview.add("Logs")
         self.tabview.add("Settings")
         self.tabview.add("About")
         
         # Setup each tab
         self.setup_connection_tab()
+        self.setup_sessions_tab()
+        self.setup_deploy_tab()
+        self.setup_logs_tab()
         self.setup_settings_tab()
         self.setup_about_tab()
         
@@ -128,6 +250,7 @@ class AndroMirrorApp:
             header_frame,
             text="Refresh",
             width=80,
+            state="disabled",
             command=self.refresh_devices
         )
         self.refresh_btn.grid(row=0, column=1, padx=(10, 0))
@@ -136,7 +259,7 @@ class AndroMirrorApp:
         self.device_listbox = tk.Listbox(
             device_frame,
             height=8,
-            font=("SF Pro Display", 11) if sys.platform == "darwin" else ("Segoe UI", 10),
+            font=LIST_FONT,
             selectmode=tk.SINGLE
         )
         self.device_listbox.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 10))
@@ -165,6 +288,24 @@ class AndroMirrorApp:
         self.status_label = ctk.CTkLabel(connection_frame, text="Select a device to connect")
         self.status_label.grid(row=2, column=0, pady=(10, 0))
         
+        # Link test for wireless devices
+        self.test_link_btn = ctk.CTkButton(
+            connection_frame,
+            text="Test Link",
+            state="disabled",
+            command=self.test_link
+        )
+        self.test_link_btn.grid(row=3, column=0, sticky="ew", pady=(10, 0))
+        
+        # New settings for a running session, without stopping it
+        self.apply_settings_btn = ctk.CTkButton(
+            connection_frame,
+            text="Apply Settings",
+            state="disabled",
+            command=self.apply_session_settings
+        )
+        self.apply_settings_btn.grid(row=4, column=0, sticky="ew", pady=(10, 0))
+        
         # Right side - Wireless connection
         wireless_frame = ctk.CTkFrame(tab)
         wireless_frame.grid(row=0, column=1, sticky="nsew", padx=(10, 20), pady=20)
@@ -205,6 +346,187 @@ class AndroMirrorApp:
             wraplength=300
         ).grid(row=4, column=0, columnspan=2, padx=20, pady=(20, 20), sticky="w")
         
+    def setup_sessions_tab(self):
+        """Setup the sessions tab listing active mirroring sessions"""
+        tab = self.tabview.tab("Sessions")
+        tab.grid_columnconfigure(1, weight=1)
+        tab.grid_rowconfigure(0, weight=1)
+        
+        # Left side - Active sessions
+        session_frame = ctk.CTkFrame(tab)
+        session_frame.grid(row=0, column=0, sticky="nsew", padx=(20, 10), pady=20)
+        session_frame.grid_columnconfigure(0, weight=1)
+        
+        ctk.CTkLabel(
+            session_frame,
+            text="Active Sessions",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).grid(row=0, column=0, sticky="w", padx=20, pady=(20, 10))
+        
+        self.session_listbox = tk.Listbox(
+            session_frame,
+            height=12,
+            width=40,
+            font=LIST_FONT,
+            selectmode=tk.SINGLE,
+            exportselection=False
+        )
+        self.session_listbox.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 10))
+        
+        self.stop_session_btn = ctk.CTkButton(
+            session_frame,
+            text="Stop Session",
+            command=self.stop_selected_session
+        )
+        self.stop_session_btn.grid(row=2, column=0, sticky="ew", padx=20, pady=(0, 20))
+        
+        # Right side - Session events
+        events_frame = ctk.CTkFrame(tab)
+        events_frame.grid(row=0, column=1, sticky="nsew", padx=(10, 20), pady=20)
+        events_frame.grid_columnconfigure(0, weight=1)
+        events_frame.grid_rowconfigure(1, weight=1)
+        
+        ctk.CTkLabel(
+            events_frame,
+            text="Events",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).grid(row=0, column=0, sticky="w", padx=20, pady=(20, 10))
+        
+        self.session_events = ctk.CTkTextbox(events_frame, height=200)
+        self.session_events.grid(row=1, column=0, sticky="nsew", padx=20, pady=(0, 20))
+        self.session_events.configure(state="disabled")
+        
+    def setup_deploy_tab(self):
+        """Setup the deploy tab for installing APKs and pushing files"""
+        tab = self.tabview.tab("Deploy")
+        tab.grid_columnconfigure(1, weight=1)
+        tab.grid_rowconfigure(0, weight=1)
+        
+        # Left side - Target devices
+        target_frame = ctk.CTkFrame(tab)
+        target_frame.grid(row=0, column=0, sticky="nsew", padx=(20, 10), pady=20)
+        target_frame.grid_columnconfigure(0, weight=1)
+        
+        header_frame = ctk.CTkFrame(target_frame, fg_color="transparent")
+        header_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=(20, 10))
+        header_frame.grid_columnconfigure(0, weight=1)
+        
+        ctk.CTkLabel(
+            header_frame,
+            text="Target Devices",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).grid(row=0, column=0, sticky="w")
+        
+        ctk.CTkButton(
+            header_frame,
+            text="Select All",
+            width=80,
+            command=self.select_all_deploy_targets
+        ).grid(row=0, column=1, padx=(10, 0))
+        
+        self.deploy_listbox = tk.Listbox(
+            target_frame,
+            height=12,
+            font=LIST_FONT,
+            selectmode=tk.EXTENDED,
+            exportselection=False
+        )
+        self.deploy_listbox.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 20))
+        
+        # Right side - Install and push controls
+        deploy_frame = ctk.CTkFrame(tab)
+        deploy_frame.grid(row=0, column=1, sticky="nsew", padx=(10, 20), pady=20)
+        deploy_frame.grid_columnconfigure(1, weight=1)
+        deploy_frame.grid_rowconfigure(6, weight=1)
+        
+        ctk.CTkLabel(
+            deploy_frame,
+            text="Install & Push",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).grid(row=0, column=0, columnspan=2, padx=20, pady=(20, 15))
+        
+        ctk.CTkLabel(deploy_frame, text="Remote Folder:").grid(row=1, column=0, padx=(20, 10), pady=5, sticky="w")
+        self.remote_dir_entry = ctk.CTkEntry(deploy_frame)
+        self.remote_dir_entry.insert(0, DEFAULT_REMOTE_DIR)
+        self.remote_dir_entry.grid(row=1, column=1, padx=(0, 20), pady=5, sticky="ew")
+        
+        ctk.CTkLabel(deploy_frame, text="Parallel Transfers:").grid(row=2, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkOptionMenu(
+            deploy_frame,
+            variable=self.deploy_workers,
+            values=["2", "4", "8", "16"]
+        ).grid(row=2, column=1, padx=(0, 20), pady=5, sticky="ew")
+        
+        ctk.CTkLabel(deploy_frame, text="Streamed:").grid(row=3, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkSwitch(
+            deploy_frame,
+            text="Stream with byte progress",
+            variable=self.deploy_streamed
+        ).grid(row=3, column=1, padx=(0, 20), pady=5, sticky="w")
+        
+        button_frame = ctk.CTkFrame(deploy_frame, fg_color="transparent")
+        button_frame.grid(row=4, column=0, columnspan=2, padx=20, pady=(15, 10), sticky="ew")
+        button_frame.grid_columnconfigure((0, 1, 2), weight=1)
+        
+        self.install_btn = ctk.CTkButton(button_frame, text="Install APK(s)...", command=self.deploy_install)
+        self.install_btn.grid(row=0, column=0, padx=(0, 5), sticky="ew")
+        
+        self.push_btn = ctk.CTkButton(button_frame, text="Push Files...", command=self.deploy_push)
+        self.push_btn.grid(row=0, column=1, padx=5, sticky="ew")
+        
+        self.retry_btn = ctk.CTkButton(
+            button_frame,
+            text="Retry Failed",
+            state="disabled",
+            command=self.retry_failed_deploy
+        )
+        self.retry_btn.grid(row=0, column=2, padx=(5, 0), sticky="ew")
+        
+        self.deploy_progress_bar = ctk.CTkProgressBar(deploy_frame)
+        self.deploy_progress_bar.grid(row=5, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="ew")
+        self.deploy_progress_bar.set(0)
+        
+        self.deploy_output = ctk.CTkTextbox(deploy_frame, height=200, font=ctk.CTkFont(family="Courier", size=12))
+        self.deploy_output.grid(row=6, column=0, columnspan=2, padx=20, pady=(0, 20), sticky="nsew")
+        
+    def setup_logs_tab(self):
+        """Setup the logs tab for searching archived scrcpy output"""
+        tab = self.tabview.tab("Logs")
+        tab.grid_columnconfigure(0, weight=1)
+        tab.grid_rowconfigure(1, weight=1)
+        
+        # Search controls
+        search_frame = ctk.CTkFrame(tab)
+        search_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=(20, 10))
+        search_frame.grid_columnconfigure(1, weight=1)
+        
+        self.log_query_entry = ctk.CTkEntry(search_frame, placeholder_text="Words to find, e.g. device disconnected")
+        self.log_query_entry.grid(row=0, column=0, columnspan=2, padx=(20, 10), pady=(15, 5), sticky="ew")
+        self.log_query_entry.bind("<Return>", lambda event: self.search_logs())
+        
+        self.log_search_btn = ctk.CTkButton(search_frame, text="Search", width=100, command=self.search_logs)
+        self.log_search_btn.grid(row=0, column=2, padx=(0, 20), pady=(15, 5))
+        
+        filter_frame = ctk.CTkFrame(search_frame, fg_color="transparent")
+        filter_frame.grid(row=1, column=0, columnspan=3, padx=20, pady=(5, 15), sticky="ew")
+        
+        ctk.CTkLabel(filter_frame, text="Serial:").grid(row=0, column=0, padx=(0, 10))
+        self.log_serial_entry = ctk.CTkEntry(filter_frame, placeholder_text="any", width=160)
+        self.log_serial_entry.grid(row=0, column=1, padx=(0, 20))
+        
+        ctk.CTkLabel(filter_frame, text="Time:").grid(row=0, column=2, padx=(0, 10))
+        self.log_window = ctk.StringVar(value="Last 24 hours")
+        ctk.CTkOptionMenu(filter_frame, variable=self.log_window, values=list(LOG_WINDOWS)).grid(row=0, column=3, padx=(0, 20))
+        
+        ctk.CTkLabel(filter_frame, text="Level:").grid(row=0, column=4, padx=(0, 10))
+        self.log_level = ctk.StringVar(value="All")
+        ctk.CTkOptionMenu(filter_frame, variable=self.log_level, values=list(LOG_LEVELS)).grid(row=0, column=5)
+        
+        # Results
+        self.log_results = ctk.CTkTextbox(tab, font=ctk.CTkFont(family="Courier", size=12))
+        self.log_results.grid(row=1, column=0, sticky="nsew", padx=20, pady=(0, 20))
+        self.log_results.configure(state="disabled")
+        
     def setup_settings_tab(self):
         """Setup the settings tab"""
         tab = self.tabview.tab("Settings")
@@ -260,6 +582,50 @@ class AndroMirrorApp:
         ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="ew")
         row += 1
         
+        # Display Settings
+        ctk.CTkLabel(
+            scrollable_frame,
+            text="Display Settings",
+            font=ctk.CTkFont(size=18, weight="bold")
+        ).grid(row=row, column=0, columnspan=2, padx=20, pady=(30, 15), sticky="w")
+        row += 1
+        
+        # Mirror the physical screen or a new virtual display
+        ctk.CTkLabel(scrollable_frame, text="Display:").grid(row=row, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkOptionMenu(
+            scrollable_frame,
+            variable=self.display_mode,
+            values=["mirror", "virtual"]
+        ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="ew")
+        row += 1
+        
+        # Virtual display size ("window" fits the host screen or its tile)
+        ctk.CTkLabel(scrollable_frame, text="Virtual Size:").grid(row=row, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkOptionMenu(
+            scrollable_frame,
+            variable=self.virtual_size,
+            values=[WINDOW_SIZE] + SIZE_PRESETS
+        ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="ew")
+        row += 1
+        
+        # Virtual display density
+        ctk.CTkLabel(scrollable_frame, text="Virtual DPI:").grid(row=row, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkOptionMenu(
+            scrollable_frame,
+            variable=self.virtual_dpi,
+            values=["auto"] + DPI_PRESETS
+        ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="ew")
+        row += 1
+        
+        # App to launch when the session starts
+        ctk.CTkLabel(scrollable_frame, text="Start App:").grid(row=row, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkEntry(
+            scrollable_frame,
+            textvariable=self.start_app,
+            placeholder_text="package name, e.g. org.mozilla.firefox"
+        ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="ew")
+        row += 1
+        
         # Audio Settings
         ctk.CTkLabel(
             scrollable_frame,
@@ -338,6 +704,105 @@ class AndroMirrorApp:
         ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="ew")
         row += 1
         
+        # Startup Settings
+        ctk.CTkLabel(
+            scrollable_frame,
+            text="Startup Settings",
+            font=ctk.CTkFont(size=18, weight="bold")
+        ).grid(row=row, column=0, columnspan=2, padx=20, pady=(30, 15), sticky="w")
+        row += 1
+        
+        # Resume last session
+        ctk.CTkLabel(scrollable_frame, text="Resume:").grid(row=row, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkSwitch(
+            scrollable_frame,
+            text="Reconnect and resume last sessions on start",
+            variable=self.resume_on_start
+        ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="w")
+        row += 1
+        
+        # Parallel launches
+        ctk.CTkLabel(scrollable_frame, text="Parallel Launches:").grid(row=row, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkOptionMenu(
+            scrollable_frame,
+            variable=self.max_launches,
+            values=["1", "2", "4", "8"]
+        ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="ew")
+        row += 1
+        
+        # Monitoring Settings
+        ctk.CTkLabel(
+            scrollable_frame,
+            text="Monitoring Settings",
+            font=ctk.CTkFont(size=18, weight="bold")
+        ).grid(row=row, column=0, columnspan=2, padx=20, pady=(30, 15), sticky="w")
+        row += 1
+        
+        # Metrics export
+        ctk.CTkLabel(scrollable_frame, text="Metrics:").grid(row=row, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkSwitch(
+            scrollable_frame,
+            text="Export metrics (Prometheus endpoint and JSON-lines file)",
+            variable=self.metrics_enabled,
+            command=self.apply_metrics
+        ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="w")
+        row += 1
+        
+        # Device Protection
+        ctk.CTkLabel(
+            scrollable_frame,
+            text="Device Protection",
+            font=ctk.CTkFont(size=18, weight="bold")
+        ).grid(row=row, column=0, columnspan=2, padx=20, pady=(30, 15), sticky="w")
+        row += 1
+        
+        ctk.CTkLabel(scrollable_frame, text="Thermal Guard:").grid(row=row, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkSwitch(
+            scrollable_frame,
+            text="Lower fps/bitrate or pause when a device is hot or low on battery",
+            variable=self.thermal_enabled
+        ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="w")
+        row += 1
+        
+        # Temperature thresholds (battery temperature, °C)
+        ctk.CTkLabel(scrollable_frame, text="Throttle At (°C):").grid(row=row, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkOptionMenu(
+            scrollable_frame,
+            variable=self.throttle_temp,
+            values=["38", "40", "42", "44"]
+        ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="ew")
+        row += 1
+        
+        ctk.CTkLabel(scrollable_frame, text="Pause At (°C):").grid(row=row, column=0, padx=(20, 10), pady=5, sticky="w")
+        ctk.CTkOptionMenu(
+            scrollable_frame,
+            variable=self.pause_temp,
+            values=["43", "45", "47", "50"]
+        ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="ew")
+        row += 1
+        
+        # Remote ADB Servers
+        ctk.CTkLabel(
+            scrollable_frame,
+            text="Remote ADB Servers",
+            font=ctk.CTkFont(size=18, weight="bold")
+        ).grid(row=row, column=0, columnspan=2, padx=20, pady=(30, 15), sticky="w")
+        row += 1
+        
+        # Devices of other hosts; those run `adb -a -P 5037 nodaemon server`
+        ctk.CTkLabel(scrollable_frame, text="Servers:").grid(row=row, column=0, padx=(20, 10), pady=5, sticky="w")
+        self.servers_entry = ctk.CTkEntry(scrollable_frame, placeholder_text="lab-pc, 192.168.1.20:5038")
+        self.servers_entry.grid(row=row, column=1, padx=(0, 20), pady=5, sticky="ew")
+        self.servers_entry.bind("<Return>", lambda event: self.apply_servers())
+        row += 1
+        
+        ctk.CTkButton(
+            scrollable_frame,
+            text="Apply Servers",
+            command=self.apply_servers
+        ).grid(row=row, column=1, padx=(0, 20), pady=5, sticky="w")
+        row += 1
+        
     def setup_about_tab(self):
         """Setup the about tab"""
         tab = self.tabview.tab("About")
@@ -423,44 +888,196 @@ Made with ❤️ for the Android development community"""
             font=ctk.CTkFont(size=12)
         ).grid(row=4, column=0, pady=(30, 0))
         
+    def start_service(self):
+        """Connect to the daemon (starting it if needed) and read the config off the main thread"""
+        config = self.config_store.load()
+        service, notice = None, None
+        if self.use_daemon:
+            try:
+                service = connect_or_spawn(daemon_command())
+            except ServiceError as e:
+                notice = f"{str(e)}; sessions will end with this window"
+        if service is None:
+            service = MirrorService()
+            # The daemon reads the remote adb servers from the config itself
+            try:
+                service.servers.configure(config["adb_servers"])
+            except ValueError as e:
+                notice = f"Ignoring remote adb servers: {str(e)}"
+        try:
+            sessions = service.list_sessions()
+        except ServiceError:
+            sessions = []
+        self.root.after(0, self.on_service_ready, service, sessions, config, notice)
+        
+    def on_service_ready(self, service, sessions, config, notice):
+        """Start using the service: sync sessions, apply the config and list devices"""
+        self.service = service
+        service.subscribe(self.on_service_event)
+        self.session_infos = {info["key"]: info for info in sessions}
+        self.update_session_list()
+        self.apply_config(config)
+        if not self.startup_benchmark:
+            # The benchmark measures the UI alone and must not block on error dialogs
+            self.refresh_devices()
+        if notice:
+            self.log_session_event(notice)
+        if self.soak_cycles:
+            self.start_soak()
+        
+    def apply_config(self, config):
+        """Apply loaded settings and optionally resume the last sessions"""
+        for name, var in self.setting_vars.items():
+            var.set(config["settings"][name])
+        self.theme_mode.set(config["theme"])
+        self.change_theme(config["theme"])
+        self.resume_on_start.set(config["resume_on_start"])
+        self.max_launches.set(str(config["max_concurrent_launches"]))
+        self.metrics_enabled.set(config["metrics_enabled"])
+        self.thermal_enabled.set(config["thermal"]["enabled"])
+        self.throttle_temp.set(f"{config['thermal']['throttle_temp']:g}")
+        self.pause_temp.set(f"{config['thermal']['pause_temp']:g}")
+        self.servers_entry.delete(0, "end")
+        self.servers_entry.insert(0, ", ".join(config["adb_servers"]))
+        
+        # Saving is only enabled from here on, so defaults never overwrite the file
+        self.config = config
+        self.apply_metrics()
+        self.apply_thermal()
+        if config["resume_on_start"] and config["last_sessions"] and not self.session_infos:
+            # Sessions still running in the daemon need no resume
+            self.resume_last_sessions()
+            
+    def schedule_save(self):
+        """Save the config shortly after the last change"""
+        if self.config is None or self.save_pending:
+            return
+        self.save_pending = True
+        self.root.after(1000, self.save_config)
+        
+    def save_config(self):
+        """Write the current settings to the config file"""
+        self.save_pending = False
+        if self.config is None:
+            return
+        self.config["settings"] = self.current_settings()
+        self.config["theme"] = self.theme_mode.get()
+        self.config["resume_on_start"] = self.resume_on_start.get()
+        self.config["max_concurrent_launches"] = int(self.max_launches.get())
+        self.config["metrics_enabled"] = self.metrics_enabled.get()
+        self.config_store.save(self.config)
+        
+    def apply_metrics(self):
+        """Start or stop the metrics exporters of the service to match the setting"""
+        if self.config is None or self.service is None:
+            return
+        enabled = self.metrics_enabled.get()
+        port = self.config["metrics_port"]
+        jsonl_path = str(config_dir() / self.config["metrics_file"])
+        
+        def metrics_thread():
+            try:
+                self.service.configure_metrics(enabled, port, jsonl_path)
+            except ServiceError as e:
+                message = str(e)
+                self.root.after(0, self.metrics_enabled.set, False)
+                self.root.after(0, lambda: messagebox.showerror("Error", message))
+                
+        threading.Thread(target=metrics_thread, daemon=True).start()
+            
+    def apply_thermal(self):
+        """Send the device protection thresholds to the service and save them"""
+        if self.config is None or self.service is None:
+            return
+        self.config["thermal"].update({
+            "enabled": self.thermal_enabled.get(),
+            "throttle_temp": float(self.throttle_temp.get()),
+            "pause_temp": float(self.pause_temp.get()),
+        })
+        self.schedule_save()
+        self.call_service(self.service.configure_thermal, dict(self.config["thermal"]))
+            
+    def apply_servers(self):
+        """Send the remote adb servers to the service and save them"""
+        if self.config is None or self.service is None:
+            return
+        endpoints = [e.strip() for e in self.servers_entry.get().split(",") if e.strip()]
+        self.status_label.configure(text="Checking adb servers...")
+        
+        def servers_thread():
+            try:
+                status = self.service.configure_servers(endpoints)
+            except ServiceError as e:
+                message = str(e)
+                self.root.after(0, lambda: self.status_label.configure(text="Ready"))
+                self.root.after(0, self.show_error, message)
+                return
+            remote = [row for row in status if not row["local"]]
+            unreachable = [row["server"] for row in remote if not row["ok"]]
+            message = f"{len(remote) - len(unreachable)} of {len(remote)} adb server(s) reachable"
+            if unreachable:
+                message += f" (not: {', '.join(unreachable)})"
+            local = next((row for row in status if row["local"]), None)
+            if local and not local["ok"]:
+                message += f"; local adb: {local['error']}"
+            self.root.after(0, self.servers_applied, [row["server"] for row in remote], message)
+            
+        threading.Thread(target=servers_thread, daemon=True).start()
+        
+    def servers_applied(self, servers, message):
+        self.config["adb_servers"] = servers
+        self.schedule_save()
+        self.status_label.configure(text=message)
+        
+    def resume_last_sessions(self):
+        """Reconnect wireless devices and relaunch the previous session set"""
+        entries = list(self.config["last_sessions"])
+        tiles = len(entries)
+        profiles = {key: self.launch_settings(profile, tiles) for key, profile in self.config["profiles"].items()}
+        limit = int(self.max_launches.get())
+        default_settings = self.launch_settings(self.current_settings(), tiles)
+        endpoints = list(dict.fromkeys(
+            # Devices on remote adb servers are reconnected by those servers
+            [serial for entry in entries for serial in entry["transports"]
+             if is_tcp(serial) and not split_serial(serial)[0]]
+            + self.config["wireless_endpoints"]
+        ))
+        self.status_label.configure(text=f"Resuming {len(entries)} session(s)...")
+        
+        def resume_thread():
+            try:
+                started = self.service.resume(
+                    endpoints,
+                    [entry["key"] for entry in entries],
+                    profiles,
+                    default_settings,
+                    max_concurrent=limit
+                )
+                message = f"Resumed {started} of {len(entries)} session(s)"
+            except Exception as e:
+                message = f"Resume failed: {str(e)}"
+            self.root.after(0, lambda: self.status_label.configure(text=message))
+            
+        threading.Thread(target=resume_thread, daemon=True).start()
+        
     def change_theme(self, mode):
         """Change the application theme"""
         ctk.set_appearance_mode(mode)
         
     def refresh_devices(self):
         """Refresh the list of connected devices"""
+        if self.service is None:
+            return
         self.refresh_btn.configure(state="disabled", text="Refreshing...")
         self.status_label.configure(text="Refreshing devices...")
         
         def refresh_thread():
             try:
-                # Run adb devices command
-                result = subprocess.run(
-                    ["adb", "devices"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                
-                if result.returncode == 0:
-                    lines = result.stdout.strip().split('\n')[1:]  # Skip header
-                    devices = []
-                    
-                    for line in lines:
-                        if line.strip() and '\t' in line:
-                            device_id, status = line.strip().split('\t')
-                            if status == 'device':
-                                devices.append(device_id)
-                    
-                    # Update UI in main thread
-                    self.root.after(0, self.update_device_list, devices)
-                else:
-                    self.root.after(0, self.show_error, "ADB not found or not in PATH")
-                    
-            except subprocess.TimeoutExpired:
-                self.root.after(0, self.show_error, "ADB command timed out")
-            except FileNotFoundError:
-                self.root.after(0, self.show_error, "ADB not found. Please install Android SDK Platform Tools")
+                # The service lists and merges transports of the same device,
+                # then sends the new list as a "devices" event
+                self.service.refresh_devices()
+            except ServiceError as e:
+                self.root.after(0, self.show_error, str(e))
             except Exception as e:
                 self.root.after(0, self.show_error, f"Error refreshing devices: {str(e)}")
         
@@ -470,22 +1087,174 @@ Made with ❤️ for the Android development community"""
         """Update the device list in the UI"""
         self.devices = devices
         self.device_listbox.delete(0, tk.END)
+        self.deploy_listbox.delete(0, tk.END)
         
         if devices:
             for device in devices:
-                self.device_listbox.insert(tk.END, device)
+                self.device_listbox.insert(tk.END, device.label)
+                self.deploy_listbox.insert(tk.END, device.label)
             self.status_label.configure(text=f"Found {len(devices)} device(s)")
         else:
             self.device_listbox.insert(tk.END, "No devices found")
             self.status_label.configure(text="No devices connected")
             
+        # Keep the selection on the same physical device
+        if self.selected_device:
+            keys = [device.key for device in devices]
+            if self.selected_device.key in keys:
+                index = keys.index(self.selected_device.key)
+                self.selected_device = devices[index]
+                self.device_listbox.selection_set(index)
+            else:
+                self.selected_device = None
+                
         self.refresh_btn.configure(state="normal", text="Refresh")
         self.update_connect_button()
         
+    def select_all_deploy_targets(self):
+        """Select every device in the deploy target list"""
+        if self.devices:
+            self.deploy_listbox.selection_set(0, tk.END)
+            
+    def deploy_install(self):
+        """Pick one APK (or a set of split APKs) and install it on the targets"""
+        paths = filedialog.askopenfilenames(
+            title="Select APK or split APKs",
+            filetypes=[("Android packages", "*.apk"), ("All files", "*.*")]
+        )
+        if paths:
+            self.start_deploy(INSTALL, list(paths))
+            
+    def deploy_push(self):
+        """Pick files and push them to the targets"""
+        paths = filedialog.askopenfilenames(title="Select files to push")
+        if paths:
+            self.start_deploy(PUSH, list(paths))
+            
+    def retry_failed_deploy(self):
+        """Run the last deploy again on the devices that failed"""
+        job = self.last_deploy
+        if job and job.failed_serials():
+            self.start_deploy(job.kind, job.paths, job.failed_serials())
+            
+    def start_deploy(self, kind, paths, serials=None):
+        """Start an install or push on the selected devices"""
+        if self.deploy_job:
+            return
+            
+        if serials is None:
+            serials = [self.devices[i].preferred for i in self.deploy_listbox.curselection() if i < len(self.devices)]
+        if not serials:
+            messagebox.showerror("Error", "Please select at least one target device")
+            return
+            
+        try:
+            job = DeployJob(
+                kind,
+                paths,
+                remote_dir=self.remote_dir_entry.get().strip() or DEFAULT_REMOTE_DIR,
+                streamed=self.deploy_streamed.get(),
+                max_workers=int(self.deploy_workers.get()),
+                on_progress=self.on_deploy_progress
+            )
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Cannot start deploy: {str(e)}")
+            return
+            
+        self.deploy_job = job
+        self.deploy_progress = {serial: (0, job.total_bytes) for serial in serials}
+        self.deploy_progress_bar.set(0)
+        for button in (self.install_btn, self.push_btn, self.retry_btn):
+            button.configure(state="disabled")
+            
+        def deploy_thread():
+            try:
+                results = job.run(serials)
+                self.root.after(0, self.finish_deploy, job, format_summary(results))
+            except Exception as e:
+                self.root.after(0, self.finish_deploy, job, f"Deploy failed: {str(e)}")
+                
+        threading.Thread(target=deploy_thread, daemon=True).start()
+        self.poll_deploy_progress()
+        
+    def on_deploy_progress(self, serial, sent, total):
+        """Record progress from a deploy worker (polled by the UI)"""
+        self.deploy_progress[serial] = (sent, total)
+        
+    def poll_deploy_progress(self):
+        """Redraw per-device progress while a deploy is running"""
+        if not self.deploy_job:
+            return
+            
+        lines = []
+        sent_sum = total_sum = 0
+        for serial, (sent, total) in sorted(self.deploy_progress.items()):
+            percent = 100 * sent / total if total else 100
+            lines.append(f"{serial:<24}{percent:5.0f}%  {sent / (1024 * 1024):8.1f} MB")
+            sent_sum += sent
+            total_sum += total
+            
+        self.deploy_progress_bar.set(sent_sum / total_sum if total_sum else 0)
+        self.deploy_output.delete("1.0", tk.END)
+        self.deploy_output.insert("1.0", "\n".join(lines))
+        self.root.after(250, self.poll_deploy_progress)
+        
+    def finish_deploy(self, job, summary):
+        """Show the deploy summary and allow retrying failed devices"""
+        self.deploy_job = None
+        self.last_deploy = job
+        self.deploy_progress_bar.set(1.0)
+        self.deploy_output.delete("1.0", tk.END)
+        self.deploy_output.insert("1.0", summary)
+        
+        self.install_btn.configure(state="normal")
+        self.push_btn.configure(state="normal")
+        self.retry_btn.configure(state="normal" if job.failed_serials() else "disabled")
+        
+    def search_logs(self):
+        """Search the session log archive with the filters of the logs tab"""
+        if self.service is None:
+            return
+        window = LOG_WINDOWS[self.log_window.get()]
+        query = {
+            "text": self.log_query_entry.get().strip(),
+            "serial": self.log_serial_entry.get().strip() or None,
+            "since": time.time() - window if window else None,
+            "level": LOG_LEVELS[self.log_level.get()],
+        }
+        self.log_search_btn.configure(state="disabled", text="Searching...")
+        
+        def search_thread():
+            try:
+                results = self.service.search_logs(**query)
+                lines = [
+                    f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r['time']))}  "
+                    f"{r['name'] or r['key']} ({r['serial']})  {r['text']}"
+                    for r in results
+                ]
+                text = "\n".join(lines) if lines else "No matching lines"
+            except ServiceError as e:
+                text = f"Search failed: {str(e)}"
+            self.root.after(0, self.show_log_results, text)
+            
+        threading.Thread(target=search_thread, daemon=True).start()
+        
+    def show_log_results(self, text):
+        """Replace the log search results"""
+        self.log_search_btn.configure(state="normal", text="Search")
+        self.log_results.configure(state="normal")
+        self.log_results.delete("1.0", tk.END)
+        self.log_results.insert("1.0", text)
+        self.log_results.configure(state="disabled")
+        
     def show_error(self, message):
         """Show error message"""
         self.status_label.configure(text=message)
         self.refresh_btn.configure(state="normal", text="Refresh")
+        if self.soak_cycles:
+            # A soak run must not stop at a modal dialog
+            self.log_session_event(f"Error: {message}")
+            return
         messagebox.showerror("Error", message)
         
     def on_device_select(self, event):
@@ -493,19 +1262,100 @@ Made with ❤️ for the Android development community"""
         selection = self.device_listbox.curselection()
         if selection and self.devices:
             self.selected_device = self.devices[selection[0]]
-            self.status_label.configure(text=f"Selected: {self.selected_device}")
+            self.status_label.configure(text=f"Selected: {self.selected_device.label}")
+            self.show_device_details(self.selected_device)
+            
+            # Restore the settings this device was last mirrored with, or
+            # reuse a previous link test on this network
+            profile = self.config["profiles"].get(self.selected_device.key) if self.config else None
+            tcp_serial = self.selected_device.tcp_serial
+            if profile:
+                for name, value in profile.items():
+                    if name in self.setting_vars:
+                        self.setting_vars[name].set(value)
+            elif tcp_serial:
+                self.load_cached_link(self.selected_device, tcp_serial)
         else:
             self.selected_device = None
             self.status_label.configure(text="No device selected")
             
         self.update_connect_button()
         
+    def load_cached_link(self, device, tcp_serial):
+        """Apply a previous link test on this network, looked up off the UI thread (it may resolve names)"""
+        def lookup_thread():
+            cached = self.link_cache.get(tcp_serial)
+            
+            def apply_cached():
+                # The user may have picked another device meanwhile
+                if device is self.selected_device:
+                    self.apply_link_result(tcp_serial, cached)
+                    
+            if cached:
+                self.root.after(0, apply_cached)
+                
+        threading.Thread(target=lookup_thread, daemon=True).start()
+        
+    def show_device_details(self, device):
+        """Show the battery level of a device in the status label"""
+        def details_thread():
+            try:
+                battery = self.service.run_shell(device.preferred, "dumpsys battery | grep level")["output"]
+            except ServiceError:
+                return
+                
+            level = battery.strip().rpartition(":")[2].strip()
+            if level.isdigit() and device is self.selected_device:
+                text = f"Selected: {device.label}, battery {level}%"
+                self.root.after(0, lambda: self.status_label.configure(text=text))
+                
+        threading.Thread(target=details_thread, daemon=True).start()
+        
     def update_connect_button(self):
         """Update the connect button state"""
         if self.selected_device and self.selected_device in self.devices:
-            self.connect_btn.configure(state="normal")
+            session = self.session_infos.get(self.selected_device.key)
+            self.connect_btn.configure(state="normal", text="Disconnect" if session else "Connect")
+        else:
+            session = None
+            self.connect_btn.configure(state="disabled", text="Connect")
+        running = bool(session) and session["state"] == "running"
+        self.apply_settings_btn.configure(state="normal" if running else "disabled", text="Apply Settings")
+            
+        if self.selected_device in self.devices and self.selected_device.tcp_serial:
+            self.test_link_btn.configure(state="normal")
         else:
-            self.connect_btn.configure(state="disabled")
+            self.test_link_btn.configure(state="disabled")
+            
+    def test_link(self, device=None):
+        """Measure the link to a wireless device and pre-select bitrate and resolution"""
+        device = device or (self.selected_device.tcp_serial if self.selected_device else None)
+        if not device:
+            return
+            
+        self.test_link_btn.configure(state="disabled", text="Testing link...")
+        self.status_label.configure(text=f"Testing link to {device}...")
+        
+        def probe_thread():
+            try:
+                result = LinkProbeResult.from_dict(self.service.probe_link(device))
+                self.link_cache.put(device, result)
+                self.root.after(0, self.apply_link_result, device, result)
+            except Exception as e:
+                message = f"Link test failed: {str(e)}"
+                self.root.after(0, lambda: self.status_label.configure(text=message))
+            finally:
+                self.root.after(0, lambda: self.test_link_btn.configure(text="Test Link"))
+                self.root.after(0, self.update_connect_button)
+            
+        threading.Thread(target=probe_thread, daemon=True).start()
+        
+    def apply_link_result(self, device, result):
+        """Pre-select the bitrate and resolution recommended for a link"""
+        bitrate, resolution = result.recommend()
+        self.bitrate.set(bitrate)
+        self.resolution.set(resolution)
+        self.status_label.configure(text=f"{device}: {result.describe()}")
             
     def connect_wireless(self):
         """Connect to device wirelessly"""
@@ -521,118 +1371,176 @@ Made with ❤️ for the Android development community"""
         def connect_thread():
             try:
                 # Connect to wireless device
-                result = subprocess.run(
-                    ["adb", "connect", f"{ip}:{port}"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
+                result = self.service.connect_wireless(f"{ip}:{port}")
+                error_msg = result["message"]
                 
-                if result.returncode == 0 and ("connected" in result.stdout.lower() or "already connected" in result.stdout.lower()):
+                if result["connected"]:
                     self.root.after(0, lambda: self.wireless_connect_btn.configure(state="normal", text="Connect Wireless"))
+                    self.root.after(0, self.remember_wireless_endpoint, f"{ip}:{port}")
                     self.root.after(0, self.refresh_devices)
+                    self.root.after(0, self.test_link, f"{ip}:{port}")
                     self.root.after(0, lambda: messagebox.showinfo("Success", f"Connected to {ip}:{port}"))
                 else:
-                    error_msg = result.stdout or result.stderr or "Connection failed"
                     self.root.after(0, lambda: messagebox.showerror("Connection Failed", error_msg))
                     self.root.after(0, lambda: self.wireless_connect_btn.configure(state="normal", text="Connect Wireless"))
                     
             except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Connection error: {str(e)}"))
+                message = f"Connection error: {str(e)}"
+                self.root.after(0, lambda: messagebox.showerror("Error", message))
                 self.root.after(0, lambda: self.wireless_connect_btn.configure(state="normal", text="Connect Wireless"))
         
         threading.Thread(target=connect_thread, daemon=True).start()
         
+    def remember_wireless_endpoint(self, endpoint):
+        """Keep a wireless endpoint for resuming on the next start"""
+        if self.config is not None:
+            remember_endpoint(self.config, endpoint)
+            self.schedule_save()
+            
+    def current_settings(self):
+        """Session settings as chosen in the Settings tab"""
+        return {name: var.get() for name, var in self.setting_vars.items()}
+        
     def connect_device(self):
-        """Connect to the selected device using scrcpy"""
+        """Start or stop mirroring the selected device using scrcpy"""
         if not self.selected_device:
             return
             
+        key = self.selected_device.key
+        if key in self.session_infos:
+            # Disconnect current session
+            self.call_service(self.service.stop_session, key)
+            self.reset_connection_ui()
+            return
+            
         self.connect_btn.configure(state="disabled", text="Connecting...")
         self.progress_bar.set(0.2)
         self.status_label.configure(text="Starting scrcpy...")
+        settings = self.current_settings()
+        if self.config is not None:
+            self.config["profiles"][key] = settings
+        self.call_service(self.service.start_session, key, self.launch_settings(settings), on_error=self.reset_connection_ui)
+        
+    def apply_session_settings(self):
+        """Relaunch the selected device's session with the current settings, make-before-break"""
+        if not self.selected_device or self.selected_device.key not in self.session_infos:
+            return
+        key = self.selected_device.key
+        settings = self.current_settings()
+        if self.config is not None:
+            self.config["profiles"][key] = settings
+            self.schedule_save()
+        # A "window" sized display is left for the service to fit to the session's window
+        self.apply_settings_btn.configure(state="disabled", text="Applying...")
+        self.status_label.configure(text="Starting scrcpy with the new settings...")
+        
+        def apply_thread():
+            try:
+                self.service.apply_settings(key, settings)
+                self.root.after(0, lambda: self.status_label.configure(text="Settings applied"))
+            except ServiceError as e:
+                message = str(e)
+                self.root.after(0, self.show_error, message)
+            self.root.after(0, self.update_connect_button)
+            
+        threading.Thread(target=apply_thread, daemon=True).start()
         
-        def connect_thread():
+    def launch_settings(self, settings, tiles=None):
+        """Settings with a "window" sized virtual display resolved to this screen or a tile of it
+
+        For new sessions only: their window opens at the display's size.
+        """
+        if settings.get("display_mode") != VIRTUAL or settings.get("virtual_size") != WINDOW_SIZE:
+            return settings
+        tiles = tiles or len(self.session_infos) + 1
+        size = tile_size(self.root.winfo_screenwidth(), self.root.winfo_screenheight(), tiles)
+        return dict(settings, virtual_size=size)
+        
+    def call_service(self, method, *args, on_error=None):
+        """Call the service off the main thread and report failures"""
+        def call_thread():
             try:
-                # Build scrcpy command
-                cmd = ["scrcpy", "-s", self.selected_device]
-                
-                # Add video settings
-                resolution_map = {
-                    "SD (540p)": "540",
-                    "HD (720p)": "720", 
-                    "FHD (1080p)": "1080",
-                    "4K": "2160"
-                }
-                if self.resolution.get() in resolution_map:
-                    cmd.extend(["-m", resolution_map[self.resolution.get()]])
-                
-                # FPS
-                cmd.extend(["--max-fps", self.fps.get()])
-                
-                # Video codec
-                cmd.extend(["--video-codec", self.video_codec.get()])
-                
-                # Bitrate
-                cmd.extend(["-b", self.bitrate.get()])
-                
-                # Audio settings
-                if not self.audio_enabled.get():
-                    cmd.append("--no-audio")
-                else:
-                    audio_bitrate_map = {"Low": "64K", "Medium": "128K", "High": "320K"}
-                    cmd.extend(["--audio-bit-rate", audio_bitrate_map[self.audio_quality.get()]])
-                
-                # Device settings
-                if self.stay_awake.get():
-                    cmd.append("--stay-awake")
+                method(*args)
+            except ServiceError as e:
+                self.root.after(0, self.show_error, str(e))
+                if on_error:
+                    self.root.after(0, on_error)
                     
-                if self.screen_off.get():
-                    cmd.append("--turn-screen-off")
-                
-                # Input settings
-                cmd.extend(["--keyboard", self.keyboard_mode.get()])
-                cmd.extend(["--mouse", self.mouse_mode.get()])
-                
-                self.root.after(0, lambda: self.progress_bar.set(0.6))
-                
-                # Start scrcpy
-                self.scrcpy_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True
-                )
-                
-                self.root.after(0, lambda: self.progress_bar.set(1.0))
-                self.root.after(0, lambda: self.status_label.configure(text="scrcpy started successfully!"))
-                self.root.after(0, lambda: self.connect_btn.configure(state="normal", text="Disconnect"))
-                
-                # Wait for process to complete
-                self.scrcpy_process.wait()
-                
-                # Reset UI when scrcpy closes
-                self.root.after(0, self.reset_connection_ui)
-                
-            except FileNotFoundError:
-                self.root.after(0, lambda: messagebox.showerror("Error", "scrcpy not found. Please install scrcpy and add it to PATH"))
-                self.root.after(0, self.reset_connection_ui)
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to start scrcpy: {str(e)}"))
-                self.root.after(0, self.reset_connection_ui)
-        
-        if self.scrcpy_process and self.scrcpy_process.poll() is None:
-            # Disconnect current session
-            self.scrcpy_process.terminate()
-            self.scrcpy_process = None
-            self.reset_connection_ui()
+        threading.Thread(target=call_thread, daemon=True).start()
+        
+    def on_service_event(self, event):
+        """Forward an event from the service (any thread) to the UI"""
+        self.root.after(0, self.handle_service_event, event)
+        
+    def handle_service_event(self, event):
+        """Dispatch a device, session or connection event"""
+        if event["type"] == "devices":
+            self.update_device_list([LogicalDevice.from_dict(data) for data in event["devices"]])
+        elif event["type"] == "session":
+            self.handle_session_event(event["session"], event["message"], event["level"])
+        elif event["type"] == "notice":
+            self.log_session_event(event["message"])
+        elif event["type"] == "disconnected" and not self.closing:
+            self.session_infos = {}
+            self.update_session_list()
+            self.show_error("Lost connection to the AndroMirror daemon. Restart AndroMirror to reconnect.")
+        
+    def handle_session_event(self, session, message, level):
+        """Log a session event and update the views that show it"""
+        if session["active"]:
+            self.session_infos[session["key"]] = session
         else:
-            # Start new connection
-            threading.Thread(target=connect_thread, daemon=True).start()
+            self.session_infos.pop(session["key"], None)
+        self.log_session_event(f"{session['name']}: {message}")
+        self.update_session_list()
+        
+        # Remember which devices are being mirrored, for resume on start
+        if self.config is not None and not self.closing:
+            self.config["last_sessions"] = [
+                {"key": s["key"], "transports": s["transports"]} for s in self.active_sessions
+            ]
+            self.schedule_save()
+        
+        if self.selected_device and session["key"] == self.selected_device.key:
+            if session["active"]:
+                self.progress_bar.set(1.0)
+                self.status_label.configure(text=message)
+                self.update_connect_button()
+            else:
+                self.reset_connection_ui()
+                
+        if level == "error":
+            messagebox.showerror("Error", message)
+            
+    def log_session_event(self, text):
+        """Append a timestamped line to the session events view"""
+        self.session_events.configure(state="normal")
+        self.session_events.insert(tk.END, f"[{time.strftime('%H:%M:%S')}] {text}\n")
+        self.session_events.see(tk.END)
+        self.session_events.configure(state="disabled")
+        
+    def update_session_list(self):
+        """Redraw the list of active sessions"""
+        self.active_sessions = list(self.session_infos.values())
+        self.session_listbox.delete(0, tk.END)
+        for session in self.active_sessions:
+            text = f"{session['name']} — {session['transport'] or 'starting'}"
+            if session["state"] == "paused":
+                text += " (paused, cooling down)"
+            elif session["throttled"]:
+                text += " (throttled)"
+            self.session_listbox.insert(tk.END, text)
+            
+    def stop_selected_session(self):
+        """Stop the session selected in the sessions tab"""
+        selection = self.session_listbox.curselection()
+        if selection and selection[0] < len(self.active_sessions):
+            self.call_service(self.service.stop_session, self.active_sessions[selection[0]]["key"])
             
     def reset_connection_ui(self):
         """Reset the connection UI to initial state"""
         self.connect_btn.configure(state="normal" if self.selected_device else "disabled", text="Connect")
+        self.apply_settings_btn.configure(state="disabled", text="Apply Settings")
         self.progress_bar.set(0)
         self.status_label.configure(text="Ready to connect" if self.selected_device else "Select a device to connect")
         
@@ -649,21 +1557,169 @@ Made with ❤️ for the Android development community"""
         # Handle window closing
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
+        # Report the first paint: idle callbacks queued once the loop is running
+        # run after the initial redraw
+        if self.startup_benchmark:
+            self.root.after(0, self.root.after_idle, self.finish_startup_benchmark)
+            
         # Start the main loop
         self.root.mainloop()
         
+    def finish_startup_benchmark(self):
+        """Write the first-paint time for build.py and exit"""
+        with open(self.startup_benchmark, "w", encoding="utf-8") as fh:
+            fh.write(f"{time.time():.6f}\n")
+        self.on_closing()
+        
+    def start_soak(self):
+        """Drive refresh, connect and disconnect through the UI (see andromirror.soak)"""
+        self.soak_monitor = SoakMonitor(self.soak_limits, report_path=self.soak_report, root=self.root)
+        self.soak_cycle = 0
+        self.soak_key = None
+        self.soak_step("refresh", time.monotonic())
+        
+    def soak_step(self, step, since):
+        """One state of the soak cycle, polled until it can move on"""
+        if step == "refresh":
+            if self.soak_cycle % SOAK_SAMPLE_EVERY == 0:
+                self.soak_monitor.sample(self.soak_cycle)
+            if self.soak_cycle >= self.soak_cycles:
+                self.finish_soak()
+                return
+            self.refresh_devices()
+            step = "select"
+        elif step == "select":
+            if self.refresh_btn.cget("state") != "normal" or not self.devices:
+                return self.soak_wait(step, since)
+            index = self.soak_cycle % len(self.devices)
+            self.device_listbox.selection_clear(0, tk.END)
+            self.device_listbox.selection_set(index)
+            self.on_device_select(None)
+            self.soak_key = self.selected_device.key
+            self.connect_device()
+            step = "connected"
+        elif step == "connected":
+            session = self.session_infos.get(self.soak_key)
+            if not session or session["state"] != "running":
+                return self.soak_wait(step, since)
+            self.connect_device()
+            step = "disconnected"
+        elif step == "disconnected":
+            if self.soak_key in self.session_infos:
+                return self.soak_wait(step, since)
+            self.soak_cycle += 1
+            step = "refresh"
+        self.root.after(SOAK_POLL_MS, self.soak_step, step, time.monotonic())
+        
+    def soak_wait(self, step, since):
+        """Poll a step again, or give up on this cycle when it takes too long"""
+        if time.monotonic() - since > SOAK_STEP_TIMEOUT:
+            self.log_session_event(f"Soak cycle {self.soak_cycle}: stuck waiting for {step}")
+            self.soak_failed = True
+            if self.soak_key:
+                self.call_service(self.service.stop_session, self.soak_key)
+            self.soak_cycle += 1
+            step, since = "refresh", time.monotonic()
+        self.root.after(SOAK_POLL_MS, self.soak_step, step, since)
+        
+    def finish_soak(self):
+        """Print the resource summary and exit; the exit status tells pass or fail"""
+        print(self.soak_monitor.summary())
+        self.soak_failed = self.soak_failed or bool(self.soak_monitor.failures())
+        self.on_closing()
+        
     def on_closing(self):
         """Handle application closing"""
-        if self.scrcpy_process and self.scrcpy_process.poll() is None:
-            self.scrcpy_process.terminate()
+        self.closing = True
+        self.save_config()
+        if self.service:
+            # A daemon client only disconnects: mirroring goes on in the daemon
+            # and the next start picks it up again. A local service stops its sessions.
+            self.service.close()
         self.root.quit()
         self.root.destroy()
 
+def daemon_command():
+    """Command line that runs the daemon from this installation"""
+    if getattr(sys, "frozen", False):
+        return [sys.executable, "--daemon"]
+    return [sys.executable, os.path.abspath(__file__), "--daemon"]
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Modern GUI frontend for scrcpy")
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        default=os.environ.get("ANDROMIRROR_DEBUG", "").strip().lower() in ("1", "true", "yes", "on"),
+        help="detect main-loop stalls, log slow callbacks and enable F12 UI profiling"
+    )
+    parser.add_argument(
+        "--stall-threshold",
+        type=int,
+        default=STALL_THRESHOLD_MS,
+        metavar="MS",
+        help=f"heartbeat delay reported as a stall in debug mode (default: {STALL_THRESHOLD_MS})"
+    )
+    parser.add_argument(
+        "--startup-benchmark",
+        metavar="FILE",
+        help="write the wall-clock time of the first paint to FILE and exit (used by build.py)"
+    )
+    parser.add_argument(
+        "--soak",
+        type=int,
+        default=0,
+        metavar="CYCLES",
+        help="run CYCLES refresh/connect/disconnect cycles against stand-in adb and scrcpy, "
+             "report resource growth and exit with status 1 on a leak"
+    )
+    parser.add_argument(
+        "--soak-report",
+        metavar="FILE",
+        help="append the soak run's resource samples to FILE as JSON lines"
+    )
+    add_soak_limit_arguments(parser, "--soak-max-")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="run the background service that owns devices and sessions, without a window"
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="run sessions inside the GUI process; they end when the window closes"
+    )
+    return parser.parse_args(argv)
+
 def main():
     """Main entry point"""
+    args = parse_args()
+    if args.daemon:
+        try:
+            run_daemon()
+        except ServiceError as e:
+            print(f"Daemon error: {e}")
+        except KeyboardInterrupt:
+            pass
+        return
+        
+    if args.soak:
+        prepare_soak()
+        
     try:
-        app = AndroMirrorApp()
+        app = AndroMirrorApp(
+            debug=args.debug,
+            stall_threshold_ms=args.stall_threshold,
+            startup_benchmark=args.startup_benchmark,
+            use_daemon=not args.no_daemon,
+            soak_cycles=args.soak,
+            soak_report=args.soak_report,
+            soak_limits=soak_limits_from_args(args)
+        )
         app.run()
+        if app.soak_failed:
+            sys.exit(1)
     except KeyboardInterrupt:
         print("\nApplication interrupted by user")
     except Exception as e:
@@ -62,19 +62,20 @@ setup(
     install_requires=read_requirements(),
     extras_require={
         "dev": [
-            "pyinstaller>=5.0",
+            "pyinstaller>=6.0",
             "pytest>=7.0",
             "black>=22.0",
             "flake8>=4.0",
         ],
         "build": [
-            "pyinstaller>=5.0",
+            "pyinstaller>=6.0",
             "nuitka>=1.0",
         ],
     },
     entry_points={
         "console_scripts": [
             "andromirror=main:main",
+            "andromirror-ctl=andromirror.cli:main",
         ],
         "gui_scripts": [
             "andromirror-gui=main:main",
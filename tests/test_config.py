@@ -0,0 +1,41 @@
+import json
+
+from andromirror.config import DEFAULT_CONFIG, DEFAULT_SETTINGS, DEFAULT_THERMAL, ConfigStore
+
+
+def _load(tmp_path, stored):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(stored))
+    return ConfigStore(path).load()
+
+
+def test_missing_or_unreadable_file_gives_defaults(tmp_path):
+    assert ConfigStore(tmp_path / "absent.json").load() == DEFAULT_CONFIG
+    (tmp_path / "broken.json").write_text("{")
+    assert ConfigStore(tmp_path / "broken.json").load() == DEFAULT_CONFIG
+
+
+def test_nested_values_of_the_wrong_type_fall_back_to_defaults(tmp_path):
+    config = _load(tmp_path, {
+        "thermal": {"throttle_temp": "40", "pause_temp": 50, "enabled": 1},
+        "settings": {"fps": 30, "bitrate": "16M", "audio_enabled": "no"},
+        "profiles": {"phone": {"fps": "30", "screen_off": "yes"}, "broken": "not a profile"},
+        "max_concurrent_launches": True,
+    })
+
+    assert config["thermal"]["throttle_temp"] == DEFAULT_THERMAL["throttle_temp"]
+    assert config["thermal"]["pause_temp"] == 50.0 and isinstance(config["thermal"]["pause_temp"], float)
+    assert config["thermal"]["enabled"] is DEFAULT_THERMAL["enabled"]
+    assert config["settings"] == dict(DEFAULT_SETTINGS, bitrate="16M")
+    assert config["profiles"] == {"phone": dict(DEFAULT_SETTINGS, fps="30")}
+    assert config["max_concurrent_launches"] == DEFAULT_CONFIG["max_concurrent_launches"]
+    f"{config['thermal']['throttle_temp']:g}"  # what the Settings tab does with it
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = ConfigStore(tmp_path / "config.json")
+    config = store.load()
+    config["settings"]["fps"] = "90"
+    config["wireless_endpoints"] = ["10.0.0.2:5555"]
+    store.save(config)
+    assert store.load() == config
@@ -0,0 +1,95 @@
+"""The daemon's JSON protocol and andromirror-ctl, against stand-in adb and scrcpy"""
+
+import json
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from andromirror import cli
+from andromirror.daemon import LOG_FILE, DaemonClient, run_daemon
+from andromirror.service import ServiceError
+from andromirror.soak import STAND_IN_DEVICES, install_stand_ins
+
+
+def _connect(path, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return DaemonClient(path)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    monkeypatch.setenv("ANDROMIRROR_HOME", str(tmp_path / "home"))
+    stand_ins = tmp_path / "bin"
+    stand_ins.mkdir()
+    install_stand_ins(str(stand_ins))
+    # `adb track-devices` of the stand-in never returns; don't leave it behind
+    adb = stand_ins / "adb"
+    adb.write_text(adb.read_text().replace("time.sleep(3600)", "pass"))
+
+    path = str(tmp_path / "d.sock")
+    thread = threading.Thread(target=run_daemon, args=(path,), daemon=True)
+    thread.start()
+    client = _connect(path)
+    yield path, client
+    try:
+        client.shutdown()
+    except ServiceError:
+        pass
+    client.close()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert not os.path.exists(path)
+
+
+def _raw_call(path, request):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall((json.dumps(request) + "\n").encode())
+        return json.loads(sock.makefile("rb").readline())
+
+
+def test_requests_and_errors(daemon):
+    path, client = daemon
+    assert client.ping()["pid"] == os.getpid()
+    serials = {s for device in client.refresh_devices() for s in device["transports"]}
+    assert serials == set(STAND_IN_DEVICES)
+
+    assert _raw_call(path, {"id": 7, "method": "__init__"}) == {"id": 7, "error": "Unknown method: __init__"}
+    reply = _raw_call(path, {"id": 8, "method": "stop_session", "params": {"nope": 1}})
+    assert reply["id"] == 8 and reply["error"].startswith("Bad parameters for stop_session")
+
+
+def test_second_daemon_leaves_the_running_one_alone(daemon, tmp_path):
+    path, client = daemon
+    with pytest.raises(ServiceError, match="already running"):
+        run_daemon(path)
+    assert os.path.exists(path)
+    assert client.ping()
+
+    log = (tmp_path / "home" / LOG_FILE).read_text()
+    assert f"Daemon listening on {path}" in log
+
+
+def test_cli_lists_devices_and_sessions(daemon, capsys):
+    path, client = daemon
+    assert cli.main(["--socket", path, "devices", "--refresh"]) == 0
+    output = capsys.readouterr().out
+    assert all(serial in output for serial in STAND_IN_DEVICES[:2])
+
+    assert cli.main(["--socket", path, "sessions"]) == 0
+    assert capsys.readouterr().out == ""
+
+
+def test_cli_without_daemon(tmp_path, capsys):
+    assert cli.main(["--socket", str(tmp_path / "none.sock"), "shutdown"]) == 1
+    assert "not running" in capsys.readouterr().err
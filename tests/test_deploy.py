@@ -0,0 +1,82 @@
+"""Streamed install and push against a stand-in adb that really moves the bytes"""
+
+import os
+import stat
+import sys
+
+from andromirror.deploy import INSTALL, PUSH, DeployJob
+
+# Forwards stdin like `adb shell`: "cat > file" runs on the host's sh,
+# "cmd package install -S N" reads N bytes and saves them next to the
+# script. The serial "stuck" never reads its stdin.
+ADB = """#!{python}
+import os, subprocess, sys, time
+args = sys.argv[1:]
+serial = None
+if args[0] == "-s":
+    serial, args = args[1], args[2:]
+assert args[0] == "shell", args
+if serial == "stuck":
+    time.sleep(60)
+command = args[1:]
+if command[:3] == ["cmd", "package", "install"]:
+    size = int(command[command.index("-S") + 1])
+    data = sys.stdin.buffer.read()
+    with open(os.path.join(os.path.dirname(__file__), serial + ".apk"), "wb") as fh:
+        fh.write(data)
+    print("Success" if len(data) == size else "Failure [size mismatch]")
+else:
+    sys.exit(subprocess.call(["sh", "-c", " ".join(command)]))
+"""
+
+PAYLOAD_BYTES = 3 * 1024 * 1024  # far beyond a pipe buffer
+
+
+def install_adb(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    adb = bin_dir / "adb"
+    adb.write_text(ADB.format(python=sys.executable))
+    adb.chmod(adb.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    return bin_dir
+
+
+def make_payload(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(os.urandom(PAYLOAD_BYTES))
+    return path
+
+
+def test_streamed_push_moves_every_byte(tmp_path, monkeypatch):
+    install_adb(tmp_path, monkeypatch)
+    source = make_payload(tmp_path, "video.bin")
+    remote_dir = tmp_path / "device"
+    remote_dir.mkdir()
+
+    result, = DeployJob(PUSH, [str(source)], remote_dir=str(remote_dir), timeout=30).run(["dev1"])
+
+    assert result.ok, result.message
+    assert result.bytes_sent == PAYLOAD_BYTES
+    assert (remote_dir / "video.bin").read_bytes() == source.read_bytes()
+
+
+def test_streamed_install_moves_every_byte(tmp_path, monkeypatch):
+    bin_dir = install_adb(tmp_path, monkeypatch)
+    apk = make_payload(tmp_path, "app.apk")
+
+    result, = DeployJob(INSTALL, [str(apk)], timeout=30).run(["dev1"])
+
+    assert result.ok, result.message
+    assert (bin_dir / "dev1.apk").read_bytes() == apk.read_bytes()
+
+
+def test_streamed_transfer_times_out_when_the_device_stops_reading(tmp_path, monkeypatch):
+    install_adb(tmp_path, monkeypatch)
+    source = make_payload(tmp_path, "video.bin")
+
+    result, = DeployJob(PUSH, [str(source)], remote_dir=str(tmp_path), timeout=2).run(["stuck"])
+
+    assert not result.ok
+    assert result.message == "Timed out"
+    assert result.duration < 10
@@ -0,0 +1,49 @@
+from andromirror.devices import DeviceTracker
+
+
+class FakeShellPool:
+    """Answers IDENTITY_COMMAND from a serial -> (hardware serial, fingerprint, model) table"""
+
+    def __init__(self, identities):
+        self.identities = identities
+        self.asked = []
+
+    def run_all(self, serials, command, timeout=None):
+        self.asked.extend(serials)
+        return {s: (0, "\n".join(self.identities[s]) + "\n") for s in serials if s in self.identities}
+
+
+def _group(identities, serials):
+    return {tuple(device.transports) for device in DeviceTracker(FakeShellPool(identities)).group(serials)}
+
+
+def test_usb_and_wifi_of_one_phone_are_grouped():
+    phone = ("R58M123", "google/panther:14", "Pixel 7")
+    assert _group({"R58M123": phone, "10.0.0.2:5555": phone}, ["10.0.0.2:5555", "R58M123"]) == {
+        ("R58M123", "10.0.0.2:5555"),
+    }
+
+
+def test_two_usb_phones_with_one_identity_stay_apart():
+    phone = ("R58M123", "acme/tab:12", "Tab")
+    assert _group({"usb-1": phone, "usb-2": phone}, ["usb-1", "usb-2"]) == {("usb-1",), ("usb-2",)}
+
+
+def test_usb_transports_on_different_servers_are_grouped():
+    phone = ("R58M123", "acme/tab:12", "Tab")
+    identities = {"usb-1": phone, "usb-1@lab:5037": phone}
+    assert _group(identities, ["usb-1", "usb-1@lab:5037"]) == {("usb-1", "usb-1@lab:5037")}
+
+
+def test_placeholder_serials_are_never_grouped():
+    cheap = ("0123456789ABCDEF", "acme/tab:12", "Tab")
+    identities = {"usb-1": cheap, "10.0.0.3:5555": cheap}
+    assert _group(identities, ["usb-1", "10.0.0.3:5555"]) == {("usb-1",), ("10.0.0.3:5555",)}
+
+
+def test_unanswered_devices_are_asked_again():
+    pool = FakeShellPool({})
+    tracker = DeviceTracker(pool)
+    assert [d.key for d in tracker.group(["usb-1"])] == ["usb-1"]
+    tracker.group(["usb-1"])
+    assert pool.asked == ["usb-1", "usb-1"]
@@ -0,0 +1,66 @@
+"""Throughput probe against a stand-in adb, network keys and the result cache"""
+
+import os
+import socket
+import stat
+import sys
+import time
+
+import pytest
+
+from andromirror.link_probe import (
+    WARMUP_BYTES, LinkProbeCache, LinkProbeError, LinkProbeResult, _measure_throughput, network_key
+)
+
+# `adb exec-out` that runs the command on the host's sh; the serial
+# "stalled" sends the warm-up and then goes silent without closing.
+ADB = """#!{python}
+import subprocess, sys, time
+args = sys.argv[1:]
+serial = None
+if args[0] == "-s":
+    serial, args = args[1], args[2:]
+assert args[0] == "exec-out", args
+if serial == "stalled":
+    sys.stdout.buffer.write(bytes({warmup}))
+    sys.stdout.flush()
+    time.sleep(60)
+sys.exit(subprocess.call(["sh", "-c", args[1]]))
+"""
+
+
+@pytest.fixture
+def adb(tmp_path, monkeypatch):
+    adb = tmp_path / "adb"
+    adb.write_text(ADB.format(python=sys.executable, warmup=WARMUP_BYTES))
+    adb.chmod(adb.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", str(tmp_path) + os.pathsep + os.environ["PATH"])
+
+
+def test_throughput_is_measured_after_the_warmup(adb):
+    assert _measure_throughput("10.0.0.2:5555", 4 * WARMUP_BYTES, timeout=10) > 0
+
+
+def test_stalled_link_times_out_while_reading(adb):
+    start = time.monotonic()
+    with pytest.raises(LinkProbeError, match="timed out"):
+        _measure_throughput("stalled", 4 * WARMUP_BYTES, timeout=1)
+    assert time.monotonic() - start < 5
+
+
+def test_network_key_routes_ipv4_and_ipv6_literals():
+    assert network_key("127.0.0.1:5555") == "127.0.0.1"
+    assert network_key("serial@127.0.0.1:5037") == "127.0.0.1"
+    if socket.has_ipv6:
+        assert network_key("[::1]:5555") in ("::1", "unknown")  # unknown without an IPv6 loopback
+    assert network_key("[::1") == "unknown"
+
+
+def test_cache_round_trip(tmp_path):
+    cache = LinkProbeCache(tmp_path / "link_cache.json")
+    cache.put("127.0.0.1:5555", LinkProbeResult(5_000_000, 3.0))
+
+    cached = LinkProbeCache(tmp_path / "link_cache.json").get("127.0.0.1:5555")
+    assert cached.throughput == 5_000_000
+    assert cached.recommend() == ("16M", "FHD (1080p)")
+    assert cache.get("127.0.0.2:5555") is None
@@ -0,0 +1,57 @@
+import os
+
+from andromirror.logarchive import LogArchive
+
+
+def _segment_files(root):
+    return sorted(os.listdir(os.path.join(root, "segments")))
+
+
+def test_instances_share_the_index(tmp_path):
+    first, second = LogArchive(tmp_path), LogArchive(tmp_path)
+    first.append("a", "k1", "Phone", "usb-1", "hello from the daemon")
+    second.append("b", "k2", "Tablet", "usb-2", "hello from the gui")
+    first.close()
+    second.close()
+
+    archive = LogArchive(tmp_path)
+    assert len(archive.segments) == 2
+    assert len(_segment_files(tmp_path)) == 2
+    assert {r["text"] for r in archive.search("hello")} == {"hello from the daemon", "hello from the gui"}
+    archive.close()
+
+
+def test_live_journal_of_another_instance_is_left_alone(tmp_path):
+    writer = LogArchive(tmp_path)
+    writer.append("a", "k1", "Phone", "usb-1", "still running")
+
+    LogArchive(tmp_path).close()
+    assert len(os.listdir(os.path.join(tmp_path, "open"))) == 2  # journal and its lock file
+
+    writer.close()
+    assert len(LogArchive(tmp_path).segments) == 1
+
+
+def test_retention_deletes_dropped_segments(tmp_path):
+    for session in range(5):
+        archive = LogArchive(tmp_path, max_bytes=1)
+        archive.append(session, "k", "Phone", "usb-1", f"line {session}")
+        archive.close()
+
+    archive = LogArchive(tmp_path, max_bytes=1)
+    assert len(archive.segments) <= 1
+    assert len(_segment_files(tmp_path)) == len(archive.segments)
+    archive.close()
+
+
+def test_output_after_close_session_is_dropped(tmp_path):
+    archive = LogArchive(tmp_path)
+    for session in range(5):
+        archive.append(session, "k", "Phone", "usb-1", "mirroring")
+        archive.close_session(session)
+        archive.append(session, "k", "Phone", "usb-1", "INFO: scrcpy exiting after stop")
+
+    assert archive._journals == {}
+    archive.close()
+    assert os.listdir(os.path.join(tmp_path, "open")) == []
+    assert len(archive.segments) == 5
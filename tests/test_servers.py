@@ -0,0 +1,127 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from andromirror import servers
+from andromirror.adb import server_address
+from andromirror.servers import AdbServerPool, normalize_endpoint
+
+
+def _stand_in_server(devices, delay=0.0, family=socket.AF_INET, host="127.0.0.1"):
+    """A host-protocol adb server answering host:devices after delay seconds"""
+    listener = socket.socket(family, socket.SOCK_STREAM)
+    listener.bind((host, 0))
+    listener.listen()
+
+    def handle(conn):
+        with conn:
+            length = int(conn.recv(4), 16)
+            request = conn.recv(length)
+            time.sleep(delay)
+            if request == b"host:devices":
+                payload = "".join(f"{serial}\tdevice\n" for serial in devices).encode()
+                conn.sendall(b"OKAY" + b"%04x" % len(payload) + payload)
+            else:
+                conn.sendall(b"FAIL0007unknown")
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener, listener.getsockname()[1]
+
+
+def _closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(servers, "list_online_serials", lambda timeout=10: ["usb-1"])
+    pool = AdbServerPool(deadline=1.0, host_timeout=2.0)
+    yield pool
+    pool.close()
+
+
+def test_list_serials_does_not_wait_for_remote_servers(pool):
+    fast, fast_port = _stand_in_server(["fast-1"])
+    slow, slow_port = _stand_in_server(["slow-1"], delay=1.5)
+    closed_port = _closed_port()
+    pool.configure([f"127.0.0.1:{fast_port}", f"127.0.0.1:{slow_port}", f"127.0.0.1:{closed_port}"])
+
+    start = time.monotonic()
+    assert pool.list_serials() == ["usb-1"]  # nothing cached yet
+    assert time.monotonic() - start < 0.5
+
+    time.sleep(0.3)
+    assert pool.list_serials() == ["usb-1", f"fast-1@127.0.0.1:{fast_port}"]
+
+    rows = {row["server"]: row for row in pool.status()}
+    assert rows[f"127.0.0.1:{fast_port}"]["ok"] and rows[f"127.0.0.1:{fast_port}"]["devices"] == 1
+    assert rows[f"127.0.0.1:{slow_port}"]["pending"]
+    assert not rows[f"127.0.0.1:{closed_port}"]["ok"]
+
+    time.sleep(1.5)
+    assert f"slow-1@127.0.0.1:{slow_port}" in pool.list_serials()
+    fast.close()
+    slow.close()
+
+
+def test_refresh_remote_waits_until_the_deadline(pool):
+    slow, slow_port = _stand_in_server(["slow-1"], delay=1.5)
+    pool.configure([f"127.0.0.1:{slow_port}"])
+
+    start = time.monotonic()
+    assert pool.refresh_remote() == []
+    assert 0.9 < time.monotonic() - start < 1.4
+    slow.close()
+
+
+def test_ipv6_endpoints():
+    assert normalize_endpoint("::1") == "[::1]:5037"
+    assert normalize_endpoint("[fe80::1]:6000") == "[fe80::1]:6000"
+    assert server_address("[fe80::1]:6000") == ("fe80::1", 6000)
+    for endpoint in ("[::1", "[::1]x", "host:port", "[]:5037"):
+        with pytest.raises(ValueError):
+            normalize_endpoint(endpoint)
+
+
+@pytest.mark.skipif(not socket.has_ipv6, reason="no IPv6")
+def test_ipv6_server_is_queried(pool):
+    try:
+        listener, port = _stand_in_server(["v6-1"], family=socket.AF_INET6, host="::1")
+    except OSError:
+        pytest.skip("::1 not available")
+    endpoint = pool.configure([f"[::1]:{port}"])[0]
+    assert pool.refresh_remote() == [f"v6-1@[::1]:{port}"]
+    assert pool.status()[0]["server"] == endpoint
+    listener.close()
+
+
+def test_remote_devices_survive_a_missing_local_adb(monkeypatch):
+    def no_adb(timeout=10):
+        raise FileNotFoundError("adb")
+
+    monkeypatch.setattr(servers, "list_online_serials", no_adb)
+    pool = AdbServerPool(deadline=1.0, host_timeout=2.0)
+    remote, port = _stand_in_server(["remote-1"])
+    with pytest.raises(FileNotFoundError):
+        pool.list_serials()  # nothing else to show: the error is the answer
+
+    pool.configure([f"127.0.0.1:{port}"])
+    pool.refresh_remote()
+    assert pool.list_serials() == [f"remote-1@127.0.0.1:{port}"]
+    local, row = pool.status()
+    assert local["local"] and not local["ok"] and local["error"] == "adb"
+    assert row["ok"] and not row["local"]
+    pool.close()
+    remote.close()
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+
+from andromirror.config import DEFAULT_SETTINGS
+from andromirror.devices import LogicalDevice
+from andromirror.sessions import FAILED, PAUSED, SessionManager
+from andromirror.soak import install_stand_ins
+
+
+def _paused_session(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    install_stand_ins(str(tmp_path))
+    events = []
+    manager = SessionManager(lambda session, message, level: events.append(message), list_serials=lambda: [])
+    session = manager.start(LogicalDevice("key", "Phone", ["usb-1", "10.0.0.2:5555"]), dict(DEFAULT_SETTINGS))
+    assert session.wait_ready()
+    session.pause("Too hot")
+    assert session.state == PAUSED and session.serial == "usb-1"
+    return manager, session, events
+
+
+def test_paused_session_follows_its_device_to_another_transport(tmp_path, monkeypatch):
+    manager, session, events = _paused_session(tmp_path, monkeypatch)
+
+    manager.update_devices([LogicalDevice("key", "Phone", ["10.0.0.2:5555"])])
+
+    assert session.state == PAUSED
+    assert session.serial == "10.0.0.2:5555"
+    assert session.process is None
+    assert "while paused" in events[-1]
+
+
+def test_paused_session_fails_when_its_device_is_gone(tmp_path, monkeypatch):
+    manager, session, events = _paused_session(tmp_path, monkeypatch)
+
+    manager.update_devices([])
+
+    assert session.state == FAILED
+    assert manager.active() == []
+
+
+SCRCPY_REJECTING_BITRATE = '''#!{python}
+import signal, sys, time
+signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+if "99M" in sys.argv:
+    time.sleep(0.3)
+    print("ERROR: bitrate not supported by the encoder", flush=True)
+    sys.exit(1)
+print("INFO: Texture: 1080x2400", flush=True)
+while True:
+    print("INFO: still mirroring", flush=True)
+    time.sleep(0.02)
+'''
+
+
+def test_failed_apply_reports_the_candidates_own_output(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    install_stand_ins(str(tmp_path))
+    scrcpy = tmp_path / "scrcpy"
+    scrcpy.write_text(SCRCPY_REJECTING_BITRATE.format(python=sys.executable))
+    events = []
+    manager = SessionManager(lambda session, message, level: events.append(message), list_serials=lambda: [])
+    session = manager.start(LogicalDevice("key", "Phone", ["usb-1"]), dict(DEFAULT_SETTINGS))
+    assert session.wait_ready()
+
+    assert not session.apply_settings(dict(DEFAULT_SETTINGS, bitrate="99M"), timeout=5)
+    assert "bitrate not supported" in events[-1]
+    session.stop()
+
+
+def test_refreshes_during_a_switch_start_one_launch(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    install_stand_ins(str(tmp_path))
+    manager = SessionManager(list_serials=lambda: [])
+    session = manager.start(LogicalDevice("key", "Phone", ["10.0.0.2:5555"]), dict(DEFAULT_SETTINGS))
+    assert session.wait_ready()
+
+    launches = []
+    launch = session._launch
+    monkeypatch.setattr(session, "_launch", lambda serial: (launches.append(serial), time.sleep(0.3), launch(serial)))
+    for _ in range(5):
+        manager.update_devices([LogicalDevice("key", "Phone", ["usb-1", "10.0.0.2:5555"])])
+        time.sleep(0.02)
+    deadline = time.monotonic() + 5
+    while session.serial != "usb-1" and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert launches == ["usb-1"]
+    assert session.serial == "usb-1"
+    session.stop()
+
+
+SCRCPY_FAILING_FOR_BAD = '''#!{python}
+import signal, sys, time
+signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+if any("bad" in arg for arg in sys.argv):
+    print("ERROR: device not found", flush=True)
+    sys.exit(1)
+print("INFO: Texture: 1080x2400", flush=True)
+while True:
+    time.sleep(1)
+'''
+
+
+def test_resume_counts_only_sessions_that_came_up(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    install_stand_ins(str(tmp_path))
+    (tmp_path / "scrcpy").write_text(SCRCPY_FAILING_FOR_BAD.format(python=sys.executable))
+    manager = SessionManager(list_serials=lambda: [])
+    devices = [LogicalDevice("good", "Phone", ["good-1"]), LogicalDevice("bad", "Phone", ["bad-1"])]
+
+    assert manager.resume(devices, ["good", "bad", "offline"], {}, dict(DEFAULT_SETTINGS)) == 1
+    manager.stop_all()
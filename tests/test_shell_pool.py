@@ -0,0 +1,76 @@
+"""Shell channels against the soak's stand-in adb, whose `shell` is the host's sh"""
+
+import os
+import subprocess
+
+import pytest
+
+from andromirror.shell_pool import ShellChannel, ShellError, ShellPool, ShellTimeout
+from andromirror.soak import install_stand_ins
+
+
+@pytest.fixture(autouse=True)
+def adb(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    install_stand_ins(str(tmp_path))
+
+
+def test_output_and_exit_codes_are_framed():
+    channel = ShellChannel("usb-1")
+    assert channel.run("echo one; echo two") == (0, "one\ntwo")
+    assert channel.run("printf partial") == (0, "partial")  # no trailing newline
+    assert channel.run("echo oops >&2; exit 3") == (3, "oops")
+    assert channel.run("read line; echo \"got $line\"") == (0, "got ")  # stdin is not the channel's
+    channel.close()
+
+
+def test_timeout_restarts_the_channel():
+    channel = ShellChannel("usb-1")
+    with pytest.raises(ShellTimeout):
+        channel.run("sleep 5", timeout=0.3)
+    assert not channel.alive
+    assert channel.run("echo back") == (0, "back")
+    channel.close()
+
+
+def test_dead_shell_is_restarted_before_the_next_command():
+    channel = ShellChannel("usb-1")
+    channel.run("true")
+    channel._process.kill()
+    channel._process.wait()
+    assert channel.run("echo fresh") == (0, "fresh")
+    channel.close()
+
+
+def test_command_is_not_repeated_when_the_shell_dies_running_it(tmp_path):
+    channel = ShellChannel("usb-1")
+    marker = tmp_path / "runs"
+    with pytest.raises(ShellError):
+        channel.run(f"echo run >> {marker}; kill -9 $$; sleep 1")
+    assert marker.read_text() == "run\n"
+    channel.close()
+
+
+def test_closed_channel_refuses_commands():
+    pool = ShellPool()
+    channel = pool.channel("usb-1")
+    pool.sync([])
+    with pytest.raises(ShellError, match="closed"):
+        channel.run("true")
+    assert not channel.alive
+    assert pool.run("usb-1", "echo new") == (0, "new")  # a new channel for the device
+    pool.close()
+
+
+def test_run_all_leaves_out_failing_devices(monkeypatch):
+    popen = subprocess.Popen
+
+    def flaky_popen(cmd, *args, **kwargs):
+        if "broken" in cmd:
+            raise PermissionError("denied")
+        return popen(cmd, *args, **kwargs)
+
+    monkeypatch.setattr(subprocess, "Popen", flaky_popen)
+    pool = ShellPool()
+    assert pool.run_all(["usb-1", "broken", "usb-2"], "echo hi") == {"usb-1": (0, "hi"), "usb-2": (0, "hi")}
+    pool.close()
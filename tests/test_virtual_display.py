@@ -0,0 +1,88 @@
+import pytest
+
+from andromirror import sessions
+from andromirror.devices import LogicalDevice
+from andromirror.scrcpy_window import Geometry
+from andromirror.sessions import MirrorSession
+from andromirror.virtual_display import (
+    DisplayCapabilities, DisplayError, check_start_app, query_capabilities, resolve_display, tile_size
+)
+
+PHONE = DisplayCapabilities(sdk=33, width=1080, height=2400, density=420)
+WM_OUTPUT = "33\nPhysical size: 1080x2400\nOverride size: 720x1600\nPhysical density: 420\nOverride density: 280\n"
+
+
+class FakeShellPool:
+    def __init__(self, reply):
+        self.reply = reply
+        self.commands = []
+
+    def run(self, serial, command, timeout=None):
+        self.commands.append(command)
+        return self.reply
+
+
+def _virtual(**settings):
+    return dict({"display_mode": "virtual", "virtual_size": "window", "virtual_dpi": "auto"}, **settings)
+
+
+def test_capabilities_use_the_physical_values():
+    assert query_capabilities(FakeShellPool((0, WM_OUTPUT)), "usb-1") == PHONE
+    with pytest.raises(DisplayError, match="screen size"):
+        query_capabilities(FakeShellPool((0, "33\n")), "usb-1")
+
+
+def test_needs_android_10():
+    with pytest.raises(DisplayError, match="Android 10"):
+        resolve_display(_virtual(), PHONE._replace(sdk=28))
+    assert resolve_display(_virtual(), PHONE._replace(sdk=29))
+
+
+def test_sizes_are_aligned_and_bounded():
+    assert resolve_display(_virtual(virtual_size="1283x723"), PHONE)["virtual_size"] == "1280x720"
+    with pytest.raises(DisplayError, match="too small"):
+        resolve_display(_virtual(virtual_size="200x1000"), PHONE)
+    with pytest.raises(DisplayError, match="larger than"):
+        resolve_display(_virtual(virtual_size="4104x1000"), PHONE)
+    with pytest.raises(DisplayError, match="larger than"):
+        resolve_display(_virtual(virtual_size="4096x2400"), PHONE)
+    with pytest.raises(DisplayError, match="WIDTHxHEIGHT"):
+        resolve_display(_virtual(virtual_size="big"), PHONE)
+
+
+def test_window_size_without_a_host_falls_back_to_the_panel():
+    assert resolve_display(_virtual(), PHONE)["virtual_size"] == "864x1920"
+
+
+def test_dpi_auto_and_bounds():
+    assert resolve_display(_virtual(virtual_size="720x1600"), PHONE)["virtual_dpi"] == "280"
+    assert resolve_display(_virtual(virtual_dpi="240"), PHONE)["virtual_dpi"] == "240"
+    for dpi in ("71", "801", "high"):
+        with pytest.raises(DisplayError):
+            resolve_display(_virtual(virtual_dpi=dpi), PHONE)
+
+
+def test_tile_size():
+    assert tile_size(1920, 1080) == "1904x1016"
+    assert tile_size(1920, 1080, tiles=4) == "944x472"
+
+
+def test_start_app_check():
+    assert check_start_app(FakeShellPool((0, "package:/data/app/base.apk")), "usb-1", "+org.example") is None
+    assert "not installed" in check_start_app(FakeShellPool((1, "")), "usb-1", "org.example")
+    pool = FakeShellPool((1, ""))
+    assert check_start_app(pool, "usb-1", "?Calculator") is None and pool.commands == []
+
+
+def test_session_window_size_follows_the_scrcpy_window(monkeypatch):
+    session = MirrorSession(LogicalDevice("key", "Phone", ["usb-1"]), {}, lambda *args: None)
+    assert session.window_size() is None  # nothing running
+
+    class Process:
+        pid = 4242
+
+    session.process = Process()
+    monkeypatch.setattr(sessions, "window_geometry", lambda pid: Geometry(10, 20, 1001, 603) if pid == 4242 else None)
+    assert session.window_size() == "1000x600"
+    monkeypatch.setattr(sessions, "window_geometry", lambda pid: None)
+    assert session.window_size() is None